@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import json
+import os
+from dataclasses import asdict
+
+from clients import openai_autorater, openai_client
+from clients.batching import BatchingPolicy, VisionBatcher
+from clients.cassette import CASSETTE_FILE, Cassette
+from clients.http_pool import SharedHTTPPool
+from clients.request_pipeline import ChatCompletionCaller
+from clients.singleflight import SingleFlight
+from load_datasets import load_ok_vqa_dataset
+from results import LOCAL_DATASET_STORE
+
+BATCHING_BENCHMARK_FILE = "batching_benchmark.json"
+
+POLICIES = {
+    "one_image": BatchingPolicy(),
+    "chunk_4_questions": BatchingPolicy(max_questions_per_request=4),
+    "pack_2_images": BatchingPolicy(max_images_per_request=2),
+    "pack_4_images": BatchingPolicy(max_images_per_request=4),
+}
+
+
+async def benchmark_policy(model: openai_client.OpenAIVQAModel, autorater: openai_autorater.OpenAIAIRater, dataset, policy: BatchingPolicy, num_images: int, temperature: float, concurrency: int) -> dict:
+    """
+    Runs the first num_images images through one batching policy and grades the answers.
+
+    Counters are read as deltas on the shared model, so policies can run
+    back to back on one model. Nothing is written to the results database.
+    """
+    batcher = VisionBatcher(model, policy)
+    requests_before, prompt_before, completion_before = model.vision_requests, model.prompt_tokens, model.completion_tokens
+    graded_total = 0
+    correct_total = 0
+    index_queue: asyncio.Queue = asyncio.Queue()
+    for entry_idx in range(min(num_images, len(dataset))):
+        index_queue.put_nowait(entry_idx)
+
+    async def worker():
+        nonlocal graded_total, correct_total
+        while not index_queue.empty():
+            entry = dataset[index_queue.get_nowait()]
+            predicted_answers = await batcher.query_image(entry['image'], entry['questions'], temperature=temperature)
+            graded = await autorater.grade_answers(entry['questions'], entry['answers'], predicted_answers)
+            graded_total += len(graded)
+            correct_total += sum(score for _, score in graded)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    requests = model.vision_requests - requests_before
+    return {
+        "policy": asdict(policy),
+        "images": batcher.images,
+        "requests": requests,
+        "requests_per_image": requests / batcher.images if batcher.images else 0.0,
+        "prompt_tokens_per_image": (model.prompt_tokens - prompt_before) / batcher.images if batcher.images else 0.0,
+        "completion_tokens_per_image": (model.completion_tokens - completion_before) / batcher.images if batcher.images else 0.0,
+        "graded": graded_total,
+        "accuracy": correct_total / graded_total if graded_total else 0.0,
+    }
+
+
+async def run_benchmark(policy_names: list[str], num_images: int, temperature: float, concurrency: int, cassette_mode: str | None) -> dict:
+    api_key = os.getenv("OPENAI_API_KEY", "")
+    # The clients ExperimentRunner would build, without its results database, predictions or outcome matrix.
+    cassette = Cassette(cassette_mode, CASSETTE_FILE) if cassette_mode else None
+    caller = ChatCompletionCaller(SharedHTTPPool(api_key).client, SingleFlight(), cassette)
+    model = openai_client.OpenAIVQAModel(api_key, caller=caller)
+    autorater = openai_autorater.OpenAIAIRater(api_key, caller=caller)
+    dataset = load_ok_vqa_dataset.OKVQA(num_images=num_images, local_store_path=LOCAL_DATASET_STORE).get_dataset()
+    results = {}
+    for name in policy_names:
+        print(f"Benchmarking batching policy {name} on {num_images} images at temperature {temperature}")
+        results[name] = await benchmark_policy(model, autorater, dataset, POLICIES[name], num_images, temperature, concurrency)
+    return results
+
+
+def format_report(results: dict) -> str:
+    lines = [
+        "| Policy | Requests / image | Prompt tokens / image | Completion tokens / image | Graded | Accuracy |",
+        "|---|---|---|---|---|---|",
+    ]
+    for name, result in results.items():
+        lines.append(f"| {name} | {result['requests_per_image']:.2f} | {result['prompt_tokens_per_image']:.0f} | "
+                     f"{result['completion_tokens_per_image']:.0f} | {result['graded']} | {result['accuracy']:.3f} |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare vision batching policies on requests, tokens and accuracy per image.")
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=list(POLICIES), help="Policies to run.")
+    parser.add_argument("--num-images", type=int, default=50, help="Images from the start of the dataset to use.")
+    parser.add_argument("--temperature", type=float, default=0.0, help="Sampling temperature for every request.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Images in flight at once; packing needs at least max_images_per_request.")
+    parser.add_argument("--cassette", choices=["record", "replay"], default=None, help="Record API responses, or replay them offline.")
+    args = parser.parse_args()
+
+    if args.cassette != "replay" and not os.getenv("OPENAI_API_KEY"):
+        print("Error: OPENAI_API_KEY environment variable not set.")
+        return
+
+    results = asyncio.run(run_benchmark(args.policies, args.num_images, args.temperature, args.concurrency, args.cassette))
+    with open(BATCHING_BENCHMARK_FILE, "w") as f:
+        json.dump(results, f, indent=4)
+    print(format_report(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import heapq
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+import confidence_intervals
+
+PRECISION_REPORT_FILE = "precision_report.json"
+# Half-widths of the 95% Wilson interval the precision report counts cells against.
+PRECISION_TARGETS = (0.1, 0.2, 0.3)
+
+# Rough per-item token costs used to reserve budget before an item runs; the
+# budget itself is checked against the token counts the API reports.
+ESTIMATED_IMAGE_TOKENS = 800
+ESTIMATED_ANSWER_TOKENS_PER_QUESTION = 40
+ESTIMATED_GRADING_TOKENS_PER_QUESTION = 160
+
+WorkItem = Tuple[int, float]
+
+
+def estimate_item_cost(num_questions: int, unit: str) -> float:
+    """
+    Estimated cost of asking one image's questions and grading the answers.
+
+    Args:
+        num_questions: Questions asked about the image.
+        unit: "calls" (one vision call plus one grading call per question) or "tokens".
+    """
+    if unit == "calls":
+        return 1 + num_questions
+    if unit == "tokens":
+        return ESTIMATED_IMAGE_TOKENS + (ESTIMATED_ANSWER_TOKENS_PER_QUESTION + ESTIMATED_GRADING_TOKENS_PER_QUESTION) * num_questions
+    raise ValueError(f"Unknown budget unit: {unit}")
+
+
+def variance_reduction(correct: int, total: int) -> float:
+    """
+    Expected drop in the posterior variance of a cell's accuracy from one more graded answer.
+
+    Uses a Beta(1, 1) prior, whose posterior variance is p(1 - p) / (n + 3)
+    with p the posterior mean, so unseen and rarely seen cells gain the most.
+    """
+    p = (correct + 1) / (total + 2)
+    return p * (1 - p) * (1 / (total + 3) - 1 / (total + 4))
+
+
+class BudgetAllocator:
+    """
+    Greedy scheduler that spends a fixed budget on the most informative (image, temperature) items.
+
+    Every item asks an image's questions at one temperature, adding one
+    graded answer to each (question, temperature) cell it covers. An item's
+    priority is the summed variance_reduction of its cells per unit of
+    estimated cost, so items carrying rare questions, or questions whose
+    accuracy is still near 0.5, are run first. Answers still in flight count
+    towards their cells, so concurrent workers do not pile onto the same
+    cells before results come back.
+
+    Priorities mostly fall as cells fill up, so a lazy max-heap is used:
+    the popped item is re-scored and only taken if it still beats the next
+    one, otherwise it is pushed back with its new score.
+    """
+
+    def __init__(self, item_questions: Dict[WorkItem, List[str]], counts: Dict[Tuple[str, float], Tuple[int, int]], budget: float, costs: Dict[WorkItem, float]):
+        """
+        Args:
+            item_questions: (entry index, temperature) -> the questions the item asks.
+            counts: (question, temperature) -> (true_positives, total_runs) observed so far.
+            budget: Total budget, in the same unit as costs.
+            costs: Estimated cost of every item.
+        """
+        self.item_questions = item_questions
+        self.costs = costs
+        self.budget = budget
+        self.reserved = 0.0
+        self.spent = 0.0
+        self.items_started = 0
+        self.items_done = 0
+        self._correct: Dict[Tuple[str, float], int] = {}
+        self._total: Dict[Tuple[str, float], int] = {}
+        self._pending: Dict[Tuple[str, float], int] = {}
+        for cell, (correct, total) in counts.items():
+            self._correct[cell] = correct
+            self._total[cell] = total
+        self._heap = [(-self._score(item), i, item) for i, item in enumerate(item_questions)]
+        heapq.heapify(self._heap)
+
+    def _score(self, item: WorkItem) -> float:
+        temperature = item[1]
+        gain = 0.0
+        for question in self.item_questions[item]:
+            cell = (question, temperature)
+            gain += variance_reduction(self._correct.get(cell, 0), self._total.get(cell, 0) + self._pending.get(cell, 0))
+        return gain / max(self.costs[item], 1e-9)
+
+    def next_item(self, spent: float) -> WorkItem | None:
+        """
+        Returns the next item to run, or None when no remaining item fits the budget.
+
+        While items are in flight a None is not final: their completion
+        releases reservations, so callers should retry after one completes.
+
+        Args:
+            spent: Budget actually used so far, from the API counters.
+        """
+        self.spent = spent
+        over_budget = []
+        chosen = None
+        while self._heap:
+            _, order, item = heapq.heappop(self._heap)
+            score = self._score(item)
+            if self._heap and score < -self._heap[0][0]:
+                heapq.heappush(self._heap, (-score, order, item))
+                continue
+            if spent + self.reserved + self.costs[item] > self.budget:
+                # Items differ in cost, so a cheaper one may still fit now, and
+                # this one may fit later if in-flight items cost less than estimated.
+                over_budget.append((-score, order, item))
+                continue
+            chosen = item
+            break
+        for entry in over_budget:
+            heapq.heappush(self._heap, entry)
+        if chosen is None:
+            return None
+
+        self.reserved += self.costs[chosen]
+        self.items_started += 1
+        for question in self.item_questions[chosen]:
+            cell = (question, chosen[1])
+            self._pending[cell] = self._pending.get(cell, 0) + 1
+        return chosen
+
+    def complete(self, item: WorkItem, graded: Iterable[Tuple[str, bool]]):
+        """Releases an item's reservation and folds its graded answers into the cell counts."""
+        self.reserved -= self.costs[item]
+        self.items_done += 1
+        temperature = item[1]
+        for question in self.item_questions[item]:
+            cell = (question, temperature)
+            self._pending[cell] -= 1
+        for question, score in graded:
+            cell = (question, temperature)
+            self._total[cell] = self._total.get(cell, 0) + 1
+            self._correct[cell] = self._correct.get(cell, 0) + bool(score)
+
+
+def precision_report(counts: Dict[float, Dict[str, Tuple[int, int]]], targets: Iterable[float] = PRECISION_TARGETS) -> dict:
+    """
+    Summarizes the 95% Wilson half-widths achieved over every (question, temperature) cell.
+
+    Args:
+        counts: temperature -> question -> (true_positives, total_runs).
+        targets: Half-widths to report the share of cells within.
+
+    Returns:
+        Overall and per-temperature cell counts, half-width percentiles and target coverage.
+    """
+    questions, temps, successes, totals = confidence_intervals.build_count_matrix(counts)
+    low, high = confidence_intervals.wilson_interval(successes, totals)
+    half_widths = np.where(totals > 0, (high - low) / 2, np.nan)
+
+    def summarize(widths: np.ndarray) -> dict:
+        observed = widths[~np.isnan(widths)]
+        if observed.size == 0:
+            return {"cells": int(widths.size), "observed_cells": 0}
+        return {
+            "cells": int(widths.size),
+            "observed_cells": int(observed.size),
+            "median_half_width": float(np.median(observed)),
+            "p90_half_width": float(np.percentile(observed, 90)),
+            "max_half_width": float(observed.max()),
+            "share_within": {str(target): float(np.mean(observed <= target)) for target in targets},
+        }
+
+    return {
+        "overall": summarize(half_widths.ravel()),
+        "by_temperature": {str(temp): summarize(half_widths[:, t_idx]) for t_idx, temp in enumerate(temps)},
+    }
@@ -0,0 +1,122 @@
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import List, Union
+
+from PIL import Image
+
+from clients.openai_client import OpenAIVQAModel
+
+_ANSWER_NUMBER = re.compile(r"^\d+\.\s*")
+
+
+@dataclass(frozen=True)
+class BatchingPolicy:
+    """How images and questions are grouped into vision requests.
+
+    max_questions_per_request: split an image's questions into chunks of at most this many; None keeps them together.
+    max_images_per_request: pack up to this many images into one request; 1 disables packing.
+    pack_max_questions: only images (or chunks) with at most this many questions are packed.
+    pack_wait: seconds an open pack waits for more images before it is sent.
+
+    The default sends one image with all its questions per request, as query_image does.
+    """
+    max_questions_per_request: int | None = None
+    max_images_per_request: int = 1
+    pack_max_questions: int = 3
+    pack_wait: float = 0.05
+
+
+def _renumber(answer: str, number: int) -> str:
+    if answer == 'N/A' or answer.startswith("An error occurred"):
+        return answer
+    return f"{number}. {_ANSWER_NUMBER.sub('', answer, count=1)}"
+
+
+class VisionBatcher:
+    """
+    Applies a BatchingPolicy in front of an OpenAIVQAModel.
+
+    Callers keep asking one image at a time with the query_image signature.
+    Long question lists are split into chunks sent concurrently and joined
+    back in order. Small ones are held for up to pack_wait seconds so that
+    concurrent callers with the same sampling settings share one
+    multi-image request; packing therefore needs at least as many
+    concurrent callers as max_images_per_request.
+    """
+
+    def __init__(self, vqa_model: OpenAIVQAModel, policy: BatchingPolicy | None = None):
+        self.vqa_model = vqa_model
+        self.policy = policy or BatchingPolicy()
+        self.images = 0
+        self._packs: dict[tuple, list[tuple[str, List[str], asyncio.Future]]] = {}
+        self._timers: dict[tuple, asyncio.TimerHandle] = {}
+        self._sending: set[asyncio.Task] = set()
+
+    async def query_image(self, image: Union[bytes, Image.Image], questions: List[str], temperature: float | None = 0.0, model: str = "gpt-4o", top_p: float | None = None, detail: str | None = None) -> List[str]:
+        try:
+            base64_image = self.vqa_model.encode_image(image)
+        except Exception as e:
+            self.images += 1
+            return [f"An error occurred: {e}"]
+        return await self.query_encoded_image(base64_image, questions, temperature, model, top_p, detail)
+
+    async def query_encoded_image(self, base64_image: str, questions: List[str], temperature: float | None = 0.0, model: str = "gpt-4o", top_p: float | None = None, detail: str | None = None) -> List[str]:
+        self.images += 1
+        sampling = (("model", model), ("temperature", temperature), ("top_p", top_p), ("detail", detail))
+        size = self.policy.max_questions_per_request or len(questions) or 1
+        chunks = [questions[start:start + size] for start in range(0, len(questions), size)] or [questions]
+        chunk_answers = await asyncio.gather(*(self._query_chunk(base64_image, chunk, sampling) for chunk in chunks))
+
+        answers = []
+        for chunk, chunk_result in zip(chunks, chunk_answers):
+            if chunk_result and chunk_result[0].startswith("An error occurred"):
+                return chunk_result
+            for i in range(len(chunk)):
+                answer = chunk_result[i] if i < len(chunk_result) else 'N/A'
+                answers.append(_renumber(answer, len(answers) + 1))
+        return answers
+
+    async def _query_chunk(self, base64_image: str, questions: List[str], sampling: tuple) -> List[str]:
+        if self.policy.max_images_per_request <= 1 or len(questions) > self.policy.pack_max_questions:
+            return await self.vqa_model.query_encoded_image(base64_image, questions, **dict(sampling))
+
+        future = asyncio.get_running_loop().create_future()
+        pack = self._packs.setdefault(sampling, [])
+        pack.append((base64_image, questions, future))
+        if len(pack) >= self.policy.max_images_per_request:
+            self._flush(sampling)
+        elif len(pack) == 1:
+            self._timers[sampling] = asyncio.get_running_loop().call_later(self.policy.pack_wait, self._flush, sampling)
+        return await future
+
+    def _flush(self, sampling: tuple):
+        timer = self._timers.pop(sampling, None)
+        if timer is not None:
+            timer.cancel()
+        pack = self._packs.pop(sampling, None)
+        if pack:
+            task = asyncio.ensure_future(self._send_pack(pack, sampling))
+            # Held until done so the task is not garbage collected mid-flight.
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send_pack(self, pack: list[tuple[str, List[str], asyncio.Future]], sampling: tuple):
+        if len(pack) == 1:
+            base64_image, questions, _ = pack[0]
+            results = [await self.vqa_model.query_encoded_image(base64_image, questions, **dict(sampling))]
+        else:
+            results = await self.vqa_model.query_encoded_images([(base64_image, questions) for base64_image, questions, _ in pack], **dict(sampling))
+        for (_, _, future), answers in zip(pack, results):
+            if not future.done():
+                future.set_result(answers)
+
+    def stats(self) -> dict:
+        requests = self.vqa_model.vision_requests
+        return {
+            "images": self.images,
+            "requests": requests,
+            "requests_per_image": requests / self.images if self.images else 0.0,
+            "prompt_tokens": self.vqa_model.prompt_tokens,
+            "completion_tokens": self.vqa_model.completion_tokens,
+        }
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from typing import IO, Any, Awaitable, Callable
+
+from openai.types.chat import ChatCompletion
+
+CASSETTE_FILE = "cassette.jsonl"
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class Cassette:
+    """
+    Records chat completion responses keyed by request hash, and replays them offline.
+
+    In record mode every response is appended to a JSON-lines file together
+    with its request key and observed latency. In replay mode the file is
+    loaded once and responses are served from memory with no network; the
+    n-th call for a key gets the n-th recorded response, so sampled
+    (temperature > 0) requests replay their recorded spread of answers.
+    Once a key's responses run out, replay starts over from its first one;
+    such calls are counted as wraps, since they repeat an answer instead of
+    drawing a new sample.
+    """
+
+    def __init__(self, mode: str, filename: str = CASSETTE_FILE, simulate_latency: bool = False):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.mode = mode
+        self.filename = filename
+        self.simulate_latency = simulate_latency
+        self.hits = 0
+        self.misses = 0
+        self.wraps = 0
+        self.recorded = 0
+        self._file: IO[str] | None = None
+        self._tapes: dict[str, list[tuple[dict, float]]] = defaultdict(list)
+        self._positions: dict[str, int] = defaultdict(int)
+        if mode == REPLAY:
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._tapes[entry["key"]].append((entry["response"], entry["latency"]))
+
+    async def call(self, key: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        if self.mode == REPLAY:
+            return await self._replay(key)
+
+        started = time.perf_counter()
+        response = await send()
+        latency = time.perf_counter() - started
+        if self._file is None:
+            self._file = open(self.filename, "a", buffering=1)
+        entry = {"key": key, "latency": round(latency, 4), "response": response.model_dump(mode="json")}
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self.recorded += 1
+        return response
+
+    async def _replay(self, key: str) -> ChatCompletion:
+        tape = self._tapes.get(key)
+        if not tape:
+            self.misses += 1
+            raise CassetteMiss(key)
+        position = self._positions[key]
+        self._positions[key] = position + 1
+        if position >= len(tape):
+            self.wraps += 1
+        response, latency = tape[position % len(tape)]
+        self.hits += 1
+        if self.simulate_latency:
+            await asyncio.sleep(latency)
+        return ChatCompletion.model_validate(response)
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "recorded": self.recorded, "hits": self.hits, "misses": self.misses, "wraps": self.wraps}
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
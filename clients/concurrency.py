@@ -0,0 +1,182 @@
+import asyncio
+import contextlib
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+import openai
+
+OK = "ok"
+THROTTLED = "throttled"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+
+@dataclass
+class ConcurrencyPolicy:
+    """AIMD settings for the in-flight limit of one kind of request.
+
+    The limit grows by `increase` after every `limit` successful calls made
+    while it was fully used, and is multiplied by decrease_factor on a 429, a
+    timeout, or when the smoothed latency exceeds latency_tolerance times the
+    baseline (the latency_baseline_quantile of the last `window` calls).
+    At most one decrease is applied per round of requests: only calls started
+    after the previous decrease can trigger the next one.
+    """
+    initial_limit: int = 4
+    min_limit: int = 1
+    max_limit: int = 64
+    increase: int = 1
+    decrease_factor: float = 0.5
+    latency_tolerance: float = 2.0
+    latency_baseline_quantile: float = 0.1
+    latency_smoothing: float = 0.1
+    min_samples: int = 20
+    window: int = 500
+
+
+def classify_outcome(error: BaseException | None) -> str:
+    """Maps a call's exception (None on success) to the signal the controller reacts to."""
+    if error is None:
+        return OK
+    if isinstance(error, openai.RateLimitError):
+        return THROTTLED
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError)):
+        return TIMEOUT
+    return ERROR
+
+
+class AdaptiveLimiter:
+    """
+    Additive-increase/multiplicative-decrease limit on concurrent requests of one kind.
+
+    Callers hold a slot for the duration of a call with `async with
+    limiter.slot():`; the outcome is taken from whatever the block raises.
+    Errors other than 429s and timeouts leave the limit alone. The request
+    pipeline turns off the OpenAI client's own retries for limited kinds, so
+    every 429 shows up here.
+    """
+
+    def __init__(self, kind: str, policy: ConcurrencyPolicy, on_decision: Callable[[dict], None] | None = None):
+        self.kind = kind
+        self.policy = policy
+        self.limit = min(max(policy.initial_limit, policy.min_limit), policy.max_limit)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.signals = {OK: 0, THROTTLED: 0, TIMEOUT: 0, ERROR: 0}
+        self.increases = 0
+        self.decreases = 0
+        self.decisions: deque[dict] = deque(maxlen=200)
+        self._on_decision = on_decision
+        self._condition = asyncio.Condition()
+        self._epoch = 0
+        self._successes = 0
+        self._saturated = False
+        self._latencies: deque[float] = deque(maxlen=policy.window)
+        self._smoothed_latency: float | None = None
+        self._smoothed_samples = 0
+        self._started = time.perf_counter()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.in_flight >= self.limit:
+                self._saturated = True
+        epoch = self._epoch
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            latency = time.perf_counter() - started
+            async with self._condition:
+                self.in_flight -= 1
+                if not isinstance(error, asyncio.CancelledError):
+                    self._observe(classify_outcome(error), latency, epoch)
+                self._condition.notify_all()
+
+    def _baseline(self) -> float | None:
+        if len(self._latencies) < self.policy.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(int(self.policy.latency_baseline_quantile * len(ordered)), len(ordered) - 1)]
+
+    def _observe(self, signal: str, latency: float, epoch: int):
+        self.signals[signal] += 1
+        if signal == THROTTLED or signal == TIMEOUT:
+            self._decrease(signal, epoch)
+            return
+        if signal != OK:
+            return
+
+        baseline = self._baseline()
+        self._latencies.append(latency)
+        # Calls started before the last decrease ran under the old limit and say nothing about the new one.
+        if epoch == self._epoch:
+            alpha = self.policy.latency_smoothing
+            self._smoothed_latency = latency if self._smoothed_latency is None else (1 - alpha) * self._smoothed_latency + alpha * latency
+            self._smoothed_samples += 1
+            # Judge latency only once the average spans about 1 / alpha calls, so one slow call cannot cut the limit.
+            warmed_up = self._smoothed_samples * alpha >= 1
+            if baseline is not None and warmed_up and self._smoothed_latency > self.policy.latency_tolerance * baseline:
+                self._decrease("latency", epoch, smoothed_latency=self._smoothed_latency, baseline_latency=baseline)
+                return
+
+        self._successes += 1
+        if self._successes >= self.limit:
+            self._successes = 0
+            # Growing a limit that is not being reached would only let a later burst overshoot.
+            if self._saturated and self.limit < self.policy.max_limit:
+                self._set_limit(min(self.limit + self.policy.increase, self.policy.max_limit), "increase")
+                self.increases += 1
+            self._saturated = self.in_flight >= self.limit
+
+    def _decrease(self, reason: str, epoch: int, **details) -> bool:
+        # Calls already in flight when the limit was last cut report the same congestion.
+        if epoch < self._epoch:
+            return False
+        self._epoch += 1
+        self._successes = 0
+        self._saturated = False
+        new_limit = max(self.policy.min_limit, math.floor(self.limit * self.policy.decrease_factor))
+        if new_limit < self.limit:
+            self.decreases += 1
+            self._set_limit(new_limit, reason, **details)
+        if reason == "latency":
+            # Restart the smoothing so the next round is judged on its own latencies.
+            self._smoothed_latency = None
+            self._smoothed_samples = 0
+        return True
+
+    def _set_limit(self, new_limit: int, reason: str, **details):
+        decision = {
+            "t": round(time.perf_counter() - self._started, 3),
+            "kind": self.kind,
+            "from": self.limit,
+            "to": new_limit,
+            "reason": reason,
+            "in_flight": self.in_flight,
+            **{key: round(value, 4) for key, value in details.items()},
+        }
+        self.limit = new_limit
+        self.decisions.append(decision)
+        if self._on_decision is not None:
+            self._on_decision(decision)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "peak_in_flight": self.peak_in_flight,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "signals": dict(self.signals),
+            "baseline_latency": self._baseline(),
+        }
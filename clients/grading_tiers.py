@@ -0,0 +1,84 @@
+import hashlib
+import re
+from dataclasses import dataclass
+
+BINARY = "binary"
+SHORT_SPAN = "short_span"
+OPEN_ENDED = "open_ended"
+
+_YES_NO_QUESTION = re.compile(r"^(is|are|was|were|do|does|did|can|could|will|would|has|have|had|should)\b", re.IGNORECASE)
+_YES_NO_ANSWERS = {"yes", "no"}
+_ANSWER_NUMBER = re.compile(r"^\d+\.\s*")
+
+
+def _normalize(answer: str) -> str:
+    return _ANSWER_NUMBER.sub("", answer.strip(), count=1).strip().lower().rstrip(".")
+
+
+def classify_grading_item(question: str, golden_answer: str, predicted_answer: str, max_span_words: int = 3) -> str:
+    """
+    Classifies a grading item by question pattern and answer shape.
+
+    Returns:
+        BINARY for yes/no questions with a yes/no golden answer, SHORT_SPAN when
+        the golden answer has at most max_span_words words and the prediction is
+        not much longer, else OPEN_ENDED.
+    """
+    golden = _normalize(golden_answer)
+    if golden in _YES_NO_ANSWERS and _YES_NO_QUESTION.match(question.strip()):
+        return BINARY
+    # A long prediction against a short golden answer needs a real judgement
+    # of whether it contains the answer, so it stays with the strong model.
+    if len(golden.split()) <= max_span_words and len(_normalize(predicted_answer).split()) <= 3 * max_span_words:
+        return SHORT_SPAN
+    return OPEN_ENDED
+
+
+@dataclass
+class GradingTierPolicy:
+    """Which grader model each kind of grading item goes to.
+
+    Binary and short-span items go to cheap_model, open-ended ones to strong_model.
+    audit_rate: fraction of cheap-model items also graded by strong_model to measure agreement.
+    """
+    cheap_model: str = "gpt-4o-mini"
+    strong_model: str = "gpt-4o"
+    max_span_words: int = 3
+    audit_rate: float = 0.05
+
+
+class GradingRouter:
+    """
+    Routes grading items to a model tier and keeps the audit tally.
+
+    Audit selection hashes the item, so the same items are audited on every
+    run and replays from a cassette audit the same calls.
+    """
+
+    def __init__(self, policy: GradingTierPolicy | None = None):
+        self.policy = policy or GradingTierPolicy()
+        self.routed = {BINARY: 0, SHORT_SPAN: 0, OPEN_ENDED: 0}
+        self.audits = 0
+        self.agreements = 0
+
+    def route(self, question: str, golden_answer: str, predicted_answer: str) -> str:
+        """Returns the model to grade the item with."""
+        item_class = classify_grading_item(question, golden_answer, predicted_answer, self.policy.max_span_words)
+        self.routed[item_class] += 1
+        return self.policy.strong_model if item_class == OPEN_ENDED else self.policy.cheap_model
+
+    def should_audit(self, question: str, golden_answer: str, predicted_answer: str) -> bool:
+        digest = hashlib.sha256(f"{question}\x00{golden_answer}\x00{predicted_answer}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2**64 < self.policy.audit_rate
+
+    def record_audit(self, cheap_score: bool, strong_score: bool):
+        self.audits += 1
+        self.agreements += cheap_score == strong_score
+
+    def stats(self) -> dict:
+        return {
+            "routed": dict(self.routed),
+            "audits": self.audits,
+            "agreements": self.agreements,
+            "agreement_rate": self.agreements / self.audits if self.audits else None,
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+
+@dataclass
+class HedgePolicy:
+    """Per-call deadline and hedging settings for one kind of request.
+
+    deadline: seconds before a call (including any hedge) is abandoned; None waits forever.
+    hedge: send a duplicate once a call has run longer than hedge_quantile of recent latencies.
+    max_hedge_rate: upper bound on hedges as a fraction of calls.
+    min_samples: latencies to observe before hedging starts.
+    """
+    deadline: float | None = None
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    max_hedge_rate: float = 0.05
+    min_samples: int = 20
+    window: int = 500
+
+
+def _quantile(values, q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Hedger:
+    """
+    Applies a HedgePolicy to calls of one kind and tracks their latency.
+
+    A hedge races a second identical request against the first one. The
+    first response wins and the loser is cancelled. Sampled requests must
+    not be hedged: keeping whichever sample came back first would bias
+    results towards fast, short completions. Callers pass hedge=False for
+    them, which keeps the deadline but never sends a hedge.
+
+    Two latency distributions are kept over a rolling window: the effective
+    latency callers saw, and the primary request's latency. When a hedge
+    wins, the primary is cancelled, so its latency is recorded as the time
+    elapsed at cancellation. The "before" p99 is therefore a lower bound on
+    what the calls would have taken without hedging.
+    """
+
+    def __init__(self, policy: HedgePolicy):
+        self.policy = policy
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self._effective = deque(maxlen=policy.window)
+        self._primary = deque(maxlen=policy.window)
+
+    def _hedge_delay(self, hedge: bool) -> float | None:
+        if not (self.policy.hedge and hedge) or len(self._effective) < self.policy.min_samples:
+            return None
+        if self.hedges >= self.policy.max_hedge_rate * self.calls:
+            return None
+        return _quantile(self._effective, self.policy.hedge_quantile)
+
+    async def call(self, send: Callable[[], Awaitable[Any]], hedge_send: Callable[[], Awaitable[Any]] | None = None, hedge: bool = True) -> Any:
+        """
+        Runs send(), hedging it as the policy allows.
+
+        hedge_send, if given, sends the hedge instead of send, e.g. to take a
+        concurrency slot of its own. hedge=False disables hedging for this call.
+        """
+        self.calls += 1
+        started = time.perf_counter()
+        try:
+            if self.policy.deadline is None:
+                result = await self._race(send, hedge_send or send, started, hedge)
+            else:
+                result = await asyncio.wait_for(self._race(send, hedge_send or send, started, hedge), self.policy.deadline)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        self._effective.append(time.perf_counter() - started)
+        return result
+
+    async def _timed_primary(self, send: Callable[[], Awaitable[Any]], started: float) -> Any:
+        try:
+            return await send()
+        finally:
+            # Runs on success, failure and cancellation alike; a cancelled
+            # primary records the time it had run so far.
+            self._primary.append(time.perf_counter() - started)
+
+    async def _race(self, send: Callable[[], Awaitable[Any]], hedge_send: Callable[[], Awaitable[Any]], started: float, hedge: bool) -> Any:
+        primary = asyncio.ensure_future(self._timed_primary(send, started))
+        pending = {primary}
+        try:
+            done = set()
+            delay = self._hedge_delay(hedge)
+            if delay is not None:
+                done, pending = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    self.hedges += 1
+                    pending.add(asyncio.ensure_future(hedge_send()))
+
+            while True:
+                if not done:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                if not pending:
+                    # Every attempt failed; surface the last error.
+                    raise done.pop().exception()
+                done = set()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+            "p99_without_hedging": _quantile(self._primary, 0.99),
+            "p99_effective": _quantile(self._effective, 0.99),
+        }
@@ -1,11 +1,64 @@
+import asyncio
 import os
 from openai import AsyncOpenAI
+from clients.request_pipeline import ChatCompletionCaller
+from clients.grading_tiers import GradingRouter
+
+STRONG_GRADER_MODEL = "gpt-4o"
 
 class OpenAIAIRater:
-    def __init__(self, api_key: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, api_key: str, caller: ChatCompletionCaller | None = None, router: GradingRouter | None = None):
+        # Pass a shared caller to reuse one connection pool, in-flight request
+        # coalescing and cassette across backends (see ExperimentRunner).
+        self.caller = caller or ChatCompletionCaller(AsyncOpenAI(api_key=api_key))
+        self.client = self.caller.client
+        # Without a router every item is graded by STRONG_GRADER_MODEL.
+        self.router = router
+
+    async def grade_answers(self, questions: list[str], golden_answers: list[str], predicted_answers: list[str]) -> list[tuple[str, bool]]:
+        """
+        Grades every answered question concurrently.
+
+        Questions without an answer ('N/A') are skipped, and so are those whose
+        grading call failed: no verdict is not a wrong answer.
+        """
+        autorater_tasks = []
+        questions_to_rate = []
+        for i, question in enumerate(questions):
+            predicted_answer = predicted_answers[i] if i < len(predicted_answers) else 'N/A'
+            if predicted_answer != 'N/A':
+                autorater_tasks.append(self.rate_answer(question, golden_answers[i], predicted_answer))
+                questions_to_rate.append(question)
+
+        scores = await asyncio.gather(*autorater_tasks)
+        return [(question, score) for question, score in zip(questions_to_rate, scores) if score is not None]
+
+    async def rate_answer(self, question: str, golden_answer: str, predicted_answer: str) -> bool | None:
+        """
+        Grades a predicted answer against the golden answer; None when no verdict could be obtained.
+
+        With a router, simple items go to the cheap model; a sampled share of
+        those is graded by the strong model too, and the two verdicts are
+        tallied for the audit. The cheap model's verdict is the one returned.
+        """
+        if self.router is None:
+            return await self._rate(question, golden_answer, predicted_answer, STRONG_GRADER_MODEL)
+
+        model = self.router.route(question, golden_answer, predicted_answer)
+        strong_model = self.router.policy.strong_model
+        if model == strong_model or not self.router.should_audit(question, golden_answer, predicted_answer):
+            return await self._rate(question, golden_answer, predicted_answer, model)
+
+        score, audit_score = await asyncio.gather(
+            self._rate(question, golden_answer, predicted_answer, model),
+            self._rate(question, golden_answer, predicted_answer, strong_model),
+        )
+        if score is not None and audit_score is not None:
+            self.router.record_audit(score, audit_score)
+        return score
 
-    async def rate_answer(self, question: str, golden_answer: str, predicted_answer: str) -> bool:
+    async def _rate(self, question: str, golden_answer: str, predicted_answer: str, model: str) -> bool | None:
+        """Asks `model` for a verdict; None if the request failed."""
         LLM_PROMPT = """
         You are an AI assistant designed to evaluate the correctness of a predicted answer compared to a golden answer for a given question.
         Your task is to determine if the predicted answer is semantically equivalent or sufficiently similar to the golden answer to be considered correct.
@@ -24,8 +77,8 @@ class OpenAIAIRater:
         )
 
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o", # Using a powerful model for good reasoning
+            request = dict(
+                model=model,
                 messages=[
                     {"role": "user", "content": formatted_prompt}
                 ],
@@ -48,9 +101,10 @@ class OpenAIAIRater:
                 },
                 verbosity="medium", # Added for better debugging if needed
             )
+            response = await self.caller.create(request, kind="grading")
             import json
             response_content = json.loads(response.choices[0].message.content)
-            return response_content.get("score", False)
+            return bool(response_content.get("score", False))
         except Exception as e:
             print(f"An error occurred during AI rating: {e}")
-            return False # Indicate an error with False
+            return None
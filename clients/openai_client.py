@@ -1,73 +1,304 @@
 import os
 from openai import AsyncOpenAI
+import asyncio
 import base64
+import hashlib
 import io
+import json
+import re
 from PIL import Image
 from typing import Union, List
+from clients.request_pipeline import ChatCompletionCaller
+from creativity_clustering import CREATIVITY_CLUSTERS
+from profiling import RunProfiler
+
+
+# Output budget for an answer list: a fixed allowance for list formatting plus
+# a per-question allowance. Retries of truncated responses double the latter.
+BASE_OUTPUT_TOKENS = 16
+OUTPUT_TOKENS_PER_QUESTION = 32
+MAX_OUTPUT_TOKENS = 4096
+MAX_RETRY_DEPTH = 2
+
+_NUMBERED_LINE = re.compile(r"^(\d+)\.\s*(.*)$")
+_IMAGE_NUMBERED_LINE = re.compile(r"^(\d+)\.(\d+)\.?\s*(.*)$")
+
+
+def output_token_budget(num_questions: int, depth: int = 0) -> int:
+    """max_tokens for a request asking num_questions questions, on retry level `depth`."""
+    return min(BASE_OUTPUT_TOKENS + OUTPUT_TOKENS_PER_QUESTION * (2 ** depth) * num_questions, MAX_OUTPUT_TOKENS)
+
+
+def parse_numbered_answers(content: str, num_questions: int) -> dict[int, str]:
+    """Parses a numbered-list response into {question number (1-based): answer text}."""
+    answers = {}
+    for line in content.split('\n'):
+        match = _NUMBERED_LINE.match(line.strip())
+        if match and 1 <= int(match.group(1)) <= num_questions:
+            answers.setdefault(int(match.group(1)), match.group(2))
+    return answers
+
+
+def parse_image_numbered_answers(content: str, question_counts: List[int]) -> dict[tuple[int, int], str]:
+    """Parses a multi-image response into {(image number, question number), both 1-based: answer text}."""
+    answers = {}
+    for line in content.split('\n'):
+        match = _IMAGE_NUMBERED_LINE.match(line.strip())
+        if not match:
+            continue
+        image_number, question_number = int(match.group(1)), int(match.group(2))
+        if 1 <= image_number <= len(question_counts) and 1 <= question_number <= question_counts[image_number - 1]:
+            answers.setdefault((image_number, question_number), match.group(3))
+    return answers
+
+
+def question_cache_key(question: str) -> str:
+    """Hash of a question's text, used to key cached cluster assignments."""
+    return hashlib.sha256(question.encode("utf-8")).hexdigest()
+
 
 class OpenAIVQAModel:
-    def __init__(self, api_key: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, api_key: str, caller: ChatCompletionCaller | None = None, profiler: RunProfiler | None = None):
+        # Pass a shared caller to reuse one connection pool, in-flight request
+        # coalescing and cassette across backends (see ExperimentRunner).
+        self.caller = caller or ChatCompletionCaller(AsyncOpenAI(api_key=api_key))
+        self.client = self.caller.client
+        self.profiler = profiler or RunProfiler()
+        # Responses cut off by max_tokens, and the follow-up calls made for their unanswered questions.
+        self.truncations = 0
+        self.retries = 0
+        # Vision requests sent and their token usage, for comparing batching policies.
+        self.vision_requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
 
     def _encode_image_to_base64(self, image_bytes: bytes) -> str:
         """Encodes image bytes to a base64 string."""
         return base64.b64encode(image_bytes).decode("utf-8")
 
-    async def query_image(self, image: Union[bytes, Image.Image], questions: List[str], temperature: float | None = 0.0) -> List[str]:
+    @staticmethod
+    def image_bytes(image: Union[bytes, Image.Image]) -> bytes:
+        """JPEG-encodes a PIL image; bytes are returned as-is."""
+        if isinstance(image, Image.Image):
+            byte_stream = io.BytesIO()
+            # Assuming JPEG, adjust format if needed (e.g., "PNG")
+            image.save(byte_stream, format="JPEG")
+            return byte_stream.getvalue()
+        return image
+
+    def encode_image(self, image: Union[bytes, Image.Image]) -> str:
+        """JPEG-encodes a PIL image (bytes are used as-is) and returns it as base64."""
+        return self._encode_image_to_base64(self.image_bytes(image))
+
+    async def query_image(self, image: Union[bytes, Image.Image], questions: List[str], temperature: float | None = 0.0, model: str = "gpt-4o", top_p: float | None = None, detail: str | None = None) -> List[str]:
         """
         Queries the OpenAI Vision model with an image and a list of questions.
 
         Args:
             image (Union[bytes, Image.Image]): The image to query, either as bytes or a PIL Image object.
             questions (List[str]): A list of questions to ask about the image.
+            temperature (float | None): Sampling temperature.
+            model (str): Vision-capable model to query.
+            top_p (float | None): Nucleus sampling cutoff; None leaves the API default.
+            detail (str | None): Image detail level ("low", "high" or "auto"); None leaves the API default.
 
         Returns:
-            List[str]: A list of the model's answers to the questions.
+            List[str]: The model's answers, one per question in order; 'N/A' where no answer could be obtained.
         """
         try:
-            if isinstance(image, Image.Image):
-                byte_stream = io.BytesIO()
-                # Assuming JPEG, adjust format if needed (e.g., "PNG")
-                image.save(byte_stream, format="JPEG")
-                image_bytes = byte_stream.getvalue()
-            else:
-                image_bytes = image
+            base64_image = self.encode_image(image)
+        except Exception as e:
+            return [f"An error occurred: {e}"]
+        return await self.query_encoded_image(base64_image, questions, temperature, model, top_p, detail)
+
+    async def query_encoded_image(self, base64_image: str, questions: List[str], temperature: float | None = 0.0, model: str = "gpt-4o", top_p: float | None = None, detail: str | None = None) -> List[str]:
+        """
+        Same as query_image, for an image already encoded with encode_image.
 
-            base64_image = self._encode_image_to_base64(image_bytes)
+        Lets a caller encode an image once and send it with many different
+        sampling settings.
+        """
+        try:
+            sampling = dict(model=model, temperature=temperature, top_p=top_p, detail=detail)
+            answers = await self._answer_questions(base64_image, questions, list(range(len(questions))), sampling)
+            return [answers.get(i, 'N/A') for i in range(len(questions))]
+        except Exception as e:
+            return [f"An error occurred: {e}"]
 
-            # Construct the content for the API call
-            content_blocks = [
-                {"type": "text", "text": "Please answer the following questions about the image in a numbered list format, one answer per question."},
+    async def _answer_questions(self, base64_image: str, questions: List[str], indices: List[int], sampling: dict, depth: int = 0) -> dict[int, str]:
+        """
+        Asks the questions at `indices` and returns their answers keyed by index.
+
+        When the response is cut off by the token budget, its last answer is
+        discarded as possibly incomplete, and only the questions left
+        unanswered are asked again, with a doubled per-question budget.
+        A retry that is truncated as well is split in half, up to
+        MAX_RETRY_DEPTH levels. Answers keep the original numbering.
+        """
+        response = await self._request_answers(base64_image, [questions[i] for i in indices], sampling, depth)
+        choice = response.choices[0]
+        with self.profiler.stage("answer_parsing"):
+            parsed = parse_numbered_answers(choice.message.content or "", len(indices))
+            if choice.finish_reason == "length" and parsed:
+                # The answer being written when the budget ran out may be cut short, so ask it again.
+                del parsed[max(parsed)]
+            answers = {indices[number - 1]: f"{indices[number - 1] + 1}. {text}" for number, text in parsed.items()}
+        missing = [i for i in indices if i not in answers]
+        if choice.finish_reason != "length" or not missing:
+            return answers
+
+        self.truncations += 1
+        if depth >= MAX_RETRY_DEPTH:
+            return answers
+        groups = [missing] if depth == 0 or len(missing) == 1 else [missing[:len(missing) // 2], missing[len(missing) // 2:]]
+        self.retries += len(groups)
+        retried = await asyncio.gather(*(self._answer_questions(base64_image, questions, group, sampling, depth + 1) for group in groups), return_exceptions=True)
+        for result in retried:
+            # A failed retry leaves its questions unanswered rather than losing the answers already parsed.
+            if not isinstance(result, BaseException):
+                answers.update(result)
+        return answers
+
+    async def _request_answers(self, base64_image: str, questions: List[str], sampling: dict, depth: int):
+        # Construct the content for the API call
+        image_url = {"url": f"data:image/jpeg;base64,{base64_image}"}
+        if sampling["detail"] is not None:
+            image_url["detail"] = sampling["detail"]
+        content_blocks = [
+            {"type": "text", "text": "Please answer the following questions about the image in a numbered list format, one answer per question."},
+            {
+                "type": "image_url",
+                "image_url": image_url,
+            },
+        ]
+        for i, question in enumerate(questions):
+            content_blocks.append({"type": "text", "text": f"{i+1}. {question}"})
+
+        request = dict(
+            model=sampling["model"],
+            messages=[
                 {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/jpeg;base64,{base64_image}",
-                    },
-                },
+                    "role": "user",
+                    "content": content_blocks,
+                }
+            ],
+            temperature=sampling["temperature"],
+            max_tokens=output_token_budget(len(questions), depth),
+        )
+        if sampling["top_p"] is not None:
+            request["top_p"] = sampling["top_p"]
+        if sampling.get("top_logprobs"):
+            request["logprobs"] = True
+            request["top_logprobs"] = sampling["top_logprobs"]
+        return await self._send_vision_request(request)
+
+    async def query_encoded_image_logprobs(self, base64_image: str, questions: List[str], top_logprobs: int = 5, model: str = "gpt-4o", detail: str | None = None) -> List[tuple[str, float, List[tuple[str, float]]]]:
+        """
+        Asks the questions once at temperature 0 and returns the response's token logprobs.
+
+        The request gets the largest per-question budget a truncation retry
+        would, since a split retry would break the single token stream the
+        caller reconstructs answers from. Questions still cut off are simply
+        missing from the response.
+
+        Args:
+            base64_image (str): Image encoded with encode_image.
+            questions (List[str]): Questions to ask about the image.
+            top_logprobs (int): Alternatives returned per generated token (at most 20).
+            model, detail: As for query_image.
+
+        Returns:
+            List of (token, logprob, [(alternative token, logprob), ...]) for every
+            generated token; empty if the request failed.
+        """
+        try:
+            sampling = dict(model=model, temperature=0.0, top_p=None, detail=detail, top_logprobs=top_logprobs)
+            response = await self._request_answers(base64_image, questions, sampling, MAX_RETRY_DEPTH)
+            choice = response.choices[0]
+            if choice.finish_reason == "length":
+                self.truncations += 1
+            content = choice.logprobs.content if choice.logprobs is not None else None
+            return [
+                (entry.token, entry.logprob, [(alternative.token, alternative.logprob) for alternative in entry.top_logprobs])
+                for entry in content or []
             ]
-            for i, question in enumerate(questions):
-                content_blocks.append({"type": "text", "text": f"{i+1}. {question}"})
-
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",  # Or another vision-capable model
-                messages=[
-                    {
-                        "role": "user",
-                        "content": content_blocks,
-                    }
-                ],
+        except Exception as e:
+            print(f"An error occurred while requesting logprobs: {e}")
+            return []
+
+    async def _send_vision_request(self, request: dict):
+        response = await self.caller.create(request, kind="vision")
+        self.vision_requests += 1
+        if getattr(response, "usage", None) is not None:
+            self.prompt_tokens += response.usage.prompt_tokens
+            self.completion_tokens += response.usage.completion_tokens
+        return response
+
+    async def query_encoded_images(self, images: List[tuple[str, List[str]]], temperature: float | None = 0.0, model: str = "gpt-4o", top_p: float | None = None, detail: str | None = None) -> List[List[str]]:
+        """
+        Asks the questions of several images in a single request.
+
+        Each image is labelled in the prompt and the model answers in an
+        "<image>.<question>. answer" list, which is unpacked back per image.
+        Images whose answers are incomplete, e.g. because the response was
+        truncated, are asked again on their own through query_encoded_image;
+        a truncated response's last answer counts as incomplete.
+
+        Args:
+            images (List[tuple[str, List[str]]]): (base64 image, questions) pairs.
+            temperature, model, top_p, detail: As for query_image.
+
+        Returns:
+            List[List[str]]: For every image, its answers in the format query_image returns.
+        """
+        try:
+            image_detail = {} if detail is None else {"detail": detail}
+            content_blocks = [
+                {"type": "text", "text": f"You are given {len(images)} images, each followed by its questions. "
+                                         "Answer every question in a numbered list, one answer per line, numbering each answer "
+                                         "as <image number>.<question number>. (for example 2.3. for the third question about image 2)."},
+            ]
+            for image_number, (base64_image, questions) in enumerate(images, start=1):
+                content_blocks.append({"type": "text", "text": f"Image {image_number}:"})
+                content_blocks.append({"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}", **image_detail}})
+                for question_number, question in enumerate(questions, start=1):
+                    content_blocks.append({"type": "text", "text": f"{image_number}.{question_number}. {question}"})
+
+            question_counts = [len(questions) for _, questions in images]
+            request = dict(
+                model=model,
+                messages=[{"role": "user", "content": content_blocks}],
                 temperature=temperature,
-                max_tokens=500, # Increased max_tokens to accommodate multiple answers
+                max_tokens=output_token_budget(sum(question_counts)),
             )
-
-            # Process the model's response
-            full_response_content = response.choices[0].message.content
-            # Assuming the model returns a numbered list, parse it into a list of strings
-            answers = [line.strip() for line in full_response_content.split('\n') if line.strip().startswith(tuple(str(i) + '.' for i in range(1, len(questions) + 1)))]
-            # Further refinement may be needed based on actual model output format
-            return answers
+            if top_p is not None:
+                request["top_p"] = top_p
+            response = await self._send_vision_request(request)
+            choice = response.choices[0]
+            with self.profiler.stage("answer_parsing"):
+                parsed = parse_image_numbered_answers(choice.message.content or "", question_counts)
+            if choice.finish_reason == "length":
+                self.truncations += 1
+                if parsed:
+                    # The answer being written when the budget ran out may be cut short; its image is asked again.
+                    del parsed[max(parsed)]
         except Exception as e:
-            return [f"An error occurred: {e}"]
+            return [[f"An error occurred: {e}"] for _ in images]
+
+        results: List[List[str] | None] = []
+        incomplete = []
+        for image_number, (base64_image, questions) in enumerate(images, start=1):
+            answers = [parsed.get((image_number, question_number)) for question_number in range(1, len(questions) + 1)]
+            if None in answers:
+                incomplete.append(image_number - 1)
+                results.append(None)
+            else:
+                results.append([f"{question_number}. {text}" for question_number, text in enumerate(answers, start=1)])
+        self.retries += len(incomplete)
+        retried = await asyncio.gather(*(self.query_encoded_image(images[i][0], images[i][1], temperature, model, top_p, detail) for i in incomplete))
+        for i, answers in zip(incomplete, retried):
+            results[i] = answers
+        return results
 
     async def cluster_questions_by_creativity(self, questions_data: dict) -> dict:
         """
@@ -86,82 +317,133 @@ class OpenAIVQAModel:
                 all_questions.update(questions.keys())
             
             all_questions = list(all_questions)
+            return await self._request_question_clusters(all_questions)
+        except Exception as e:
+            print(f"An error occurred during clustering: {e}")
+            return {}
 
-            # Prepare the prompt for the LLM
-            prompt = """
-            You are an AI assistant tasked with clustering questions based on their creativity and complexity level. 
-            Create exactly 5 clusters that represent different levels of creativity and complexity:
-            
-            1. Binary_Factual_Questions: Simple yes/no questions about specific categories or facts
-            2. Identification_Questions: Questions asking to identify specific information (author, title, etc.)
-            3. Classification_Questions: Questions asking about type or genre with some interpretation needed
-            4. Analytical_Questions: Questions requiring more nuanced understanding and analysis
-            5. Creative_Subjective_Questions: Open-ended questions requiring creative thinking or subjective judgment
-            
-            Analyze each question and assign it to the most appropriate cluster based on:
-            - How much creativity is required to answer
-            - Whether it's binary (yes/no) vs open-ended
-            - Level of interpretation and analysis needed
-            - Factual vs subjective nature
-            
-            Return a JSON object with exactly these 5 cluster names as keys: "Binary_Factual_Questions", "Identification_Questions", "Classification_Questions", "Analytical_Questions", "Creative_Subjective_Questions".
-            Each key should have an array of questions as its value.
-            Make sure each question appears in exactly one cluster.
-            
-            Questions to cluster:
-            """
-
-            # Add questions to the prompt
-            for i, question in enumerate(all_questions, 1):
-                prompt += f"{i}. {question}\n"
-
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": "question_clusters",
-                        "strict": True,
-                        "schema": {
-                            "type": "object",
-                            "properties": {
-                                "Binary_Factual_Questions": {
-                                    "type": "array",
-                                    "items": {"type": "string"}
-                                },
-                                "Identification_Questions": {
-                                    "type": "array",
-                                    "items": {"type": "string"}
-                                },
-                                "Classification_Questions": {
-                                    "type": "array",
-                                    "items": {"type": "string"}
-                                },
-                                "Analytical_Questions": {
-                                    "type": "array",
-                                    "items": {"type": "string"}
-                                },
-                                "Creative_Subjective_Questions": {
-                                    "type": "array",
-                                    "items": {"type": "string"}
-                                }
+    async def cluster_questions_by_creativity_chunked(self, questions_data: dict, cache: dict[str, str], chunk_size: int = 50, max_concurrency: int = 8) -> dict:
+        """
+        Clusters questions with the LLM in fixed-size batches classified concurrently.
+
+        Every batch is classified against the same five-cluster schema, and the
+        per-batch results are merged into one mapping. Assignments are stored in
+        `cache`, keyed by question_cache_key, so questions seen on an earlier run
+        are not sent again. The caller owns persisting the cache.
+
+        Args:
+            questions_data (dict): A dictionary where keys are temperature values and values are dictionaries of questions with their accuracy data.
+            cache (dict[str, str]): Question hash -> cluster name. Updated in place.
+            chunk_size (int): Number of questions per LLM call.
+            max_concurrency (int): Maximum number of batches in flight at once.
+
+        Returns:
+            dict: A dictionary with cluster names as keys and lists of questions as values.
+        """
+        all_questions = list(dict.fromkeys(q for questions in questions_data.values() for q in questions))
+        pending = [q for q in all_questions if question_cache_key(q) not in cache]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def classify(batch: List[str]) -> dict:
+            async with semaphore:
+                try:
+                    return await self._request_question_clusters(batch)
+                except Exception as e:
+                    print(f"An error occurred during clustering of a batch of {len(batch)} questions: {e}")
+                    return {}
+
+        batches = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        batch_results = await asyncio.gather(*(classify(batch) for batch in batches))
+
+        for batch, batch_clusters in zip(batches, batch_results):
+            in_batch = set(batch)
+            for cluster_name in CREATIVITY_CLUSTERS:
+                for question in batch_clusters.get(cluster_name, []):
+                    # Drop questions the model rephrased or invented, and keep the
+                    # first cluster when it listed a question twice.
+                    key = question_cache_key(question)
+                    if question in in_batch and key not in cache:
+                        cache[key] = cluster_name
+
+        clusters = {cluster_name: [] for cluster_name in CREATIVITY_CLUSTERS}
+        for question in all_questions:
+            cluster_name = cache.get(question_cache_key(question))
+            if cluster_name in clusters:
+                clusters[cluster_name].append(question)
+        return clusters
+
+    async def _request_question_clusters(self, questions: List[str]) -> dict:
+        # Prepare the prompt for the LLM
+        prompt = """
+        You are an AI assistant tasked with clustering questions based on their creativity and complexity level. 
+        Create exactly 5 clusters that represent different levels of creativity and complexity:
+
+        1. Binary_Factual_Questions: Simple yes/no questions about specific categories or facts
+        2. Identification_Questions: Questions asking to identify specific information (author, title, etc.)
+        3. Classification_Questions: Questions asking about type or genre with some interpretation needed
+        4. Analytical_Questions: Questions requiring more nuanced understanding and analysis
+        5. Creative_Subjective_Questions: Open-ended questions requiring creative thinking or subjective judgment
+
+        Analyze each question and assign it to the most appropriate cluster based on:
+        - How much creativity is required to answer
+        - Whether it's binary (yes/no) vs open-ended
+        - Level of interpretation and analysis needed
+        - Factual vs subjective nature
+
+        Return a JSON object with exactly these 5 cluster names as keys: "Binary_Factual_Questions", "Identification_Questions", "Classification_Questions", "Analytical_Questions", "Creative_Subjective_Questions".
+        Each key should have an array of questions as its value.
+        Make sure each question appears in exactly one cluster.
+
+        Questions to cluster:
+        """
+
+        # Add questions to the prompt
+        for i, question in enumerate(questions, 1):
+            prompt += f"{i}. {question}\n"
+
+        response = await self.caller.create(dict(
+            model="gpt-4o",
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            response_format={
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "question_clusters",
+                    "strict": True,
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "Binary_Factual_Questions": {
+                                "type": "array",
+                                "items": {"type": "string"}
+                            },
+                            "Identification_Questions": {
+                                "type": "array",
+                                "items": {"type": "string"}
                             },
-                            "required": ["Binary_Factual_Questions", "Identification_Questions", "Classification_Questions", "Analytical_Questions", "Creative_Subjective_Questions"],
-                            "additionalProperties": False
-                        }
+                            "Classification_Questions": {
+                                "type": "array",
+                                "items": {"type": "string"}
+                            },
+                            "Analytical_Questions": {
+                                "type": "array",
+                                "items": {"type": "string"}
+                            },
+                            "Creative_Subjective_Questions": {
+                                "type": "array",
+                                "items": {"type": "string"}
+                            }
+                        },
+                        "required": ["Binary_Factual_Questions", "Identification_Questions", "Classification_Questions", "Analytical_Questions", "Creative_Subjective_Questions"],
+                        "additionalProperties": False
                     }
-                },
-                temperature=0.3,
-                max_tokens=2000
-            )
+                }
+            },
+            temperature=0.3,
+            max_tokens=2000
+        ), kind="clustering")
 
-            # Parse the response
-            import json
-            clusters = json.loads(response.choices[0].message.content)
-            return clusters
-        except Exception as e:
-            print(f"An error occurred during clustering: {e}")
-            return {}
+        # Parse the response
+        clusters = json.loads(response.choices[0].message.content)
+        return clusters
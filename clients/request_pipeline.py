@@ -0,0 +1,91 @@
+import asyncio
+import random
+from typing import Any, Callable
+
+import openai
+from openai import AsyncOpenAI
+
+from clients.cassette import Cassette
+from clients.concurrency import AdaptiveLimiter, ConcurrencyPolicy
+from clients.hedging import Hedger, HedgePolicy
+from clients.singleflight import SingleFlight, is_sampled, request_key
+
+# Retries of a 429 for kinds under an adaptive limit, and the backoff before
+# each one (doubling per attempt, with jitter), as the OpenAI client's own
+# retry would use.
+RATE_LIMIT_RETRIES = 2
+RATE_LIMIT_BACKOFF = 0.5
+MAX_RATE_LIMIT_BACKOFF = 8.0
+
+
+class ChatCompletionCaller:
+    """
+    The single path every chat completion request takes, shared by all backends.
+
+    Requests are keyed by their canonical hash, coalesced with identical
+    in-flight requests unless they are sampled (temperature > 0 without a
+    seed), since coalescing independent samples would collapse them into
+    one, and then either served from or recorded to a
+    cassette. Network calls run under the deadline and hedging policy for
+    their kind ("vision", "grading", ...), each kind with its own latency
+    statistics. Kinds with a concurrency policy also wait for a slot under
+    their adaptive in-flight limit; other kinds are not limited here.
+
+    Limited kinds are sent with the OpenAI client's own retries turned off,
+    so every 429 reaches their limiter; they are retried here instead, each
+    attempt queueing for a slot under the reduced limit.
+    """
+
+    def __init__(self, client: AsyncOpenAI, singleflight: SingleFlight | None = None, cassette: Cassette | None = None, hedge_policies: dict[str, HedgePolicy] | None = None, concurrency_policies: dict[str, ConcurrencyPolicy] | None = None, on_concurrency_decision: Callable[[dict], None] | None = None):
+        self.client = client
+        self.singleflight = singleflight or SingleFlight()
+        self.cassette = cassette
+        self.hedge_policies = hedge_policies or {}
+        self.hedgers: dict[str, Hedger] = {}
+        self.limiters: dict[str, AdaptiveLimiter] = {
+            kind: AdaptiveLimiter(kind, policy, on_concurrency_decision) for kind, policy in (concurrency_policies or {}).items()
+        }
+        self._unretried_client = client.with_options(max_retries=0) if self.limiters else client
+        # Token usage over every call actually sent or replayed (coalesced duplicates count once).
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    async def create(self, request: dict, kind: str = "default") -> Any:
+        key = request_key(request)
+        return await self.singleflight.do(key, lambda: self._send(key, request, kind), coalesce=not is_sampled(request))
+
+    async def _send(self, key: str, request: dict, kind: str) -> Any:
+        if self.cassette is not None:
+            response = await self.cassette.call(key, lambda: self._network_call(request, kind))
+        else:
+            response = await self._network_call(request, kind)
+        if getattr(response, "usage", None) is not None:
+            self.prompt_tokens += response.usage.prompt_tokens
+            self.completion_tokens += response.usage.completion_tokens
+        return response
+
+    async def _network_call(self, request: dict, kind: str) -> Any:
+        if kind not in self.hedgers:
+            self.hedgers[kind] = Hedger(self.hedge_policies.get(kind, HedgePolicy()))
+        # Racing two samples would keep the faster one, so only deterministic requests are hedged.
+        hedge = not is_sampled(request)
+        limiter = self.limiters.get(kind)
+        if limiter is None:
+            return await self.hedgers[kind].call(lambda: self.client.chat.completions.create(**request), hedge=hedge)
+
+        client = self._unretried_client
+
+        async def hedge_request():
+            # A hedge is a second request in flight, so it needs a slot of its own.
+            async with limiter.slot():
+                return await client.chat.completions.create(**request)
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                # The primary's slot covers the deadline, so a timeout is seen by the limiter.
+                async with limiter.slot():
+                    return await self.hedgers[kind].call(lambda: client.chat.completions.create(**request), hedge_request, hedge)
+            except openai.RateLimitError:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                await asyncio.sleep(min(RATE_LIMIT_BACKOFF * 2 ** attempt, MAX_RATE_LIMIT_BACKOFF) * random.uniform(0.75, 1.0))
@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable
+
+
+def request_key(request: dict) -> str:
+    """Returns a canonical hash for a chat completion request.
+
+    Keys are sorted so that two requests built with the same arguments in a
+    different order still map to the same hash.
+    """
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_sampled(request: dict) -> bool:
+    """True when a request draws a fresh sample each time: it sets temperature > 0 and pins no seed.
+
+    Requests that leave temperature unset (e.g. grading) are treated as
+    queries for one answer, not as samples.
+    """
+    temperature = request.get("temperature")
+    return temperature is not None and temperature > 0 and request.get("seed") is None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls so they share one in-flight result.
+
+    The first caller for a key runs the call; any caller that arrives with the
+    same key while it is still running awaits the same future instead of
+    issuing its own request. Nothing is cached once the call finishes.
+    With coalesce=False the call always runs on its own (still counted in
+    `calls`), e.g. for sampled requests, which must stay independent draws.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]], coalesce: bool = True) -> Any:
+        if not coalesce:
+            self.calls += 1
+            return await call()
+        if key in self._in_flight:
+            self.coalesced += 1
+            return await asyncio.shield(self._in_flight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self.calls += 1
+        try:
+            result = await call()
+        except BaseException as e:
+            if not future.cancelled():
+                future.set_exception(e)
+                # Mark the exception as retrieved when nobody else was waiting.
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced}
@@ -1,12 +1,55 @@
+import argparse
 import json
 import os
+from dataclasses import dataclass
 from typing import Dict, List, Tuple
 import statistics
 
+import numpy as np
+
+import confidence_intervals
+from confidence_intervals import newcombe_difference_interval
+from results_db import default_results_path, read_temperature_results
+from incremental_analysis import AnalysisCache, question_hashes, source_fingerprint
+
+CLUSTER_NAMES = [
+    "Low-temperature optimal",
+    "Mid-temperature optimal",
+    "High-temperature optimal",
+    "Temperature-robust",
+    "Temperature-sensitive",
+]
+
+
+@dataclass(frozen=True)
+class ClusterThresholds:
+    """Cutoffs of the clustering rules in cluster_questions.
+
+    A question is robust when its accuracy std is <= robust_std or its range
+    <= robust_range. Otherwise its best temperature decides: <= low_temp_max
+    is low, >= high_temp_min is high, within [mid_temp_low, mid_temp_high]
+    is mid. Questions in between are sensitive when they step up and down by
+    more than nonmono_eps with a range >= sensitive_range, else low or high
+    by the sign of their slope.
+    """
+    robust_std: float = 0.015
+    robust_range: float = 0.02
+    nonmono_eps: float = 0.015
+    low_temp_max: float = 0.2
+    high_temp_min: float = 0.8
+    mid_temp_low: float = 0.4
+    mid_temp_high: float = 0.6
+    sensitive_range: float = 0.05
+
+
+DEFAULT_THRESHOLDS = ClusterThresholds()
+
 
 def load_temperature_accuracy(path: str) -> Dict[str, Dict[str, float]]:
-    with open(path, "r") as f:
-        raw = json.load(f)
+    return temperature_accuracy_from_raw(read_temperature_results(path))
+
+
+def temperature_accuracy_from_raw(raw: dict) -> Dict[str, Dict[str, float]]:
     # Build question -> temp -> accuracy map
     question_to_temp_to_acc: Dict[str, Dict[str, float]] = {}
     for temp_str, qdict in raw.items():
@@ -21,6 +64,39 @@ def load_temperature_accuracy(path: str) -> Dict[str, Dict[str, float]]:
     return question_to_temp_to_acc
 
 
+def load_temperature_counts(path: str) -> Dict[str, Dict[str, Tuple[int, int]]]:
+    return temperature_counts_from_raw(read_temperature_results(path))
+
+
+def temperature_counts_from_raw(raw: dict) -> Dict[str, Dict[str, Tuple[int, int]]]:
+    # Build question -> temp -> (true_positives, total_runs) map
+    question_to_temp_to_counts: Dict[str, Dict[str, Tuple[int, int]]] = {}
+    for temp_str, qdict in raw.items():
+        for question, metrics in qdict.items():
+            if "total_runs" not in metrics:
+                continue
+            question_to_temp_to_counts.setdefault(question, {})[temp_str] = (
+                int(metrics["true_positives"]),
+                int(metrics["total_runs"]),
+            )
+    return question_to_temp_to_counts
+
+
+def annotate_range_significance(rows: List[dict], q_to_counts: Dict[str, Dict[str, Tuple[int, int]]]) -> None:
+    # The accuracy range behind the robust/sensitive thresholds is only meaningful
+    # if the best and worst temperatures actually differ, so test that gap with a
+    # Newcombe interval for every question at once.
+    usable = [r for r in rows if r["question"] in q_to_counts]
+    if not usable:
+        return
+    best = np.array([q_to_counts[r["question"]][max(r["accuracies"], key=r["accuracies"].get)] for r in usable])
+    worst = np.array([q_to_counts[r["question"]][min(r["accuracies"], key=r["accuracies"].get)] for r in usable])
+    low, high = newcombe_difference_interval(worst[:, 0], worst[:, 1], best[:, 0], best[:, 1])
+    for r, lo, hi in zip(usable, low, high):
+        r["range_ci"] = [round(float(lo), 4), round(float(hi), 4)]
+        r["range_significant"] = bool(lo > 0 or hi < 0)
+
+
 def linear_regression_slope(xs: List[float], ys: List[float]) -> float:
     # Simple OLS slope without numpy: slope = cov(x,y)/var(x)
     n = len(xs)
@@ -43,92 +119,125 @@ def is_non_monotonic_significant(values: List[float], eps: float = 0.01) -> bool
     return has_pos and has_neg
 
 
-def cluster_questions(q_to_ta: Dict[str, Dict[str, float]]) -> Tuple[Dict[str, List[dict]], List[dict]]:
-    # Clusters
-    clusters: Dict[str, List[dict]] = {
-        "Low-temperature optimal": [],
-        "Mid-temperature optimal": [],
-        "High-temperature optimal": [],
-        "Temperature-robust": [],
-        "Temperature-sensitive": [],
-    }
-
-    # Sort temperatures once
+def sorted_temperature_keys(q_to_ta: Dict[str, Dict[str, float]]) -> List[str]:
     all_temp_strs = set()
     for temp_map in q_to_ta.values():
         all_temp_strs.update(temp_map.keys())
     sorted_temps = sorted([float(t) for t in all_temp_strs])
-    sorted_temp_strs = [f"{t:.1f}" for t in sorted_temps]
+    return [f"{t:.1f}" for t in sorted_temps]
+
+
+def temperature_profile(temp_to_acc: Dict[str, float], sorted_temp_strs: List[str]) -> dict | None:
+    """The threshold-independent statistics the clustering rules look at, or None without any accuracies."""
+    # Ensure consistent order and handle missing temps by skipping
+    temps_present = [t for t in sorted_temp_strs if t in temp_to_acc]
+    xs = [float(t) for t in temps_present]
+    ys = [temp_to_acc[t] for t in temps_present]
+    if not xs:
+        return None
+
+    max_acc = max(ys)
+    # Best temperature: choose the lowest temp among ties to prefer determinism
+    best_indices = [i for i, v in enumerate(ys) if abs(v - max_acc) < 1e-12]
+    deltas = [ys[i + 1] - ys[i] for i in range(len(ys) - 1)]
+    return {
+        "temps_present": temps_present,
+        "ys": ys,
+        "mean_acc": sum(ys) / len(ys),
+        "std_acc": statistics.pstdev(ys) if len(ys) > 1 else 0.0,
+        "max_acc": max_acc,
+        "acc_range": max_acc - min(ys),
+        "slope": linear_regression_slope(xs, ys),
+        "best_temp": xs[min(best_indices)],
+        # Largest steps up and down, which is all is_non_monotonic_significant compares to eps.
+        "max_step": max(deltas, default=0.0),
+        "min_step": min(deltas, default=0.0),
+    }
+
+
+def assign_cluster(profile: dict, thresholds: ClusterThresholds = DEFAULT_THRESHOLDS) -> str:
+    if profile["std_acc"] <= thresholds.robust_std or profile["acc_range"] <= thresholds.robust_range:
+        return "Temperature-robust"
+    best_temp = profile["best_temp"]
+    if best_temp <= thresholds.low_temp_max + 1e-9:
+        return "Low-temperature optimal"
+    if best_temp >= thresholds.high_temp_min - 1e-9:
+        return "High-temperature optimal"
+    if thresholds.mid_temp_low - 1e-9 <= best_temp <= thresholds.mid_temp_high + 1e-9:
+        return "Mid-temperature optimal"
+    # Fallback to slope and sensitivity
+    non_monotonic = is_non_monotonic_significant(profile["ys"], eps=thresholds.nonmono_eps)
+    if non_monotonic and profile["acc_range"] >= thresholds.sensitive_range:
+        return "Temperature-sensitive"
+    return "High-temperature optimal" if profile["slope"] > 0 else "Low-temperature optimal"
+
+
+def cluster_questions(q_to_ta: Dict[str, Dict[str, float]], thresholds: ClusterThresholds = DEFAULT_THRESHOLDS) -> Tuple[Dict[str, List[dict]], List[dict]]:
+    # Sort temperatures once
+    sorted_temp_strs = sorted_temperature_keys(q_to_ta)
 
     all_rows: List[dict] = []
 
     for question, temp_to_acc in q_to_ta.items():
-        # Ensure consistent order and handle missing temps by skipping
-        temps_present = [t for t in sorted_temp_strs if t in temp_to_acc]
-        xs = [float(t) for t in temps_present]
-        ys = [temp_to_acc[t] for t in temps_present]
-        if not xs:
+        profile = temperature_profile(temp_to_acc, sorted_temp_strs)
+        if profile is None:
             continue
 
-        mean_acc = sum(ys) / len(ys)
-        std_acc = statistics.pstdev(ys) if len(ys) > 1 else 0.0
-        max_acc = max(ys)
-        min_acc = min(ys)
-        acc_range = max_acc - min_acc
-        slope = linear_regression_slope(xs, ys)
-
-        # Best temperature: choose the lowest temp among ties to prefer determinism
-        best_indices = [i for i, v in enumerate(ys) if abs(v - max_acc) < 1e-12]
-        best_temp = xs[min(best_indices)]
-
-        # Heuristics
-        ROBUST_STD = 0.015
-        ROBUST_RANGE = 0.02
-        NONMONO_EPS = 0.015
-
-        is_robust = std_acc <= ROBUST_STD or acc_range <= ROBUST_RANGE
-        non_monotonic = is_non_monotonic_significant(ys, eps=NONMONO_EPS)
-
-        cluster_name: str
-        if is_robust:
-            cluster_name = "Temperature-robust"
-        else:
-            if best_temp <= 0.2 + 1e-9:
-                cluster_name = "Low-temperature optimal"
-            elif best_temp >= 0.8 - 1e-9:
-                cluster_name = "High-temperature optimal"
-            elif 0.4 - 1e-9 <= best_temp <= 0.6 + 1e-9:
-                cluster_name = "Mid-temperature optimal"
-            else:
-                # Fallback to slope and sensitivity
-                if non_monotonic and acc_range >= 0.05:
-                    cluster_name = "Temperature-sensitive"
-                else:
-                    cluster_name = "High-temperature optimal" if slope > 0 else "Low-temperature optimal"
-
         row = {
             "question": question,
-            "cluster": cluster_name,
-            "best_temperature": round(best_temp, 1),
-            "best_accuracy": round(max_acc, 4),
-            "mean_accuracy": round(mean_acc, 4),
-            "std_accuracy": round(std_acc, 4),
-            "slope": round(slope, 4),
-            "accuracies": {t: round(temp_to_acc[t], 4) for t in temps_present},
+            "cluster": assign_cluster(profile, thresholds),
+            "best_temperature": round(profile["best_temp"], 1),
+            "best_accuracy": round(profile["max_acc"], 4),
+            "mean_accuracy": round(profile["mean_acc"], 4),
+            "std_accuracy": round(profile["std_acc"], 4),
+            "slope": round(profile["slope"], 4),
+            "accuracies": {t: round(temp_to_acc[t], 4) for t in profile["temps_present"]},
         }
-        clusters[cluster_name].append(row)
         all_rows.append(row)
 
+    return group_rows(all_rows)
+
+
+def group_rows(rows: List[dict]) -> Tuple[Dict[str, List[dict]], List[dict]]:
+    # Every row is computed from its own question's accuracies only, so rows
+    # from different runs can be grouped together.
+    clusters: Dict[str, List[dict]] = {name: [] for name in CLUSTER_NAMES}
+    for row in rows:
+        clusters[row["cluster"]].append(row)
+
     # Sort entries within clusters by question for consistency
     for lst in clusters.values():
         lst.sort(key=lambda r: r["question"].lower())
 
     # Sort overall rows
-    all_rows.sort(key=lambda r: (r["cluster"], r["question"].lower()))
+    all_rows = sorted(rows, key=lambda r: (r["cluster"], r["question"].lower()))
 
     return clusters, all_rows
 
 
+def cluster_questions_incrementally(raw: dict, cache: AnalysisCache) -> Tuple[Dict[str, List[dict]], List[dict], int]:
+    """
+    Clusters only the questions whose results changed since the cache was written.
+
+    Rows of unchanged questions, including their range significance, are
+    reused from the cache. Returns (clusters, rows, number of questions recomputed).
+    """
+    hashes = question_hashes(raw)
+    changed, removed = cache.diff(hashes)
+    cache.remove(removed)
+    if changed:
+        changed_set = set(changed)
+        changed_raw = {temp: {q: metrics for q, metrics in q_data.items() if q in changed_set} for temp, q_data in raw.items()}
+        _, new_rows = cluster_questions(temperature_accuracy_from_raw(changed_raw))
+        annotate_range_significance(new_rows, temperature_counts_from_raw(changed_raw))
+        rows_by_question = {row["question"]: row for row in new_rows}
+        for question in changed:
+            cache.update(question, hashes[question], rows_by_question.get(question))
+    rows = [cache.value(question) for question in hashes if cache.value(question) is not None]
+    clusters, all_rows = group_rows(rows)
+    return clusters, all_rows, len(changed)
+
+
 def write_outputs(clusters: Dict[str, List[dict]], rows: List[dict], out_dir: str) -> None:
     clusters_path = os.path.join(out_dir, "temperature_clusters.json")
     with open(clusters_path, "w") as f:
@@ -141,33 +250,31 @@ def write_outputs(clusters: Dict[str, List[dict]], rows: List[dict], out_dir: st
     lines.append("")
     # Counts
     lines.append("### Cluster sizes")
-    for cname in [
-        "Low-temperature optimal",
-        "Mid-temperature optimal",
-        "High-temperature optimal",
-        "Temperature-robust",
-        "Temperature-sensitive",
-    ]:
+    for cname in CLUSTER_NAMES:
         lines.append(f"- {cname}: {len(clusters.get(cname, []))}")
     lines.append("")
 
     # Criteria
     lines.append("### Criteria")
-    lines.append("- Low-temperature optimal: Best accuracy at T<=0.2 or decreasing trend.")
-    lines.append("- Mid-temperature optimal: Best accuracy at T in {0.4, 0.6}.")
-    lines.append("- High-temperature optimal: Best accuracy at T>=0.8 or increasing trend.")
-    lines.append("- Temperature-robust: Accuracy nearly flat across temperatures (std<=0.015 or range<=0.02).")
-    lines.append("- Temperature-sensitive: Non-monotonic with notable swings (range>=0.05).")
+    t = DEFAULT_THRESHOLDS
+    lines.append(f"- Low-temperature optimal: Best accuracy at T<={t.low_temp_max} or decreasing trend.")
+    lines.append(f"- Mid-temperature optimal: Best accuracy at T in [{t.mid_temp_low}, {t.mid_temp_high}].")
+    lines.append(f"- High-temperature optimal: Best accuracy at T>={t.high_temp_min} or increasing trend.")
+    lines.append(f"- Temperature-robust: Accuracy nearly flat across temperatures (std<={t.robust_std} or range<={t.robust_range}).")
+    lines.append(f"- Temperature-sensitive: Non-monotonic with notable swings (range>={t.sensitive_range}).")
+    lines.append("- Range sig.: whether the 95% Newcombe interval for best-minus-worst accuracy excludes 0. "
+                 "Clusters other than Temperature-robust are only meaningful for questions marked yes.")
     lines.append("")
 
     # Detailed table
     lines.append("### Per-question overview")
-    lines.append("Question | Cluster | Best T | Best Acc | Mean | Std | Slope")
-    lines.append("--- | --- | --- | --- | --- | --- | ---")
+    lines.append("Question | Cluster | Best T | Best Acc | Mean | Std | Slope | Range sig.")
+    lines.append("--- | --- | --- | --- | --- | --- | --- | ---")
     for r in rows:
+        significance = "n/a" if "range_significant" not in r else ("yes" if r["range_significant"] else "no")
         lines.append(
             f"{r['question']} | {r['cluster']} | {r['best_temperature']:.1f} | {r['best_accuracy']:.3f} | "
-            f"{r['mean_accuracy']:.3f} | {r['std_accuracy']:.3f} | {r['slope']:.3f}"
+            f"{r['mean_accuracy']:.3f} | {r['std_accuracy']:.3f} | {r['slope']:.3f} | {significance}"
         )
 
     with open(summary_path, "w") as f:
@@ -175,10 +282,21 @@ def write_outputs(clusters: Dict[str, List[dict]], rows: List[dict], out_dir: st
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Cluster questions by how their accuracy responds to temperature.")
+    parser.add_argument("--incremental", action="store_true", help="Recompute only questions whose results changed since the last incremental run.")
+    args = parser.parse_args()
+
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_path = os.path.join(base_dir, "temperature_accuracy_data.json")
-    q_to_ta = load_temperature_accuracy(data_path)
-    clusters, rows = cluster_questions(q_to_ta)
+    data_path = default_results_path(base_dir)
+    if args.incremental:
+        cache = AnalysisCache("temperature_clusters", source_fingerprint(confidence_intervals.__file__, __file__))
+        clusters, rows, recomputed = cluster_questions_incrementally(read_temperature_results(data_path), cache)
+        cache.save()
+        print(f"Recomputed {recomputed} of {len(rows)} questions")
+    else:
+        q_to_ta = load_temperature_accuracy(data_path)
+        clusters, rows = cluster_questions(q_to_ta)
+        annotate_range_significance(rows, load_temperature_counts(data_path))
     write_outputs(clusters, rows, base_dir)
     print("Wrote temperature_clusters.json and CLUSTERING_SUMMARY.md")
 
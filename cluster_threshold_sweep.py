@@ -0,0 +1,193 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from dataclasses import asdict, fields
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from cluster_temperature_questions import (
+    CLUSTER_NAMES,
+    DEFAULT_THRESHOLDS,
+    ClusterThresholds,
+    load_temperature_accuracy,
+    sorted_temperature_keys,
+    temperature_profile,
+)
+from results_db import default_results_path
+
+SWEEP_REPORT_FILE = "cluster_threshold_sweep.json"
+
+# Values swept per ClusterThresholds field; every combination is evaluated.
+# Each axis contains the default so the baseline is one of the combinations.
+DEFAULT_GRID: Dict[str, List[float]] = {
+    "robust_std": [round(v, 4) for v in np.linspace(0.005, 0.05, 10)],
+    "robust_range": [round(v, 4) for v in np.linspace(0.01, 0.08, 8)],
+    "nonmono_eps": [round(v, 4) for v in np.linspace(0.005, 0.05, 10)],
+    "low_temp_max": [0.0, 0.2, 0.4],
+    "high_temp_min": [0.6, 0.8, 1.0],
+    "mid_temp_low": [0.2, 0.4],
+    "mid_temp_high": [0.6, 0.8],
+    "sensitive_range": [0.03, 0.05, 0.1],
+}
+
+# Question x combination cells classified per chunk, to bound memory.
+CELLS_PER_CHUNK = 4_000_000
+TOP_UNSTABLE_QUESTIONS = 20
+
+_ROBUST = CLUSTER_NAMES.index("Temperature-robust")
+_LOW = CLUSTER_NAMES.index("Low-temperature optimal")
+_MID = CLUSTER_NAMES.index("Mid-temperature optimal")
+_HIGH = CLUSTER_NAMES.index("High-temperature optimal")
+_SENSITIVE = CLUSTER_NAMES.index("Temperature-sensitive")
+
+
+def profile_arrays(q_to_ta: Dict[str, Dict[str, float]]) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    The threshold-independent statistics of every question, as arrays.
+
+    Uses temperature_profile, so the sweep classifies from exactly the
+    numbers cluster_questions does.
+    """
+    sorted_temp_strs = sorted_temperature_keys(q_to_ta)
+    questions, profiles = [], []
+    for question, temp_to_acc in q_to_ta.items():
+        profile = temperature_profile(temp_to_acc, sorted_temp_strs)
+        if profile is not None:
+            questions.append(question)
+            profiles.append(profile)
+    keys = ("std_acc", "acc_range", "best_temp", "slope", "max_step", "min_step")
+    return questions, {key: np.array([p[key] for p in profiles], dtype=float) for key in keys}
+
+
+def threshold_combinations(grid: Dict[str, Sequence[float]]) -> Dict[str, np.ndarray]:
+    """Every combination of the grid's values, as one flat array per ClusterThresholds field (C order over the grid axes)."""
+    axes = [np.asarray(grid.get(f.name, [getattr(DEFAULT_THRESHOLDS, f.name)]), dtype=float) for f in fields(ClusterThresholds)]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return {f.name: values.ravel() for f, values in zip(fields(ClusterThresholds), mesh)}
+
+
+def classify(profiles: Dict[str, np.ndarray], thresholds: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Cluster index (into CLUSTER_NAMES) of every question under every threshold combination.
+
+    Vectorized form of assign_cluster: question statistics broadcast along
+    rows against threshold values along columns.
+
+    Returns:
+        int8 array of shape (questions, combinations).
+    """
+    def col(name: str) -> np.ndarray:
+        return np.asarray(thresholds[name], dtype=float)[None, :]
+
+    std_acc, acc_range, best_temp = profiles["std_acc"][:, None], profiles["acc_range"][:, None], profiles["best_temp"][:, None]
+    robust = (std_acc <= col("robust_std")) | (acc_range <= col("robust_range"))
+    low = best_temp <= col("low_temp_max") + 1e-9
+    high = best_temp >= col("high_temp_min") - 1e-9
+    mid = (col("mid_temp_low") - 1e-9 <= best_temp) & (best_temp <= col("mid_temp_high") + 1e-9)
+    eps = col("nonmono_eps")
+    sensitive = (profiles["max_step"][:, None] > eps) & (profiles["min_step"][:, None] < -eps) & (acc_range >= col("sensitive_range"))
+    by_slope = np.where(profiles["slope"][:, None] > 0, _HIGH, _LOW)
+
+    labels = np.where(sensitive, _SENSITIVE, by_slope)
+    labels = np.where(mid, _MID, labels)
+    labels = np.where(high, _HIGH, labels)
+    labels = np.where(low, _LOW, labels)
+    labels = np.where(robust, _ROBUST, labels)
+    return labels.astype(np.int8)
+
+
+def sweep(q_to_ta: Dict[str, Dict[str, float]], grid: Dict[str, Sequence[float]] = DEFAULT_GRID, cells_per_chunk: int = CELLS_PER_CHUNK) -> dict:
+    """
+    Evaluates every threshold combination of `grid` and summarizes how the clusters move.
+
+    For each combination, records the size of every cluster and the share
+    of questions assigned differently than under DEFAULT_THRESHOLDS.
+
+    Returns:
+        Report with the baseline sizes, the distribution of changed shares,
+        per-axis marginals, pairwise surfaces (mean cluster sizes and changed
+        share over the grid of two axes, averaged over the others) and the
+        questions that change cluster most often.
+    """
+    started = time.perf_counter()
+    questions, profiles = profile_arrays(q_to_ta)
+    combos = threshold_combinations(grid)
+    baseline = classify(profiles, {name: [value] for name, value in asdict(DEFAULT_THRESHOLDS).items()})[:, 0]
+
+    num_combos = len(next(iter(combos.values())))
+    sizes = np.zeros((num_combos, len(CLUSTER_NAMES)), dtype=np.int32)
+    changed = np.zeros(num_combos)
+    question_changes = np.zeros(len(questions), dtype=np.int64)
+    chunk = max(1, cells_per_chunk // max(len(questions), 1))
+    for start in range(0, num_combos, chunk):
+        labels = classify(profiles, {name: values[start:start + chunk] for name, values in combos.items()})
+        for k in range(len(CLUSTER_NAMES)):
+            sizes[start:start + chunk, k] = (labels == k).sum(axis=0)
+        moved = labels != baseline[:, None]
+        changed[start:start + chunk] = moved.mean(axis=0) if questions else 0.0
+        question_changes += moved.sum(axis=1)
+
+    axes = [f.name for f in fields(ClusterThresholds) if f.name in grid]
+    values = {name: [float(v) for v in grid[name]] for name in axes}
+    shape = tuple(len(values[name]) for name in axes)
+    sizes_grid = sizes.reshape(shape + (len(CLUSTER_NAMES),))
+    changed_grid = changed.reshape(shape)
+
+    def surface(keep: Tuple[int, ...]) -> dict:
+        other = tuple(i for i in range(len(axes)) if i not in keep)
+        return {
+            "mean_sizes": {name: np.round(sizes_grid[..., k].mean(axis=other), 3).tolist() for k, name in enumerate(CLUSTER_NAMES)},
+            "mean_changed_share": np.round(changed_grid.mean(axis=other), 4).tolist(),
+        }
+
+    unstable = np.argsort(-question_changes, kind="stable")[:TOP_UNSTABLE_QUESTIONS]
+    return {
+        "questions": len(questions),
+        "combinations": num_combos,
+        "seconds": round(time.perf_counter() - started, 3),
+        "grid": values,
+        "baseline": asdict(DEFAULT_THRESHOLDS),
+        "baseline_sizes": {name: int((baseline == k).sum()) for k, name in enumerate(CLUSTER_NAMES)},
+        "changed_share": {
+            "mean": float(changed.mean()),
+            "median": float(np.median(changed)),
+            "p90": float(np.percentile(changed, 90)),
+            "max": float(changed.max()),
+            "combinations_within_5pct": float(np.mean(changed <= 0.05)),
+            "combinations_within_10pct": float(np.mean(changed <= 0.10)),
+        },
+        "marginals": {name: surface((i,)) for i, name in enumerate(axes)},
+        "surfaces": {f"{axes[i]} x {axes[j]}": surface((i, j)) for i, j in itertools.combinations(range(len(axes)), 2)},
+        "most_unstable_questions": [
+            {"question": questions[i], "baseline_cluster": CLUSTER_NAMES[baseline[i]], "changed_share": float(question_changes[i] / num_combos)}
+            for i in unstable if question_changes[i] > 0
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the temperature clustering thresholds and report how stable the clusters are.")
+    parser.add_argument("--out", default=SWEEP_REPORT_FILE, help="Where to write the JSON report.")
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    report = sweep(load_temperature_accuracy(default_results_path(base_dir)))
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Evaluated {report['combinations']} threshold combinations over {report['questions']} questions in {report['seconds']:.2f}s")
+    print("Baseline cluster sizes: " + ", ".join(f"{name}: {size}" for name, size in report["baseline_sizes"].items()))
+    share = report["changed_share"]
+    print(f"Share of questions changing cluster: mean {share['mean']:.1%}, median {share['median']:.1%}, p90 {share['p90']:.1%}, max {share['max']:.1%}")
+    print(f"Combinations changing at most 5% / 10% of questions: {share['combinations_within_5pct']:.1%} / {share['combinations_within_10pct']:.1%}")
+    for name, marginal in report["marginals"].items():
+        shares = ", ".join(f"{value}: {s:.1%}" for value, s in zip(report["grid"][name], marginal["mean_changed_share"]))
+        print(f"  {name}: {shares}")
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import hashlib
+from statistics import NormalDist
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+Z_95 = 1.959963984540054
+NUM_RESAMPLES = 2000
+# Questions resampled per block, so memory stays at roughly
+# BLOCK_SIZE * num_temperatures * NUM_RESAMPLES floats.
+BLOCK_SIZE = 256
+
+
+def build_count_matrix(counts: Dict[float, Dict[str, Tuple[int, int]]]) -> Tuple[List[str], List[float], np.ndarray, np.ndarray]:
+    """
+    Builds (question × temperature) matrices of correct and total counts.
+
+    Args:
+        counts: temperature -> question -> (true_positives, total_runs).
+
+    Returns:
+        (questions, temperatures, successes, totals). Cells with no runs have a total of 0.
+    """
+    temps = sorted(float(t) for t in counts)
+    questions = sorted({q for q_counts in counts.values() for q in q_counts})
+    q_pos = {q: i for i, q in enumerate(questions)}
+    successes = np.zeros((len(questions), len(temps)), dtype=np.int64)
+    totals = np.zeros((len(questions), len(temps)), dtype=np.int64)
+    for t_idx, temp in enumerate(temps):
+        q_counts = counts.get(temp, counts.get(str(temp), {}))
+        for question, (correct, runs) in q_counts.items():
+            successes[q_pos[question], t_idx] = correct
+            totals[q_pos[question], t_idx] = runs
+    return questions, temps, successes, totals
+
+
+def wilson_interval(successes: np.ndarray, totals: np.ndarray, z: float = Z_95) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilson score interval for every cell. Cells with no runs get NaN bounds."""
+    n = np.asarray(totals, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = np.asarray(successes, dtype=float) / n
+        denom = 1 + z ** 2 / n
+        center = (p + z ** 2 / (2 * n)) / denom
+        half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denom
+    return center - half, center + half
+
+
+def newcombe_difference_interval(s_a: np.ndarray, n_a: np.ndarray, s_b: np.ndarray, n_b: np.ndarray, z: float = Z_95) -> Tuple[np.ndarray, np.ndarray]:
+    """Newcombe's hybrid score interval for p_b - p_a, built from the two Wilson intervals."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_a = np.asarray(s_a, dtype=float) / n_a
+        p_b = np.asarray(s_b, dtype=float) / n_b
+    lo_a, hi_a = wilson_interval(s_a, n_a, z)
+    lo_b, hi_b = wilson_interval(s_b, n_b, z)
+    delta = p_b - p_a
+    low = delta - np.sqrt((p_b - lo_b) ** 2 + (hi_a - p_a) ** 2)
+    high = delta + np.sqrt((hi_b - p_b) ** 2 + (p_a - lo_a) ** 2)
+    return low, high
+
+
+def cell_rng(question: str, temperature: float, seed: int) -> np.random.Generator:
+    """Random stream for one cell, derived from (question, temperature, seed) only, so its resamples don't depend on the other cells analyzed with it."""
+    digest = hashlib.sha256(f"{question}\0{float(temperature)!r}\0{seed}".encode("utf-8")).digest()
+    return np.random.default_rng(int.from_bytes(digest[:16], "little"))
+
+
+def _resample_accuracy(successes: np.ndarray, totals: np.ndarray, questions: Sequence[str], temps: Sequence[float], num_resamples: int, seed: int) -> np.ndarray:
+    # Resampling n Bernoulli outcomes with replacement and counting the correct
+    # ones is exactly a Binomial(n, p_hat) draw, so no per-item data is needed.
+    resampled = np.zeros(totals.shape + (num_resamples,))
+    for q_idx, t_idx in zip(*np.nonzero(totals)):
+        n = totals[q_idx, t_idx]
+        draws = cell_rng(questions[q_idx], temps[t_idx], seed).binomial(n, successes[q_idx, t_idx] / n, num_resamples)
+        resampled[q_idx, t_idx] = draws / n
+    return resampled
+
+
+def bootstrap_intervals(successes: np.ndarray, totals: np.ndarray, questions: Sequence[str], temps: Sequence[float], confidence: float = 0.95, num_resamples: int = NUM_RESAMPLES, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray], np.ndarray, np.ndarray]:
+    """
+    Percentile bootstrap intervals for every cell and every consecutive-temperature delta.
+
+    Each cell is resampled once, from its own cell_rng stream, and the same
+    resamples feed both its own interval and the deltas it takes part in, so
+    a question's intervals are the same whether it is analyzed alone or in a
+    full run. Questions are processed in blocks of BLOCK_SIZE rows to bound
+    memory.
+
+    Args:
+        questions, temps: Row and column labels of the matrices, as returned by build_count_matrix.
+
+    Returns:
+        (cell_low, cell_high, pairs, delta_low, delta_high), where pairs is
+        consecutive_pairs(totals) and the delta arrays are aligned with it.
+    """
+    quantiles = [(1 - confidence) / 2, 1 - (1 - confidence) / 2]
+    cell_low = np.full(totals.shape, np.nan)
+    cell_high = np.full(totals.shape, np.nan)
+    delta_blocks = []
+    for start in range(0, totals.shape[0], BLOCK_SIZE):
+        block = slice(start, start + BLOCK_SIZE)
+        resampled = _resample_accuracy(successes[block], totals[block], questions[block], temps, num_resamples, seed)
+        cell_low[block], cell_high[block] = np.quantile(resampled, quantiles, axis=2)
+
+        q_rows, prev_cols, next_cols = consecutive_pairs(totals[block])
+        deltas = resampled[q_rows, next_cols] - resampled[q_rows, prev_cols]
+        low, high = np.quantile(deltas, quantiles, axis=1) if len(q_rows) else (np.zeros(0), np.zeros(0))
+        delta_blocks.append((q_rows + start, prev_cols, next_cols, low, high))
+
+    empty = totals == 0
+    cell_low[empty] = np.nan
+    cell_high[empty] = np.nan
+    pairs = tuple(np.concatenate([b[i] for b in delta_blocks]) for i in range(3))
+    return cell_low, cell_high, pairs, np.concatenate([b[3] for b in delta_blocks]), np.concatenate([b[4] for b in delta_blocks])
+
+
+def consecutive_pairs(totals: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Indexes every (question, previous temperature, next temperature) pair,
+    skipping temperatures at which the question has no runs.
+
+    Returns:
+        (question_rows, previous_columns, next_columns)
+    """
+    rows, cols = np.nonzero(totals > 0)
+    # np.nonzero walks row-major, so consecutive entries with the same row are
+    # consecutive present temperatures of one question.
+    same_question = rows[1:] == rows[:-1]
+    return rows[1:][same_question], cols[:-1][same_question], cols[1:][same_question]
+
+
+def analyze_counts(counts: Dict[float, Dict[str, Tuple[int, int]]], confidence: float = 0.95, num_resamples: int = NUM_RESAMPLES, seed: int = 0) -> Dict[str, dict]:
+    """
+    Computes Wilson and bootstrap intervals for every cell and every
+    consecutive-temperature delta.
+
+    A delta counts as significant only when both its Newcombe (Wilson-based)
+    interval and its bootstrap interval exclude zero.
+
+    Args:
+        counts: temperature -> question -> (true_positives, total_runs).
+        confidence (float): Two-sided confidence level.
+        num_resamples (int): Bootstrap resamples per cell and per delta.
+        seed (int): Seed for the bootstrap, so reruns give identical intervals.
+
+    Returns:
+        dict: question -> {"cells": {temp: {...}}, "deltas": [{...}, ...]}
+    """
+    questions, temps, successes, totals = build_count_matrix(counts)
+    if not questions:
+        return {}
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+
+    wilson_low, wilson_high = wilson_interval(successes, totals, z)
+    boot_low, boot_high, (q_rows, prev_cols, next_cols), d_boot_low, d_boot_high = bootstrap_intervals(
+        successes, totals, questions, temps, confidence, num_resamples, seed
+    )
+
+    s_a, n_a = successes[q_rows, prev_cols], totals[q_rows, prev_cols]
+    s_b, n_b = successes[q_rows, next_cols], totals[q_rows, next_cols]
+    delta = s_b / n_b - s_a / n_a
+    d_wilson_low, d_wilson_high = newcombe_difference_interval(s_a, n_a, s_b, n_b, z)
+    significant = ((d_wilson_low > 0) | (d_wilson_high < 0)) & ((d_boot_low > 0) | (d_boot_high < 0))
+
+    output: Dict[str, dict] = {}
+    for q_idx, question in enumerate(questions):
+        cells = {}
+        for t_idx, temp in enumerate(temps):
+            if totals[q_idx, t_idx] == 0:
+                continue
+            cells[temp] = {
+                "wilson_ci": [float(wilson_low[q_idx, t_idx]), float(wilson_high[q_idx, t_idx])],
+                "bootstrap_ci": [float(boot_low[q_idx, t_idx]), float(boot_high[q_idx, t_idx])],
+            }
+        output[question] = {"cells": cells, "deltas": []}
+
+    for i in range(len(q_rows)):
+        output[questions[q_rows[i]]]["deltas"].append({
+            "temperature": temps[next_cols[i]],
+            "from_previous_temp": temps[prev_cols[i]],
+            "delta": float(delta[i]),
+            "delta_wilson_ci": [float(d_wilson_low[i]), float(d_wilson_high[i])],
+            "delta_bootstrap_ci": [float(d_boot_low[i]), float(d_boot_high[i])],
+            "significant": bool(significant[i]),
+        })
+    return output
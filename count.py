@@ -1,693 +1,156 @@
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from typing import Dict, IO, Iterable, Iterator
 
-val = """"
-Processing image_id: 000638692X at temperature 0.4
-Processing image_id: 000712032X at temperature 0.4
-Processing image_id: 000755589X at temperature 0.4
-Processing image_id: 002573900X at temperature 0.4
-Processing image_id: 002863800X at temperature 0.4
-Processing image_id: 003045204X at temperature 0.4
-Processing image_id: 006017093X at temperature 0.4
-Processing image_id: 006017630X at temperature 0.4
-Processing image_id: 006051471X at temperature 0.4
-Processing image_id: 006056573X at temperature 0.4
-Processing image_id: 006057626X at temperature 0.4
-Processing image_id: 006066567X at temperature 0.4
-Processing image_id: 006089072X at temperature 0.4
-Processing image_id: 006093008X at temperature 0.4
-Processing image_id: 006093204X at temperature 0.4
-Processing image_id: 006121437X at temperature 0.4
-Processing image_id: 006125147X at temperature 0.4
-Processing image_id: 006134477X at temperature 0.4
-Processing image_id: 006156589X at temperature 0.4
-Processing image_id: 006162599X at temperature 0.4
-Processing image_id: 006177460X at temperature 0.4
-Processing image_id: 006185414X at temperature 0.4
-Processing image_id: 006211946X at temperature 0.4
-Processing image_id: 006219531X at temperature 0.4
-Processing image_id: 006220257X at temperature 0.4
-Processing image_id: 006222087X at temperature 0.4
-Processing image_id: 006222929X at temperature 0.4
-Processing image_id: 006227628X at temperature 0.4
-Processing image_id: 006228620X at temperature 0.4
-Processing image_id: 006228987X at temperature 0.4
-Processing image_id: 006229766X at temperature 0.4
-Processing image_id: 006232215X at temperature 0.4
-Processing image_id: 006232280X at temperature 0.4
-Processing image_id: 006232781X at temperature 0.4
-Processing image_id: 006234661X at temperature 0.4
-Processing image_id: 006238032X at temperature 0.4
-Processing image_id: 006239620X at temperature 0.4
-Processing image_id: 006244428X at temperature 0.4
-Processing image_id: 006250794X at temperature 0.4
-Processing image_id: 006251007X at temperature 0.4
-Processing image_id: 006271614X at temperature 0.4
-Processing image_id: 006440370X at temperature 0.4
-Processing image_id: 006446055X at temperature 0.4
-Processing image_id: 007022045X at temperature 0.4
-Processing image_id: 007042778X at temperature 0.4
-Processing image_id: 007054235X at temperature 0.4
-Processing image_id: 007054901X at temperature 0.4
-Processing image_id: 007057927X at temperature 0.4
-Processing image_id: 007138801X at temperature 0.4
-Processing image_id: 007140810X at temperature 0.4
-Processing image_id: 007145151X at temperature 0.4
-Processing image_id: 007162726X at temperature 0.4
-Processing image_id: 007163536X at temperature 0.4
-Processing image_id: 007166789X at temperature 0.4
-Processing image_id: 007171801X at temperature 0.4
-Processing image_id: 007175489X at temperature 0.4
-Processing image_id: 007175914X at temperature 0.4
-Processing image_id: 007177016X at temperature 0.4
-Processing image_id: 007178277X at temperature 0.4
-Processing image_id: 007179302X at temperature 0.4
-Processing image_id: 007180160X at temperature 0.4
-Processing image_id: 007180336X at temperature 0.4
-Processing image_id: 007181308X at temperature 0.4
-Processing image_id: 007181986X at temperature 0.4
-Processing image_id: 007182250X at temperature 0.4
-Processing image_id: 007182393X at temperature 0.4
-Processing image_id: 007182913X at temperature 0.4
-Processing image_id: 007183432X at temperature 0.4
-Processing image_id: 007183995X at temperature 0.4
-Processing image_id: 007212945X at temperature 0.4
-Processing image_id: 007305304X at temperature 0.4
-Processing image_id: 007351375X at temperature 0.4
-Processing image_id: 007352526X at temperature 0.4
-Processing image_id: 007353434X at temperature 0.4
-Processing image_id: 007664183X at temperature 0.4
-Processing image_id: 007762453X at temperature 0.4
-Processing image_id: 007786221X at temperature 0.4
-Processing image_id: 007802403X at temperature 0.4
-Processing image_id: 007802563X at temperature 0.4
-Processing image_id: 007802661X at temperature 0.4
-Processing image_id: 007802904X at temperature 0.4
-Processing image_id: 007803826X at temperature 0.4
-Processing image_id: 007875979X at temperature 0.4
-Processing image_id: 009942875X at temperature 0.4
-Processing image_id: 012187902X at temperature 0.4
-Processing image_id: 012375092X at temperature 0.4
-Processing image_id: 012407698X at temperature 0.4
-Processing image_id: 012415915X at temperature 0.4
-Processing image_id: 012416675X at temperature 0.4
-Processing image_id: 012469540X at temperature 0.4
-Processing image_id: 012553180X at temperature 0.4
-Processing image_id: 012732951X at temperature 0.4
-Processing image_id: 013054275X at temperature 0.4
-Processing image_id: 013114426X at temperature 0.4
-Processing image_id: 013187621X at temperature 0.4
-Processing image_id: 013227535X at temperature 0.4
-Processing image_id: 013242942X at temperature 0.4
-Processing image_id: 013260969X at temperature 0.4
-Processing image_id: 013270899X at temperature 0.4
-Processing image_id: 013288836X at temperature 0.4
-Processing image_id: 013357072X at temperature 0.4
-Processing image_id: 013547597X at temperature 0.4
-Processing image_id: 013600380X at temperature 0.4
-Processing image_id: 013714508X at temperature 0.4
-Processing image_id: 014005667X at temperature 0.4
-Processing image_id: 014005958X at temperature 0.4
-Processing image_id: 014017737X at temperature 0.4
-Processing image_id: 014019441X at temperature 0.4
-Processing image_id: 014023828X at temperature 0.4
-Processing image_id: 014044100X at temperature 0.4
-Processing image_id: 014050639X at temperature 0.4
-Processing image_id: 014103453X at temperature 0.4
-Processing image_id: 014139479X at temperature 0.4
-Processing image_id: 014144195X at temperature 0.4
-Processing image_id: 014240456X at temperature 0.4
-Processing image_id: 014241932X at temperature 0.4
-Processing image_id: 014303992X at temperature 0.4
-Processing image_id: 014310845X at temperature 0.4
-Processing image_id: 014312224X at temperature 0.4
-Processing image_id: 014312675X at temperature 0.4
-Processing image_id: 015191074X at temperature 0.4
-Processing image_id: 015201036X at temperature 0.4
-Processing image_id: 015205085X at temperature 0.4
-Processing image_id: 019025890X at temperature 0.4
-Processing image_id: 019439977X at temperature 0.4
-Processing image_id: 019501927X at temperature 0.4
-Processing image_id: 019514368X at temperature 0.4
-Processing image_id: 019515634X at temperature 0.4
-Processing image_id: 019533261X at temperature 0.4
-Processing image_id: 019539156X at temperature 0.4
-Processing image_id: 019831020X at temperature 0.4
-Processing image_id: 019852059X at temperature 0.4
-Processing image_id: 019871209X at temperature 0.4
-Processing image_id: 019921509X at temperature 0.4
-Processing image_id: 019932218X at temperature 0.4
-Processing image_id: 019933224X at temperature 0.4
-Processing image_id: 019933823X at temperature 0.4
-Processing image_id: 019953568X at temperature 0.4
-Processing image_id: 019954090X at temperature 0.4
-Processing image_id: 019955241X at temperature 0.4
-Processing image_id: 019957717X at temperature 0.4
-Processing image_id: 019963534X at temperature 0.4
-Processing image_id: 019967941X at temperature 0.4
-Processing image_id: 019973402X at temperature 0.4
-Processing image_id: 019979068X at temperature 0.4
-Processing image_id: 019995934X at temperature 0.4
-Processing image_id: 020138423X at temperature 0.4
-Processing image_id: 020189548X at temperature 0.4
-Processing image_id: 020530902X at temperature 0.4
-Processing image_id: 020537087X at temperature 0.4
-Processing image_id: 020553693X at temperature 0.4
-Processing image_id: 020588699X at temperature 0.4
-Processing image_id: 022600273X at temperature 0.4
-Processing image_id: 022600919X at temperature 0.4
-Processing image_id: 022602010X at temperature 0.4
-Processing image_id: 022603528X at temperature 0.4
-Processing image_id: 022605148X at temperature 0.4
-Processing image_id: 022607305X at temperature 0.4
-Processing image_id: 022609961X at temperature 0.4
-Processing image_id: 022610415X at temperature 0.4
-Processing image_id: 022610883X at temperature 0.4
-Processing image_id: 022611399X at temperature 0.4
-Processing image_id: 022611676X at temperature 0.4
-Processing image_id: 022614383X at temperature 0.4
-Processing image_id: 022616361X at temperature 0.4
-Processing image_id: 022617610X at temperature 0.4
-Processing image_id: 022620538X at temperature 0.4
-Processing image_id: 022627845X at temperature 0.4
-Processing image_id: 022628560X at temperature 0.4
-Processing image_id: 022637954X at temperature 0.4
-Processing image_id: 023000699X at temperature 0.4
-Processing image_id: 023107932X at temperature 0.4
-Processing image_id: 023112905X at temperature 0.4
-Processing image_id: 023116842X at temperature 0.4
-Processing image_id: 023117084X at temperature 0.4
-Processing image_id: 024081553X at temperature 0.4
-Processing image_id: 024081696X at temperature 0.4
-Processing image_id: 024082153X at temperature 0.4
-Processing image_id: 024082380X at temperature 0.4
-Processing image_id: 025207176X at temperature 0.4
-Processing image_id: 025207341X at temperature 0.4
-Processing image_id: 025322134X at temperature 0.4
-Processing image_id: 026201548X at temperature 0.4
-Processing image_id: 026202893X at temperature 0.4
-Processing image_id: 026218253X at temperature 0.4
-Processing image_id: 026252600X at temperature 0.4
-Processing image_id: 026803267X at temperature 0.4
-Processing image_id: 029919244X at temperature 0.4
-Processing image_id: 029922824X at temperature 0.4
-Processing image_id: 030019580X at temperature 0.4
-Processing image_id: 030640771X at temperature 0.4
-Processing image_id: 030643606X at temperature 0.4
-Processing image_id: 030682082X at temperature 0.4
-Processing image_id: 030711886X at temperature 0.4
-Processing image_id: 030738604X at temperature 0.4
-Processing image_id: 030739395X at temperature 0.4
-Processing image_id: 030745858X at temperature 0.4
-Processing image_id: 030746184X at temperature 0.4
-Processing image_id: 030746363X at temperature 0.4
-Processing image_id: 030747352X at temperature 0.4
-Processing image_id: 030747464X at temperature 0.4
-Processing image_id: 030759341X at temperature 0.4
-Processing image_id: 030771909X at temperature 0.4
-Processing image_id: 030774177X at temperature 0.4
-Processing image_id: 030774180X at temperature 0.4
-Processing image_id: 030788726X at temperature 0.4
-Processing image_id: 030797796X at temperature 0.4
-Processing image_id: 030798950X at temperature 0.4
-Processing image_id: 030910212X at temperature 0.4
-Processing image_id: 031000019X at temperature 0.4
-Processing image_id: 031022652X at temperature 0.4
-Processing image_id: 031024045X at temperature 0.4
-Processing image_id: 031029066X at temperature 0.4
-Processing image_id: 031040200X at temperature 0.4
-Processing image_id: 031069616X at temperature 0.4
-Processing image_id: 031074590X at temperature 0.4
-Processing image_id: 031092605X at temperature 0.4
-Processing image_id: 031221149X at temperature 0.4
-Processing image_id: 031227551X at temperature 0.4
-Processing image_id: 031231048X at temperature 0.4
-Processing image_id: 031231616X at temperature 0.4
-Processing image_id: 031250490X at temperature 0.4
-Processing image_id: 031253566X at temperature 0.4
-Processing image_id: 031255513X at temperature 0.4
-Processing image_id: 031260808X at temperature 0.4
-Processing image_id: 031265930X at temperature 0.4
-Processing image_id: 031416118X at temperature 0.4
-Processing image_id: 031418953X at temperature 0.4
-Processing image_id: 031425207X at temperature 0.4
-Processing image_id: 031428057X at temperature 0.4
-Processing image_id: 031606002X at temperature 0.4
-Processing image_id: 031620756X at temperature 0.4
-Processing image_id: 031622569X at temperature 0.4
-Processing image_id: 031633622X at temperature 0.4
-Processing image_id: 031638660X at temperature 0.4
-Processing image_id: 032119991X at temperature 0.4
-Processing image_id: 032152599X at temperature 0.4
-Processing image_id: 032154420X at temperature 0.4
-Processing image_id: 032300699X at temperature 0.4
-Processing image_id: 032305353X at temperature 0.4
-Processing image_id: 032306874X at temperature 0.4
-Processing image_id: 032316952X at temperature 0.4
-Processing image_id: 032340104X at temperature 0.4
-Processing image_id: 033400666X at temperature 0.4
-Processing image_id: 034541005X at temperature 0.4
-Processing image_id: 034548357X at temperature 0.4
-Processing image_id: 034550092X at temperature 0.4
-Processing image_id: 034552019X at temperature 0.4
-Processing image_id: 034553025X at temperature 0.4
-Processing image_id: 037389239X at temperature 0.4
-Processing image_id: 037541150X at temperature 0.4
-Processing image_id: 037543030X at temperature 0.4
-Processing image_id: 037571099X at temperature 0.4
-Processing image_id: 037572138X at temperature 0.4
-Processing image_id: 037575525X at temperature 0.4
-Processing image_id: 037575895X at temperature 0.4
-Processing image_id: 037584418X at temperature 0.4
-Processing image_id: 037584631X at temperature 0.4
-Processing image_id: 037586458X at temperature 0.4
-Processing image_id: 037596679X at temperature 0.4
-Processing image_id: 038524939X at temperature 0.4
-Processing image_id: 038533351X at temperature 0.4
-Processing image_id: 038535228X at temperature 0.4
-Processing image_id: 038552207X at temperature 0.4
-Processing image_id: 038553633X at temperature 0.4
-Processing image_id: 038573056X at temperature 0.4
-Processing image_id: 038573896X at temperature 0.4
-Processing image_id: 038573915X at temperature 0.4
-Processing image_id: 038752214X at temperature 0.4
-Processing image_id: 038779963X at temperature 0.4
-Processing image_id: 038788145X at temperature 0.4
-Processing image_id: 038794740X at temperature 0.4
-Processing image_id: 038795404X at temperature 0.4
-Processing image_id: 038798383X at temperature 0.4
-Processing image_id: 039301844X at temperature 0.4
-Processing image_id: 039304002X at temperature 0.4
-Processing image_id: 039331619X at temperature 0.4
-Processing image_id: 039331829X at temperature 0.4
-Processing image_id: 039332754X at temperature 0.4
-Processing image_id: 039334407X at temperature 0.4
-Processing image_id: 039334777X at temperature 0.4
-Processing image_id: 039334990X at temperature 0.4
-Processing image_id: 039391254X at temperature 0.4
-Processing image_id: 039391299X at temperature 0.4
-Processing image_id: 039393750X at temperature 0.4
-Processing image_id: 039441232X at temperature 0.4
-Processing image_id: 039473467X at temperature 0.4
-Processing image_id: 039541685X at temperature 0.4
-Processing image_id: 039553349X at temperature 0.4
-Processing image_id: 039701029X at temperature 0.4
-Processing image_id: 039751459X at temperature 0.4
-Processing image_id: 039809067X at temperature 0.4
-Processing image_id: 039916149X at temperature 0.4
-Processing image_id: 039916667X at temperature 0.4
-Processing image_id: 039923960X at temperature 0.4
-Processing image_id: 040413890X at temperature 0.4
-Processing image_id: 041531920X at temperature 0.4
-Processing image_id: 041561015X at temperature 0.4
-Processing image_id: 041562701X at temperature 0.4
-Processing image_id: 041570670X at temperature 0.4
-Processing image_id: 041582334X at temperature 0.4
-Processing image_id: 041591292X at temperature 0.4
-Processing image_id: 041595150X at temperature 0.4
-Processing image_id: 041599585X at temperature 0.4
-Processing image_id: 042522628X at temperature 0.4
-Processing image_id: 042526999X at temperature 0.4
-Processing image_id: 042527389X at temperature 0.4
-Processing image_id: 043545353X at temperature 0.4
-Processing image_id: 043623680X at temperature 0.4
-Processing image_id: 043978221X at temperature 0.4
-Processing image_id: 043985654X at temperature 0.4
-Processing image_id: 044020562X at temperature 0.4
-Processing image_id: 044101836X at temperature 0.4
-Processing image_id: 044463228X at temperature 0.4
-Processing image_id: 044489201X at temperature 0.4
-Processing image_id: 044653241X at temperature 0.4
-Processing image_id: 044655622X at temperature 0.4
-Processing image_id: 044658178X at temperature 0.4
-Processing image_id: 044658231X at temperature 0.4
-Processing image_id: 044658410X at temperature 0.4
-Processing image_id: 044661002X at temperature 0.4
-Processing image_id: 044842889X at temperature 0.4
-Processing image_id: 044847896X at temperature 0.4
-Processing image_id: 044849552X at temperature 0.4
-Processing image_id: 045141814X at temperature 0.4
-Processing image_id: 045146768X at temperature 0.4
-Processing image_id: 045147418X at temperature 0.4
-Processing image_id: 045147550X at temperature 0.4
-Processing image_id: 046501108X at temperature 0.4
-Processing image_id: 046502081X at temperature 0.4
-Processing image_id: 046509502X at temperature 0.4
-Processing image_id: 047010869X at temperature 0.4
-Processing image_id: 047013593X at temperature 0.4
-Processing image_id: 047029048X at temperature 0.4
-Processing image_id: 047040292X at temperature 0.4
-Processing image_id: 047047534X at temperature 0.4
-Processing image_id: 047052670X at temperature 0.4
-Processing image_id: 047058730X at temperature 0.4
-Processing image_id: 047085121X at temperature 0.4
-Processing image_id: 047088908X at temperature 0.4
-Processing image_id: 047095275X at temperature 0.4
-Processing image_id: 047101124X at temperature 0.4
-Processing image_id: 047102628X at temperature 0.4
-Processing image_id: 047111460X at temperature 0.4
-Processing image_id: 047118358X at temperature 0.4
-Processing image_id: 047119459X at temperature 0.4
-Processing image_id: 047139453X at temperature 0.4
-Processing image_id: 047139842X at temperature 0.4
-Processing image_id: 047175739X at temperature 0.4
-Processing image_id: 047203619X at temperature 0.4
-Processing image_id: 047206858X at temperature 0.4
-Processing image_id: 048622905X at temperature 0.4
-Processing image_id: 048623360X at temperature 0.4
-Processing image_id: 048623813X at temperature 0.4
-Processing image_id: 048628476X at temperature 0.4
-Processing image_id: 048641762X at temperature 0.4
-Processing image_id: 048643737X at temperature 0.4
-Processing image_id: 048644113X at temperature 0.4
-Processing image_id: 048644287X at temperature 0.4
-Processing image_id: 048647285X at temperature 0.4
-Processing image_id: 048663941X at temperature 0.4
-Processing image_id: 048678083X at temperature 0.4
-Processing image_id: 049509580X at temperature 0.4
-Processing image_id: 050005150X at temperature 0.4
-Processing image_id: 050054381X at temperature 0.4
-Processing image_id: 051600686X at temperature 0.4
-Processing image_id: 051628178X at temperature 0.4
-Processing image_id: 051642274X at temperature 0.4
-Processing image_id: 051646034X at temperature 0.4
-Processing image_id: 051700089X at temperature 0.4
-Processing image_id: 051744898X at temperature 0.4
-Processing image_id: 051766531X at temperature 0.4
-Processing image_id: 052101073X at temperature 0.4
-Processing image_id: 052107035X at temperature 0.4
-Processing image_id: 052112137X at temperature 0.4
-Processing image_id: 052114602X at temperature 0.4
-Processing image_id: 052158860X at temperature 0.4
-Processing image_id: 052165081X at temperature 0.4
-Processing image_id: 052168501X at temperature 0.4
-Processing image_id: 052170247X at temperature 0.4
-Processing image_id: 052171009X at temperature 0.4
-Processing image_id: 052178879X at temperature 0.4
-Processing image_id: 052180079X at temperature 0.4
-Processing image_id: 052542962X at temperature 0.4
-Processing image_id: 052888123X at temperature 0.4
-Processing image_id: 053113895X at temperature 0.4
-Processing image_id: 053114464X at temperature 0.4
-Processing image_id: 053304930X at temperature 0.4
-Processing image_id: 053873115X at temperature 0.4
-Processing image_id: 054400230X at temperature 0.4
-Processing image_id: 054427430X at temperature 0.4
-Processing image_id: 054434068X at temperature 0.4
-Processing image_id: 054538429X at temperature 0.4
-Processing image_id: 054565095X at temperature 0.4
-Processing image_id: 054565226X at temperature 0.4
-Processing image_id: 054585279X at temperature 0.4
-Processing image_id: 054587159X at temperature 0.4
-Processing image_id: 054718221X at temperature 0.4
-Processing image_id: 054774496X at temperature 0.4
-Processing image_id: 054774501X at temperature 0.4
-Processing image_id: 055327788X at temperature 0.4
-Processing image_id: 055335275X at temperature 0.4
-Processing image_id: 055337835X at temperature 0.4
-Processing image_id: 055338662X at temperature 0.4
-Processing image_id: 055351234X at temperature 0.4
-Processing image_id: 055352206X at temperature 0.4
-Processing image_id: 055357339X at temperature 0.4
-Processing image_id: 055359365X at temperature 0.4
-Processing image_id: 055705026X at temperature 0.4
-Processing image_id: 055743470X at temperature 0.4
-Processing image_id: 057362819X at temperature 0.4
-Processing image_id: 057809665X at temperature 0.4
-Processing image_id: 058232520X at temperature 0.4
-Processing image_id: 058278364X at temperature 0.4
-Processing image_id: 059039584X at temperature 0.4
-Processing image_id: 059084783X at temperature 0.4
-Processing image_id: 059512738X at temperature 0.4
-Processing image_id: 059535405X at temperature 0.4
-Processing image_id: 059537218X at temperature 0.4
-Processing image_id: 059548056X at temperature 0.4
-Processing image_id: 059548705X at temperature 0.4
-Processing image_id: 059651431X at temperature 0.4
-Processing image_id: 059651817X at temperature 0.4
-Processing image_id: 060059937X at temperature 0.4
-Processing image_id: 060062675X at temperature 0.4
-Processing image_id: 060960063X at temperature 0.4
-Processing image_id: 060960323X at temperature 0.4
-Processing image_id: 060980443X at temperature 0.4
-Processing image_id: 060980748X at temperature 0.4
-Processing image_id: 060980877X at temperature 0.4
-Processing image_id: 061352036X at temperature 0.4
-Processing image_id: 061526462X at temperature 0.4
-Processing image_id: 061540815X at temperature 0.4
-Processing image_id: 061551779X at temperature 0.4
-Processing image_id: 061558988X at temperature 0.4
-Processing image_id: 061569196X at temperature 0.4
-Processing image_id: 061569795X at temperature 0.4
-Processing image_id: 061569991X at temperature 0.4
-Processing image_id: 061576214X at temperature 0.4
-Processing image_id: 061581350X at temperature 0.4
-Processing image_id: 061585625X at temperature 0.4
-Processing image_id: 061592672X at temperature 0.4
-Processing image_id: 061839480X at temperature 0.4
-Processing image_id: 061855713X at temperature 0.4
-Processing image_id: 061860135X at temperature 0.4
-Processing image_id: 061872155X at temperature 0.4
-Processing image_id: 063402664X at temperature 0.4
-Processing image_id: 064650889X at temperature 0.4
-Processing image_id: 066422492X at temperature 0.4
-Processing image_id: 066423156X at temperature 0.4
-Processing image_id: 066426218X at temperature 0.4
-Processing image_id: 067001298X at temperature 0.4
-Processing image_id: 067088278X at temperature 0.4
-Processing image_id: 067150911X at temperature 0.4
-Processing image_id: 067167949X at temperature 0.4
-Processing image_id: 067178045X at temperature 0.4
-Processing image_id: 067401202X at temperature 0.4
-Processing image_id: 067402768X at temperature 0.4
-Processing image_id: 067421644X at temperature 0.4
-Processing image_id: 067931458X at temperature 0.4
-Processing image_id: 067941827X at temperature 0.4
-Processing image_id: 067944484X at temperature 0.4
-Processing image_id: 067945005X at temperature 0.4
-Processing image_id: 067973077X at temperature 0.4
-Processing image_id: 067976867X at temperature 0.4
-Processing image_id: 067978179X at temperature 0.4
-Processing image_id: 067978361X at temperature 0.4
-Processing image_id: 068330173X at temperature 0.4
-Processing image_id: 068483569X at temperature 0.4
-Processing image_id: 068484866X at temperature 0.4
-Processing image_id: 068702319X at temperature 0.4
-Processing image_id: 068703485X at temperature 0.4
-Processing image_id: 068746210X at temperature 0.4
-Processing image_id: 068815381X at temperature 0.4
-Processing image_id: 068816904X at temperature 0.4
-Processing image_id: 069102538X at temperature 0.4
-Processing image_id: 069114625X at temperature 0.4
-Processing image_id: 069115807X at temperature 0.4
-Processing image_id: 069116407X at temperature 0.4
-Processing image_id: 069116522X at temperature 0.4
-Processing image_id: 069231279X at temperature 0.4
-Processing image_id: 069237745X at temperature 0.4
-Processing image_id: 069237843X at temperature 0.4
-Processing image_id: 069244825X at temperature 0.4
-Processing image_id: 069251368X at temperature 0.4
-Processing image_id: 069401429X at temperature 0.4
-Processing image_id: 069601825X at temperature 0.4
-Processing image_id: 070202872X at temperature 0.4
-Processing image_id: 070204430X at temperature 0.4
-Processing image_id: 070223656X at temperature 0.4
-Processing image_id: 071021023X at temperature 0.4
-Processing image_id: 071030112X at temperature 0.4
-Processing image_id: 071122885X at temperature 0.4
-Processing image_id: 071123678X at temperature 0.4
-Processing image_id: 071487048X at temperature 0.4
-Processing image_id: 071602392X at temperature 0.4
-Processing image_id: 071670112X at temperature 0.4
-Processing image_id: 071980230X at temperature 0.4
-Processing image_id: 071980390X at temperature 0.4
-Processing image_id: 072068711X at temperature 0.4
-Processing image_id: 072325785X at temperature 0.4
-Processing image_id: 073558852X at temperature 0.4
-Processing image_id: 073558933X at temperature 0.4
-Processing image_id: 073561282X at temperature 0.4
-Processing image_id: 073562187X at temperature 0.4
-Processing image_id: 073562321X at temperature 0.4
-Processing image_id: 073565820X at temperature 0.4
-Processing image_id: 073566921X at temperature 0.4
-Processing image_id: 073566935X at temperature 0.4
-Processing image_id: 073571049X at temperature 0.4
-Processing image_id: 073606821X at temperature 0.4
-Processing image_id: 073607418X at temperature 0.4
-Processing image_id: 073608178X at temperature 0.4
-Processing image_id: 073608651X at temperature 0.4
-Processing image_id: 073770327X at temperature 0.4
-Processing image_id: 073770554X at temperature 0.4
-Processing image_id: 073771719X at temperature 0.4
-Processing image_id: 073772224X at temperature 0.4
-Processing image_id: 073774278X at temperature 0.4
-Processing image_id: 073777228X at temperature 0.4
-Processing image_id: 073820112X at temperature 0.4
-Processing image_id: 073821082X at temperature 0.4
-Processing image_id: 073821423X at temperature 0.4
-Processing image_id: 073821793X at temperature 0.4
-Processing image_id: 073851201X at temperature 0.4
-Processing image_id: 073859623X at temperature 0.4
-Processing image_id: 073861050X at temperature 0.4
-Processing image_id: 073873408X at temperature 0.4
-Processing image_id: 073874395X at temperature 0.4
-Processing image_id: 073971581X at temperature 0.4
-Processing image_id: 073974397X at temperature 0.4
-Processing image_id: 073975811X at temperature 0.4
-Processing image_id: 073978739X at temperature 0.4
-Processing image_id: 073979292X at temperature 0.4
-Processing image_id: 074256021X at temperature 0.4
-Processing image_id: 074320297X at temperature 0.4
-Processing image_id: 074321384X at temperature 0.4
-Processing image_id: 074322292X at temperature 0.4
-Processing image_id: 074324785X at temperature 0.4
-Processing image_id: 074326116X at temperature 0.4
-Processing image_id: 074326357X at temperature 0.4
-Processing image_id: 074326438X at temperature 0.4
-Processing image_id: 074326648X at temperature 0.4
-Processing image_id: 074341294X at temperature 0.4
-Processing image_id: 074345765X at temperature 0.4
-Processing image_id: 074348486X at temperature 0.4
-Processing image_id: 074401638X at temperature 0.4
-Processing image_id: 074562815X at temperature 0.4
-Processing image_id: 074564936X at temperature 0.4
-Processing image_id: 074564970X at temperature 0.4
-Processing image_id: 074873189X at temperature 0.4
-Processing image_id: 074965127X at temperature 0.4
-Processing image_id: 075021838X at temperature 0.4
-Processing image_id: 075245403X at temperature 0.4
-Processing image_id: 075481954X at temperature 0.4
-Processing image_id: 075481968X at temperature 0.4
-Processing image_id: 075482764X at temperature 0.4
-Processing image_id: 075700198X at temperature 0.4
-Processing image_id: 075730723X at temperature 0.4
-Processing image_id: 075757694X at temperature 0.4
-Processing image_id: 075820101X at temperature 0.4
-Processing image_id: 075828389X at temperature 0.4
-Processing image_id: 076032574X at temperature 0.4
-Processing image_id: 076032753X at temperature 0.4
-Processing image_id: 076033174X at temperature 0.4
-Processing image_id: 076075618X at temperature 0.4
-Processing image_id: 076115213X at temperature 0.4
-Processing image_id: 076115230X at temperature 0.4
-Processing image_id: 076117611X at temperature 0.4
-Processing image_id: 076150821X at temperature 0.4
-Processing image_id: 076181552X at temperature 0.4
-Processing image_id: 076186282X at temperature 0.4
-Processing image_id: 076186542X at temperature 0.4
-Processing image_id: 076192373X at temperature 0.4
-Processing image_id: 076241815X at temperature 0.4
-Processing image_id: 076244262X at temperature 0.4
-Processing image_id: 076244682X at temperature 0.4
-Processing image_id: 076245220X at temperature 0.4
-Processing image_id: 076245461X at temperature 0.4
-Processing image_id: 076277911X at temperature 0.4
-Processing image_id: 076363784X at temperature 0.4
-Processing image_id: 076364112X at temperature 0.4
-Processing image_id: 076364367X at temperature 0.4
-Processing image_id: 076366992X at temperature 0.4
-Processing image_id: 076371223X at temperature 0.4
-Processing image_id: 076373392X at temperature 0.4
-Processing image_id: 076377412X at temperature 0.4
-Processing image_id: 076379788X at temperature 0.4
-Processing image_id: 076421196X at temperature 0.4
-Processing image_id: 076421571X at temperature 0.4
-Processing image_id: 076422042X at temperature 0.4
-Processing image_id: 076422770X at temperature 0.4
-Processing image_id: 076428150X at temperature 0.4
-Processing image_id: 076433672X at temperature 0.4
-Processing image_id: 076531360X at temperature 0.4
-Processing image_id: 076535618X at temperature 0.4
-Processing image_id: 076536509X at temperature 0.4
-Processing image_id: 076576217X at temperature 0.4
-Processing image_id: 076602203X at temperature 0.4
-Processing image_id: 076602802X at temperature 0.4
-Processing image_id: 076790561X at temperature 0.4
-Processing image_id: 076840312X at temperature 0.4
-Processing image_id: 076843212X at temperature 0.4
-Processing image_id: 077101354X at temperature 0.4
-Processing image_id: 077481778X at temperature 0.4
-Processing image_id: 077831605X at temperature 0.4
-Processing image_id: 077871375X at temperature 0.4
-Processing image_id: 077872073X at temperature 0.4
-Processing image_id: 077874213X at temperature 0.4
-Processing image_id: 078080824X at temperature 0.4
-Processing image_id: 078172628X at temperature 0.4
-Processing image_id: 078174198X at temperature 0.4
-Processing image_id: 078174380X at temperature 0.4
-Processing image_id: 078177795X at temperature 0.4
-Processing image_id: 078179045X at temperature 0.4
-Processing image_id: 078180647X at temperature 0.4
-Processing image_id: 078180714X at temperature 0.4
-Processing image_id: 078212416X at temperature 0.4
-Processing image_id: 078512179X at temperature 0.4
-Processing image_id: 078521383X at temperature 0.4
-Processing image_id: 078523215X at temperature 0.4
-Processing image_id: 078528897X at temperature 0.4
-Processing image_id: 078646609X at temperature 0.4
-Processing image_id: 078647386X at temperature 0.4
-Processing image_id: 078680081X at temperature 0.4
-Processing image_id: 078681988X at temperature 0.4
-Processing image_id: 078688620X at temperature 0.4
-Processing image_id: 078692649X at temperature 0.4
-Processing image_id: 078797952X at temperature 0.4
-Processing image_id: 078798826X at temperature 0.4
-Processing image_id: 078799443X at temperature 0.4
-Processing image_id: 078903039X at temperature 0.4
-Processing image_id: 078940169X at temperature 0.4
-Processing image_id: 078942455X at temperature 0.4
-Processing image_id: 078949244X at temperature 0.4
-Processing image_id: 078949857X at temperature 0.4
-Processing image_id: 078973608X at temperature 0.4
-Processing image_id: 078974984X at temperature 0.4
-Processing image_id: 078975357X at temperature 0.4
-Processing image_id: 079105926X at temperature 0.4
-Processing image_id: 079108664X at temperature 0.4
-Processing image_id: 079108759X at temperature 0.4
-Processing image_id: 079108857X at temperature 0.4
-Processing image_id: 079109006X at temperature 0.4
-Processing image_id: 079227783X at temperature 0.4
-Processing image_id: 079450695X at temperature 0.4
-Processing image_id: 080072058X at temperature 0.4
-Processing image_id: 080072125X at temperature 0.4
-Processing image_id: 080073338X at temperature 0.4
-Processing image_id: 080102501X at temperature 0.4
-Processing image_id: 080102756X at temperature 0.4
-Processing image_id: 080107195X at temperature 0.4
-Processing image_id: 080107262X at temperature 0.4
-Processing image_id: 080142772X at temperature 0.4
-Processing image_id: 080187128X at temperature 0.4
-Processing image_id: 080199313X at temperature 0.4
-Processing image_id: 080212058X at temperature 0.4
-Processing image_id: 080212366X at temperature 0.4
-Processing image_id: 080213937X at temperature 0.4
-Processing image_id: 080214120X at temperature 0.4
-Processing image_id: 080214179X at temperature 0.4
-Processing image_id: 080214537X at temperature 0.4
-Processing image_id: 080241270X at temperature 0.4
-Processing image_id: 080244864X at temperature 0.4
-Processing image_id: 080284345X at temperature 0.4
-Processing image_id: 080323516X at temperature 0.4
-Processing image_id: 080327811X at temperature 0.4
-Processing image_id: 080362249X at temperature 0.4
-Processing image_id: 080362543X at temperature 0.4
-Processing image_id: 080412504X at temperature 0.4
-Processing image_id: 080412616X at temperature 0.4
-Processing image_id: 080414043X at temperature 0.4
-Processing image_id: 080417072X at temperature 0.4
-Processing image_id: 080479295X at temperature 0.4
-Processing image_id: 080502512X at temperature 0.4
-Processing image_id: 080507161X at temperature 0.4
-Processing image_id: 080508830X at temperature 0.4
-Processing image_id: 080508987X at temperature 0.4
-Processing image_id: 080509542X at temperature 0.4
-Processing image_id: 080509590X at temperature 0.4
-Processing image_id: 080521030X at temperature 0.4
-Processing image_id: 080521206X at temperature 0.4
-Processing image_id: 080612606X at temperature 0.4
-Processing image_id: 080652135X at temperature 0.4
-Processing image_id: 080652281X at temperature 0.4
-Processing image_id: 080662700X at temperature 0.4
-Processing image_id: 080708381X at temperature 0.4
-Processing image_id: 080782710X at temperature 0.4"""
+import progress_events
 
-count = len(val.split("Processing image_id: ")) - 1
-print(count)
\ No newline at end of file
+
+class TemperatureProgress:
+    """Running counters for one temperature. Memory is bounded by the throughput window."""
+
+    __slots__ = ("temperature", "num_images", "completed", "graded", "correct", "dropped", "errors", "done", "_window")
+
+    def __init__(self, temperature: float, window: int):
+        self.temperature = temperature
+        self.num_images: int | None = None
+        self.completed = 0
+        self.graded = 0
+        self.correct = 0
+        self.dropped = 0
+        self.errors = 0
+        self.done = False
+        # Timestamps of the most recent image_done events, for rolling throughput.
+        self._window: deque[float] = deque(maxlen=window)
+
+    def add_image(self, ts: float, graded: int, correct: int):
+        self.completed += 1
+        self.graded += graded
+        self.correct += correct
+        self._window.append(ts)
+
+    def throughput(self) -> float:
+        """Images per second over the rolling window."""
+        if len(self._window) < 2 or self._window[-1] <= self._window[0]:
+            return 0.0
+        return (len(self._window) - 1) / (self._window[-1] - self._window[0])
+
+    def eta_seconds(self) -> float | None:
+        rate = self.throughput()
+        if self.done or self.num_images is None or rate == 0.0:
+            return None
+        return max(self.num_images - self.completed, 0) / rate
+
+
+def follow(f: IO[str], poll_interval: float = 1.0) -> Iterator[str]:
+    """Yields complete lines as they are appended to `f`, like `tail -f`."""
+    # readline() returns whatever the runner has written so far, so a line it
+    # is still writing is held back until its newline arrives.
+    pending = ""
+    while True:
+        chunk = f.readline()
+        if not chunk:
+            time.sleep(poll_interval)
+            continue
+        pending += chunk
+        if pending.endswith("\n"):
+            yield pending
+            pending = ""
+
+
+def analyze(lines: Iterable[str], window: int = 50, report_every: int = 0, limits: Dict[str, int] | None = None) -> Dict[float, TemperatureProgress]:
+    """
+    Folds a stream of progress events into per-temperature counters.
+
+    A temperature_start event resets that temperature's counters, so with
+    an event log shared by several runs only the latest run of each
+    temperature is reported.
+
+    Args:
+        lines (Iterable[str]): JSON-lines progress events, e.g. an open file or follow(f).
+        window (int): Number of recent images used for the rolling throughput.
+        report_every (int): Print a report every this many images; 0 disables intermediate reports.
+        limits (Dict[str, int] | None): Filled in place with the latest adaptive concurrency limit per request kind.
+
+    Returns:
+        Dict[float, TemperatureProgress]: Counters keyed by temperature.
+    """
+    progress: Dict[float, TemperatureProgress] = {}
+    images_seen = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # A line can be cut short while the runner is still writing it.
+            continue
+        if record.get("event") == progress_events.CONCURRENCY_LIMIT:
+            if limits is not None:
+                limits[record["kind"]] = record["to"]
+            continue
+        temp = record.get("temperature")
+        if temp is None:
+            continue
+        event = record.get("event")
+        if event == progress_events.TEMPERATURE_START:
+            # The event log is appended to across runs; a new start begins the counters afresh.
+            progress[temp] = TemperatureProgress(temp, window)
+            progress[temp].num_images = record.get("num_images")
+            continue
+        state = progress.setdefault(temp, TemperatureProgress(temp, window))
+        if event == progress_events.IMAGE_DONE:
+            state.add_image(record["ts"], record.get("graded", 0), record.get("correct", 0))
+            images_seen += 1
+            if report_every and images_seen % report_every == 0:
+                print(format_report(progress, limits))
+        elif event == progress_events.ANSWERS_DROPPED:
+            state.dropped += record.get("dropped", 0)
+        elif event == progress_events.ERROR:
+            state.errors += 1
+        elif event == progress_events.TEMPERATURE_DONE:
+            state.done = True
+    return progress
+
+
+def format_report(progress: Dict[float, TemperatureProgress], limits: Dict[str, int] | None = None) -> str:
+    lines = ["Temperature | Completed | Images/s | ETA | Dropped answers | Errors | Accuracy so far"]
+    for temp in sorted(progress):
+        state = progress[temp]
+        total = f"/{state.num_images}" if state.num_images is not None else ""
+        eta = state.eta_seconds()
+        eta_str = "done" if state.done else ("-" if eta is None else f"{eta / 60:.1f} min")
+        accuracy = f"{state.correct / state.graded:.3f}" if state.graded else "-"
+        lines.append(
+            f"{temp} | {state.completed}{total} | {state.throughput():.2f} | {eta_str} | "
+            f"{state.dropped} | {state.errors} | {accuracy}"
+        )
+    if limits:
+        lines.append("Concurrency limits: " + ", ".join(f"{kind} {limit}" for kind, limit in sorted(limits.items())))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report progress, throughput and ETA from a run's progress events.")
+    parser.add_argument("path", nargs="?", default=progress_events.PROGRESS_EVENTS_FILE, help="Events file, or - for stdin.")
+    parser.add_argument("--follow", action="store_true", help="Keep reading as the runner appends events.")
+    parser.add_argument("--window", type=int, default=50, help="Images in the rolling throughput window.")
+    parser.add_argument("--report-every", type=int, default=0, help="Print a report every N images.")
+    args = parser.parse_args()
+
+    f = sys.stdin if args.path == "-" else open(args.path, "r")
+    lines = follow(f) if args.follow else f
+    report_every = args.report_every or (args.window if args.follow else 0)
+    limits: Dict[str, int] = {}
+    try:
+        progress = analyze(lines, window=args.window, report_every=report_every, limits=limits)
+    except KeyboardInterrupt:
+        return
+    print(format_report(progress, limits))
+
+
+if __name__ == "__main__":
+    main()
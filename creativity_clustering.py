@@ -0,0 +1,187 @@
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# The same five clusters OpenAIVQAModel.cluster_questions_by_creativity asks gpt-4o for.
+CREATIVITY_CLUSTERS = [
+    "Binary_Factual_Questions",
+    "Identification_Questions",
+    "Classification_Questions",
+    "Analytical_Questions",
+    "Creative_Subjective_Questions",
+]
+
+# Labeled seed questions per cluster. The centroids are built from these, so
+# adding a few phrasings here is the way to steer the local engine.
+SEED_QUESTIONS: Dict[str, List[str]] = {
+    "Binary_Factual_Questions": [
+        "Is this a sci-fi book?",
+        "Is this a religious book?",
+        "Is this a kids book?",
+        "Is this book related to Travel?",
+        "Is this book related to Romance?",
+        "Is this book related to Arts & Photography?",
+        "Does this book contain pictures?",
+        "Is this christianity book?",
+    ],
+    "Identification_Questions": [
+        "Who wrote this book?",
+        "Who is the author of this book?",
+        "What is the title of this book?",
+        "What is the edition of this book?",
+        "Who is the publisher of this book?",
+        "What year was this book published?",
+    ],
+    "Classification_Questions": [
+        "What is the genre of this book?",
+        "What type of book is this?",
+        "What kind of book is this?",
+        "What category does this book belong to?",
+        "Which genre best describes this book?",
+    ],
+    "Analytical_Questions": [
+        "Why is this book important?",
+        "How does the cover relate to the content of this book?",
+        "What is the main theme of this book?",
+        "What audience is this book written for?",
+        "How is this book different from others in its genre?",
+    ],
+    "Creative_Subjective_Questions": [
+        "What would you title this book?",
+        "How would you describe the mood of this cover?",
+        "Describe the story this cover suggests.",
+        "What do you think happens in this book?",
+        "Would you recommend this book and why?",
+    ],
+}
+
+NUM_FEATURES = 2 ** 18
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+@lru_cache(maxsize=None)
+def _hash_feature(feature: str) -> int:
+    # crc32 is stable across processes, unlike the builtin str hash.
+    return zlib.crc32(feature.encode("utf-8")) % NUM_FEATURES
+
+
+def _question_features(question: str) -> List[int]:
+    """Hashed word unigrams, bigrams and a leading-word marker for one question."""
+    tokens = _TOKEN_RE.findall(question.lower())
+    if not tokens:
+        return []
+    features = [f"^{tokens[0]}"]
+    features.extend(tokens)
+    features.extend(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return [_hash_feature(f) for f in features]
+
+
+def _count_features(questions: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Builds the sparse term-count matrix in coordinate form: (row_ids, feature_ids, counts)."""
+    per_question = [_question_features(q) for q in questions]
+    lengths = np.fromiter((len(f) for f in per_question), dtype=np.int64, count=len(per_question))
+    rows = np.repeat(np.arange(len(questions), dtype=np.int64), lengths)
+    feats = np.fromiter((h for f in per_question for h in f), dtype=np.int64, count=int(lengths.sum()))
+
+    # Collapse repeated (row, feature) pairs into a single entry holding the count.
+    pair_ids, counts = np.unique(rows * NUM_FEATURES + feats, return_counts=True)
+    return pair_ids // NUM_FEATURES, pair_ids % NUM_FEATURES, counts
+
+
+def _tfidf_weights(rows: np.ndarray, feats: np.ndarray, counts: np.ndarray, idf: np.ndarray, num_rows: int) -> np.ndarray:
+    """L2-normalised TF-IDF weight for every nonzero entry of a count matrix."""
+    weights = counts * idf[feats]
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=num_rows))
+    return weights / np.where(norms[rows] > 0, norms[rows], 1.0)
+
+
+def _centroids(rows: np.ndarray, feats: np.ndarray, weights: np.ndarray, labels: np.ndarray, num_clusters: int) -> np.ndarray:
+    flat = np.bincount(labels[rows] * NUM_FEATURES + feats, weights=weights, minlength=num_clusters * NUM_FEATURES)
+    centroids = flat.reshape(num_clusters, NUM_FEATURES)
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    return centroids / np.where(norms > 0, norms, 1.0)
+
+
+def _scores(rows: np.ndarray, feats: np.ndarray, weights: np.ndarray, centroids: np.ndarray, num_rows: int) -> np.ndarray:
+    """Cosine similarity of every sparse row against every centroid."""
+    contributions = weights * centroids[:, feats]
+    return np.stack([np.bincount(rows, weights=c, minlength=num_rows) for c in contributions], axis=1)
+
+
+def assign_clusters(questions: List[str], refine_iterations: int = 1) -> List[str]:
+    """
+    Assigns each question to one of the five creativity clusters locally.
+
+    Questions are embedded as hashed TF-IDF vectors and matched to the nearest
+    seed centroid. Each refinement iteration is one seeded k-means step: the
+    centroids are recomputed from the seeds plus the questions assigned to
+    them, then every question is reassigned.
+
+    Args:
+        questions (List[str]): The questions to cluster.
+        refine_iterations (int): Number of seeded k-means steps after the
+            initial nearest-centroid assignment.
+
+    Returns:
+        List[str]: The cluster name for each question, in input order.
+    """
+    if not questions:
+        return []
+
+    seed_questions = []
+    seed_labels = []
+    for label, cluster_name in enumerate(CREATIVITY_CLUSTERS):
+        seed_questions.extend(SEED_QUESTIONS[cluster_name])
+        seed_labels.extend([label] * len(SEED_QUESTIONS[cluster_name]))
+    seed_labels = np.asarray(seed_labels, dtype=np.int64)
+    num_clusters = len(CREATIVITY_CLUSTERS)
+
+    s_rows, s_feats, s_counts = _count_features(seed_questions)
+    q_rows, q_feats, q_counts = _count_features(questions)
+
+    # Fit the IDF on seeds and questions together so both live in one space.
+    num_docs = len(seed_questions) + len(questions)
+    doc_freq = np.bincount(np.concatenate([s_feats, q_feats]), minlength=NUM_FEATURES)
+    idf = np.log((1 + num_docs) / (1 + doc_freq)) + 1.0
+    s_weights = _tfidf_weights(s_rows, s_feats, s_counts, idf, len(seed_questions))
+    q_weights = _tfidf_weights(q_rows, q_feats, q_counts, idf, len(questions))
+
+    centroids = _centroids(s_rows, s_feats, s_weights, seed_labels, num_clusters)
+    labels = _scores(q_rows, q_feats, q_weights, centroids, len(questions)).argmax(axis=1)
+
+    for _ in range(refine_iterations):
+        # Seeds stay in every update so a cluster can never drift off its label.
+        rows = np.concatenate([s_rows, q_rows + len(seed_questions)])
+        feats = np.concatenate([s_feats, q_feats])
+        weights = np.concatenate([s_weights, q_weights])
+        all_labels = np.concatenate([seed_labels, labels])
+        centroids = _centroids(rows, feats, weights, all_labels, num_clusters)
+        labels = _scores(q_rows, q_feats, q_weights, centroids, len(questions)).argmax(axis=1)
+
+    return [CREATIVITY_CLUSTERS[label] for label in labels]
+
+
+def cluster_questions_by_creativity(questions_data: dict, refine_iterations: int = 1) -> Dict[str, List[str]]:
+    """
+    Local, API-free counterpart of OpenAIVQAModel.cluster_questions_by_creativity.
+
+    Args:
+        questions_data (dict): A dictionary where keys are temperature values and values are dictionaries of questions with their accuracy data.
+        refine_iterations (int): Number of seeded k-means steps, see assign_clusters.
+
+    Returns:
+        dict: A dictionary with the five cluster names as keys and lists of questions as values.
+    """
+    all_questions = _distinct_questions(q for questions in questions_data.values() for q in questions)
+    clusters: Dict[str, List[str]] = {name: [] for name in CREATIVITY_CLUSTERS}
+    for question, cluster_name in zip(all_questions, assign_clusters(all_questions, refine_iterations)):
+        clusters[cluster_name].append(question)
+    return clusters
+
+
+def _distinct_questions(questions: Iterable[str]) -> List[str]:
+    # dict.fromkeys keeps first-seen order, which keeps the output stable.
+    return list(dict.fromkeys(questions))
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Anchored next to this module, so every script shares one cache whatever the working directory.
+ANALYSIS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analysis_cache")
+
+
+def question_hashes(temperature_results: Dict[str, Dict[str, dict]]) -> Dict[str, str]:
+    """
+    Content hash of every question's results across temperatures.
+
+    Args:
+        temperature_results: Results in the TEMPERATURE_RESULTS_FILE JSON format
+            (temperature -> question -> counts and accuracy).
+
+    Returns:
+        question -> hex digest that changes whenever any of its cells changes.
+    """
+    per_question: Dict[str, List[tuple]] = {}
+    for temp, q_data in temperature_results.items():
+        for question, metrics in q_data.items():
+            per_question.setdefault(question, []).append((
+                float(temp),
+                metrics.get("total_runs"),
+                metrics.get("true_positives"),
+                metrics.get("accuracy"),
+            ))
+    return {
+        question: hashlib.sha256(json.dumps(sorted(cells)).encode("utf-8")).hexdigest()
+        for question, cells in per_question.items()
+    }
+
+
+def source_fingerprint(*paths: str) -> str:
+    """Hash of the given source files, so a cache is dropped when the analysis code changes."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Derived statistics cached per key (usually a question) alongside the hash they were computed from.
+
+    Each consumer (clustering, plots, final results) keeps its own section
+    file under ANALYSIS_CACHE_DIR. A section remembers the `context` it was
+    built in, e.g. a source_fingerprint of the analysis code; a different
+    context discards every entry, so a stale cache never survives a change
+    to how values are computed.
+    """
+
+    def __init__(self, section: str, context: str = "", directory: str = ANALYSIS_CACHE_DIR):
+        self.path = os.path.join(directory, f"{section}.json")
+        self.context = context
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    stored = json.load(f)
+            except json.JSONDecodeError:
+                stored = {}
+            if stored.get("context") == context:
+                self.entries = stored.get("entries", {})
+
+    def diff(self, hashes: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """Returns (keys that are new or whose hash changed, cached keys no longer present)."""
+        changed = [key for key, digest in hashes.items() if self.entries.get(key, {}).get("hash") != digest]
+        removed = [key for key in self.entries if key not in hashes]
+        return changed, removed
+
+    def value(self, key: str) -> Any:
+        entry = self.entries.get(key)
+        return None if entry is None else entry["value"]
+
+    def update(self, key: str, digest: str, value: Any):
+        self.entries[key] = {"hash": digest, "value": value}
+
+    def remove(self, keys: Iterable[str]):
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"context": self.context, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
@@ -1,16 +1,47 @@
 import os
-from datasets import load_dataset
 from typing import Union
+from load_datasets.local_store import LocalVQAStore
+from load_datasets.stratified_sampler import TEMPLATE_INDEX_FILE, StratifiedSample, load_template_index, stratified_indices
 
 
 class OKVQA:
-    def __init__(self, dataset_name: str | None = "howard-hou/OCR-VQA", num_images: Union[int, str] | None = 1000):
-        if num_images == "all":
-            split = "validation"
+    def __init__(self, dataset_name: str | None = "howard-hou/OCR-VQA", num_images: Union[int, str] | None = 1000, local_store_path: str | None = None, runs_per_template: int | None = None, trim_questions: bool = False, seed: int = 0):
+        """
+        Args:
+            dataset_name: Hugging Face dataset to load when there is no local store.
+            num_images: Number of leading validation images, or "all". Ignored when sampling.
+            local_store_path: Directory of a store built with load_datasets.local_store.
+            runs_per_template: If set, draw a stratified sample of the whole split in which
+                every question template is asked in at least this many images (see stratified_sampler).
+            trim_questions: With runs_per_template, drop questions whose template already has enough runs.
+                Off by default: trimming changes the questions asked together in each prompt, and so
+                the measured condition; results with and without it should not be pooled.
+            seed: Tie-breaking seed of the stratified sample.
+        """
+        if runs_per_template is not None:
+            num_images = "all"
+
+        # A store built with load_datasets.local_store opens without touching
+        # Hugging Face at all; fall back to load_dataset when there is none.
+        if local_store_path and LocalVQAStore.exists(local_store_path):
+            self.dataset = LocalVQAStore(local_store_path, limit=None if num_images == "all" else num_images)
+            print(f"Opened {len(self.dataset)} images from local store {local_store_path}")
+            index_source, index_path = os.path.abspath(local_store_path), os.path.join(local_store_path, TEMPLATE_INDEX_FILE)
         else:
-            split = f"validation[:{num_images}]"
-        self.dataset = load_dataset(dataset_name, split=split)
-        print(f"Loaded {len(self.dataset)} images")
+            from datasets import load_dataset
+            if num_images == "all":
+                split = "validation"
+            else:
+                split = f"validation[:{num_images}]"
+            self.dataset = load_dataset(dataset_name, split=split)
+            print(f"Loaded {len(self.dataset)} images")
+            index_source, index_path = f"{dataset_name}:{split}", TEMPLATE_INDEX_FILE
+
+        if runs_per_template is not None:
+            index = load_template_index(self.dataset, index_source, index_path)
+            indices = stratified_indices(index, runs_per_template, seed)
+            self.dataset = StratifiedSample(self.dataset, indices, runs_per_template, trim_questions)
+            print(f"Sampled {len(self.dataset)} images covering {len(index)} question templates with at least {runs_per_template} runs each where available")
 
     def get_dataset(self):
-        return self.dataset
\ No newline at end of file
+        return self.dataset
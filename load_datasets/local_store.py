@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from clients.openai_client import OpenAIVQAModel
+
+IMAGES_FILE = "images.bin"
+OFFSETS_FILE = "offsets.npy"
+RECORDS_FILE = "records.json"
+
+
+def build_local_store(dataset, path: str):
+    """
+    Converts a loaded OCR-VQA split into a local store, once.
+
+    Encoded image bytes are concatenated into one flat file with an offsets
+    array next to it, so readers can memory-map both. Questions and answers
+    are kept in a small JSON file in the same order.
+
+    Args:
+        dataset: Any indexable of entries with 'image_id', 'image', 'questions' and 'answers'.
+        path (str): Directory to write the store into.
+    """
+    os.makedirs(path, exist_ok=True)
+    offsets = [0]
+    records = []
+    with open(os.path.join(path, IMAGES_FILE), "wb") as f:
+        for entry_idx in range(len(dataset)):
+            entry = dataset[entry_idx]
+            # Stored exactly as the model would send them, so serving from the store changes nothing downstream.
+            image_bytes = OpenAIVQAModel.image_bytes(entry["image"])
+            f.write(image_bytes)
+            offsets.append(offsets[-1] + len(image_bytes))
+            records.append({
+                "image_id": entry["image_id"],
+                "questions": list(entry["questions"]),
+                "answers": list(entry["answers"]),
+            })
+    np.save(os.path.join(path, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+    with open(os.path.join(path, RECORDS_FILE), "w") as f:
+        json.dump(records, f)
+    print(f"Wrote {len(records)} images to {path}")
+
+
+class LocalVQAStore:
+    """
+    Read-only view over a store written by build_local_store.
+
+    Images are served straight from a read-only memory map, so opening is
+    cheap, every lookup is O(1), and worker processes reading the same store
+    share the page cache instead of holding their own copies. Entries have
+    the same keys as the Hugging Face dataset, with 'image' as JPEG bytes.
+    """
+
+    def __init__(self, path: str, limit: int | None = None):
+        self.path = path
+        self._images = np.memmap(os.path.join(path, IMAGES_FILE), dtype=np.uint8, mode="r")
+        self._offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(path, RECORDS_FILE), "r") as f:
+            self._records = json.load(f)
+        self._length = len(self._records) if limit is None else min(limit, len(self._records))
+        self._index_by_image_id = {record["image_id"]: i for i, record in enumerate(self._records[:self._length])}
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, RECORDS_FILE))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, idx: int) -> dict:
+        if not 0 <= idx < self._length:
+            raise IndexError(idx)
+        start, end = int(self._offsets[idx]), int(self._offsets[idx + 1])
+        record = self._records[idx]
+        return {
+            "image_id": record["image_id"],
+            "image": self._images[start:end].tobytes(),
+            "questions": record["questions"],
+            "answers": record["answers"],
+        }
+
+    def get_by_image_id(self, image_id: str) -> dict:
+        return self[self._index_by_image_id[image_id]]
+
+    def question_lists(self) -> list[list[str]]:
+        """Every entry's questions, in order, without touching the images."""
+        return [record["questions"] for record in self._records[:self._length]]
+
+    def image_ids(self) -> list[str]:
+        return [record["image_id"] for record in self._records[:self._length]]
+
+
+def main():
+    from load_datasets.load_ok_vqa_dataset import OKVQA
+
+    parser = argparse.ArgumentParser(description="Convert the OCR-VQA validation split into a local memory-mapped store.")
+    parser.add_argument("--dataset-name", default="howard-hou/OCR-VQA")
+    parser.add_argument("--num-images", default="all", help="Number of images, or 'all'.")
+    parser.add_argument("--out", required=True, help="Directory to write the store into.")
+    args = parser.parse_args()
+
+    num_images = args.num_images if args.num_images == "all" else int(args.num_images)
+    dataset = OKVQA(dataset_name=args.dataset_name, num_images=num_images).get_dataset()
+    build_local_store(dataset, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import json
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+TEMPLATE_INDEX_FILE = "question_template_index.json"
+
+
+def question_lists(dataset) -> List[List[str]]:
+    """Every entry's questions, without decoding any image."""
+    if hasattr(dataset, "question_lists"):
+        return dataset.question_lists()
+    if hasattr(dataset, "column_names") and "questions" in dataset.column_names:
+        # A Hugging Face dataset reads a single column straight from Arrow.
+        return [list(questions) for questions in dataset["questions"]]
+    return [list(dataset[i]["questions"]) for i in range(len(dataset))]
+
+
+def image_ids(dataset) -> List[str]:
+    """Every entry's image id, without decoding any image."""
+    if hasattr(dataset, "image_ids"):
+        return dataset.image_ids()
+    if hasattr(dataset, "column_names") and "image_id" in dataset.column_names:
+        return list(dataset["image_id"])
+    return [dataset[i]["image_id"] for i in range(len(dataset))]
+
+
+def build_template_index(dataset) -> Dict[str, List[int]]:
+    """Question template (the question text, as in temperature_results) -> indices of the entries asking it."""
+    index: Dict[str, List[int]] = {}
+    for entry_idx, questions in enumerate(question_lists(dataset)):
+        for question in dict.fromkeys(questions):
+            index.setdefault(question, []).append(entry_idx)
+    return index
+
+
+def load_template_index(dataset, source: str, cache_path: str) -> Dict[str, List[int]]:
+    """
+    Returns the template index of `dataset`, building and caching it on first use.
+
+    The cache is reused only when it was built from the same source with the
+    same number of entries.
+
+    Args:
+        dataset: The full split to index.
+        source (str): Identifies the split, e.g. a dataset name or store path.
+        cache_path (str): JSON file the index is cached in.
+    """
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r") as f:
+                cached = json.load(f)
+            if cached.get("source") == source and cached.get("num_entries") == len(dataset):
+                return cached["templates"]
+        except json.JSONDecodeError:
+            pass
+    index = build_template_index(dataset)
+    with open(cache_path, "w") as f:
+        json.dump({"source": source, "num_entries": len(dataset), "templates": index}, f)
+    print(f"Indexed {len(index)} question templates over {len(dataset)} images into {cache_path}")
+    return index
+
+
+def stratified_indices(index: Dict[str, List[int]], runs_per_template: int, seed: int = 0) -> List[int]:
+    """
+    Picks entries so that every template is asked in at least runs_per_template of them.
+
+    Templates are filled rarest first, each from the entries that also carry
+    the most other templates still short of the target (random among ties),
+    so common templates ride along on the images chosen for rare ones.
+    Templates asked in fewer entries than the target get all of them.
+
+    Returns:
+        Sorted entry indices.
+    """
+    rng = np.random.default_rng(seed)
+    templates_of: Dict[int, List[str]] = {}
+    for template, entries in index.items():
+        for entry_idx in entries:
+            templates_of.setdefault(entry_idx, []).append(template)
+
+    deficit = {template: min(runs_per_template, len(entries)) for template, entries in index.items()}
+    chosen: set[int] = set()
+    for template in sorted(index, key=lambda t: (len(index[t]), t)):
+        if deficit[template] <= 0:
+            continue
+        candidates = np.array([entry_idx for entry_idx in index[template] if entry_idx not in chosen])
+        useful = np.array([sum(deficit[t] > 0 for t in templates_of[entry_idx]) for entry_idx in candidates])
+        # Most useful first; the random key breaks ties.
+        order = np.lexsort((rng.random(len(candidates)), -useful))
+        for entry_idx in candidates[order][:deficit[template]]:
+            chosen.add(int(entry_idx))
+            for t in templates_of[int(entry_idx)]:
+                deficit[t] -= 1
+    return sorted(chosen)
+
+
+class StratifiedSample:
+    """
+    A subset of a dataset's entries, indexed like the dataset itself.
+
+    With trim=True each entry keeps only the questions whose template has
+    not yet reached runs_per_template in earlier entries (answers stay
+    aligned), so over-represented templates such as the title question stop
+    costing grading calls once they have enough runs. Entries left without
+    questions are dropped.
+    """
+
+    def __init__(self, dataset, indices: Sequence[int], runs_per_template: int | None = None, trim: bool = False):
+        self.dataset = dataset
+        self.indices = list(indices)
+        self.keep: List[List[int]] | None = None
+        if trim and runs_per_template is not None:
+            all_questions = question_lists(dataset)
+            runs: Dict[str, int] = {}
+            kept_indices, keep = [], []
+            for entry_idx in self.indices:
+                positions = []
+                for position, question in enumerate(all_questions[entry_idx]):
+                    if runs.get(question, 0) < runs_per_template:
+                        runs[question] = runs.get(question, 0) + 1
+                        positions.append(position)
+                if positions:
+                    kept_indices.append(entry_idx)
+                    keep.append(positions)
+            self.indices, self.keep = kept_indices, keep
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, idx: int) -> dict:
+        entry = self.dataset[self.indices[idx]]
+        if self.keep is None:
+            return entry
+        positions = self.keep[idx]
+        return {
+            **entry,
+            "questions": [entry["questions"][p] for p in positions],
+            "answers": [entry["answers"][p] for p in positions],
+        }
+
+    def question_lists(self) -> List[List[str]]:
+        """Every entry's (trimmed) questions, in order, without decoding any image."""
+        all_questions = question_lists(self.dataset)
+        if self.keep is None:
+            return [all_questions[entry_idx] for entry_idx in self.indices]
+        return [[all_questions[entry_idx][p] for p in positions] for entry_idx, positions in zip(self.indices, self.keep)]
+
+    def image_ids(self) -> List[str]:
+        all_ids = image_ids(self.dataset)
+        return [all_ids[entry_idx] for entry_idx in self.indices]
+
+    def template_runs(self) -> Dict[str, int]:
+        """Template -> entries of the sample that ask it."""
+        runs: Dict[str, int] = {}
+        for questions in self.question_lists():
+            for question in questions:
+                runs[question] = runs.get(question, 0) + 1
+        return runs
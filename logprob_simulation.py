@@ -0,0 +1,266 @@
+import json
+import re
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+import confidence_intervals
+
+LOGPROB_PASS_FILE = "logprob_pass.json"
+SIMULATED_RESULTS_FILE = "simulated_temperature_results.json"
+LOGPROB_VALIDATION_FILE = "logprob_validation.json"
+
+# Alternatives returned per generated token (the API allows at most 20).
+TOP_LOGPROBS = 5
+# Candidate answers less likely than this at every simulated temperature are
+# not graded; sampling renormalizes over the graded candidates.
+MIN_CANDIDATE_PROB = 0.01
+# Answers longer than this many tokens are not simulated: a candidate is the
+# greedy prefix plus one alternative token, so leaving a longer answer early
+# yields a fragment ("The Lord Of") that would be graded as wrong.
+MAX_SIMULATED_ANSWER_TOKENS = 2
+
+_ANSWER_LINE = re.compile(r"^\s*(\d+)\.\s*(.*?)\s*$")
+
+# (token, logprob, [(alternative token, logprob), ...]) as returned for every generated token.
+TokenLogprobs = Tuple[str, float, List[Tuple[str, float]]]
+
+
+class AnswerLattice:
+    """
+    The answers a model could have given to one question, from the logprobs of a single greedy response.
+
+    Only the greedy path was generated, so an answer that leaves it is known
+    up to the first token where it diverges: a candidate is the greedy prefix
+    plus the alternative token, cut at the end of the line. For short answers
+    the first one or two tokens carry nearly all of the uncertainty, which is
+    what makes this a usable approximation.
+
+    Rescaling to temperature T divides every position's logprobs by T and
+    renormalizes over the returned top-k alternatives, i.e. mass outside the
+    top-k is ignored.
+
+    positions[i] is (logprobs, texts): index 0 is the token actually
+    generated (text None), every other index an alternative with the
+    candidate answer it leads to.
+    """
+
+    def __init__(self, greedy: str, positions: List[Tuple[List[float], List[str | None]]]):
+        self.greedy = greedy
+        self.positions = positions
+
+    def probabilities(self, temperature: float) -> Dict[str, float]:
+        """Candidate answer -> probability of sampling it at `temperature`."""
+        if temperature <= 0:
+            return {self.greedy: 1.0}
+        probs: Dict[str, float] = {}
+        on_path = 1.0
+        for logprobs, texts in self.positions:
+            scaled = np.asarray(logprobs) / temperature
+            q = np.exp(scaled - scaled.max())
+            q /= q.sum()
+            for text, p in zip(texts[1:], q[1:]):
+                probs[text] = probs.get(text, 0.0) + on_path * float(p)
+            on_path *= float(q[0])
+        probs[self.greedy] = probs.get(self.greedy, 0.0) + on_path
+        return probs
+
+    def candidates(self, temperatures: Iterable[float], min_prob: float = MIN_CANDIDATE_PROB) -> List[str]:
+        """Candidates reaching min_prob at any of the temperatures, greedy answer first."""
+        keep = {self.greedy}
+        for temperature in temperatures:
+            keep.update(text for text, p in self.probabilities(temperature).items() if p >= min_prob)
+        return [self.greedy] + sorted(keep - {self.greedy})
+
+    def to_dict(self) -> dict:
+        return {"greedy": self.greedy, "positions": [[logprobs, texts] for logprobs, texts in self.positions]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "AnswerLattice":
+        return cls(data["greedy"], [(logprobs, texts) for logprobs, texts in data["positions"]])
+
+
+def _answer_spans(text: str, num_questions: int) -> Dict[int, Tuple[int, int]]:
+    """(start, end) character offsets of each numbered answer in a response, keyed by 1-based question number."""
+    spans = {}
+    offset = 0
+    for line in text.split("\n"):
+        match = _ANSWER_LINE.match(line)
+        if match and 1 <= int(match.group(1)) <= num_questions:
+            spans.setdefault(int(match.group(1)), (offset + match.start(2), offset + match.end(2)))
+        offset += len(line) + 1
+    return spans
+
+
+def _candidate_text(text: str) -> str:
+    return text.split("\n")[0].strip() or "N/A"
+
+
+def answer_lattices(tokens: Sequence[TokenLogprobs], num_questions: int) -> Tuple[Dict[int, AnswerLattice], List[int]]:
+    """
+    Builds an AnswerLattice for every short enough answer in a numbered-list response.
+
+    Tokens overlapping an answer's text are its decision points. An
+    alternative to a token that starts before the answer (e.g. " Yes" after
+    "1.") only counts if it keeps the list formatting; other divergences in
+    the formatting are dropped, which renormalizes towards the greedy path.
+
+    Args:
+        tokens: The response's tokens with their logprobs and top alternatives.
+        num_questions: Questions asked; answers are numbered from 1.
+
+    Returns:
+        (lattices, unsupported): 0-based question index -> lattice for every
+        answer of at most MAX_SIMULATED_ANSWER_TOKENS tokens, and the indices
+        of the longer answers, which get no lattice.
+    """
+    text = "".join(token for token, _, _ in tokens)
+    starts = np.cumsum([0] + [len(token) for token, _, _ in tokens])
+    lattices = {}
+    unsupported = []
+    for number, (answer_start, answer_end) in _answer_spans(text, num_questions).items():
+        overlapping = [i for i, (token, _, _) in enumerate(tokens) if starts[i] < answer_end and starts[i] + len(token) > answer_start]
+        if len(overlapping) > MAX_SIMULATED_ANSWER_TOKENS:
+            unsupported.append(number - 1)
+            continue
+        positions = []
+        for i in overlapping:
+            token, logprob, alternatives = tokens[i]
+            token_start = int(starts[i])
+            if token_start < answer_start:
+                # The alternative must reproduce the formatting the greedy token covered.
+                lead, prefix = text[token_start:answer_start], ""
+            else:
+                lead, prefix = "", text[answer_start:token_start]
+            logprobs, texts = [logprob], [None]
+            for alternative, alt_logprob in alternatives:
+                if alternative == token or not alternative.startswith(lead.rstrip()):
+                    continue
+                candidate = _candidate_text(prefix + alternative[len(lead.rstrip()):])
+                logprobs.append(alt_logprob)
+                texts.append(candidate)
+            if len(texts) > 1:
+                positions.append((logprobs, texts))
+        lattices[number - 1] = AnswerLattice(_candidate_text(text[answer_start:answer_end]), positions)
+    return lattices, unsupported
+
+
+def load_logprob_pass(filename: str = LOGPROB_PASS_FILE) -> List[dict]:
+    try:
+        with open(filename, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_logprob_pass(records: List[dict], filename: str = LOGPROB_PASS_FILE):
+    with open(filename, "w") as f:
+        json.dump(records, f)
+
+
+def graded_distribution(lattice: AnswerLattice, grades: Dict[str, bool], temperature: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Probabilities and grades of a lattice's graded candidates at `temperature`, renormalized over them.
+
+    Returns empty arrays when no graded candidate has any mass, e.g. when the
+    only answer is 'N/A'.
+    """
+    probs = lattice.probabilities(temperature)
+    texts = [text for text in probs if text in grades and text != "N/A"]
+    p = np.array([probs[text] for text in texts], dtype=float)
+    if p.sum() <= 0:
+        return np.zeros(0), np.zeros(0, dtype=bool)
+    return p / p.sum(), np.array([grades[text] for text in texts], dtype=bool)
+
+
+def unsupported_questions(records: List[dict]) -> set:
+    """Questions with at least one answer too long to simulate; they are left out of the simulation altogether."""
+    return {record["q"][i] for record in records for i in record.get("unsupported", [])}
+
+
+def simulate(records: List[dict], temperatures: Iterable[float], samples_per_answer: int = 1, seed: int = 0) -> Tuple[Dict[float, Dict[str, Tuple[int, int]]], Dict[float, Dict[str, Tuple[float, int]]]]:
+    """
+    Simulates a temperature sweep offline from a logprob pass.
+
+    Questions in unsupported_questions(records) are skipped: simulating only
+    their short answers would bias their accuracy towards those images.
+
+    Args:
+        records: Logprob pass records ({"q": questions, "lattices": {index: lattice dict}, "grades": {index: {answer: bool}}, "unsupported": [index]}).
+        temperatures: Temperatures to simulate.
+        samples_per_answer: Answers drawn per (image, question); 1 mirrors one real pass.
+        seed: Seed for the sampling, so reruns give identical counts.
+
+    Returns:
+        (sampled, expected): temperature -> question -> (true_positives, total_runs)
+        from drawn answers, and temperature -> question -> (expected correct
+        answers, answers) from the exact candidate probabilities.
+    """
+    rng = np.random.default_rng(seed)
+    skipped = unsupported_questions(records)
+    lattices = [
+        [
+            (record["q"][int(i)], AnswerLattice.from_dict(lattice), record["grades"][i])
+            for i, lattice in record["lattices"].items() if record["q"][int(i)] not in skipped
+        ]
+        for record in records
+    ]
+    sampled: Dict[float, Dict[str, Tuple[int, int]]] = {}
+    expected: Dict[float, Dict[str, Tuple[float, int]]] = {}
+    for temperature in temperatures:
+        sampled_t: Dict[str, Tuple[int, int]] = {}
+        expected_t: Dict[str, Tuple[float, int]] = {}
+        for record_lattices in lattices:
+            for question, lattice, grades in record_lattices:
+                p, correct = graded_distribution(lattice, grades, temperature)
+                if p.size == 0:
+                    continue
+                draws = rng.choice(p.size, size=samples_per_answer, p=p)
+                tp, total = sampled_t.get(question, (0, 0))
+                sampled_t[question] = (tp + int(correct[draws].sum()), total + samples_per_answer)
+                exp_tp, answers = expected_t.get(question, (0.0, 0))
+                expected_t[question] = (exp_tp + float(p @ correct), answers + 1)
+        sampled[temperature] = sampled_t
+        expected[temperature] = expected_t
+    return sampled, expected
+
+
+def validation_report(expected: Dict[float, Dict[str, Tuple[float, int]]], real: Dict[float, Dict[str, Tuple[int, int]]], unsupported: Iterable[str] = ()) -> dict:
+    """
+    Compares simulated expected accuracies with real sampled runs, per temperature.
+
+    Only (question, temperature) cells present in both are compared. Reports
+    pooled accuracies, the mean absolute per-cell error, and the share of
+    cells whose simulated accuracy lies inside the real cell's 95% Wilson
+    interval; with the sampling noise of one real pass, a faithful
+    simulation keeps that share near 0.95. Real cells of unsupported
+    questions are counted as unsupported_cells instead of being compared.
+
+    Args:
+        expected: Output of simulate (expected correct, answers) per cell.
+        real: temperature -> question -> (true_positives, total_runs) from real runs.
+        unsupported: Questions the simulation left out (see unsupported_questions).
+    """
+    unsupported = set(unsupported)
+    report = {}
+    for temperature in sorted(expected):
+        real_t = real.get(temperature, {})
+        questions = [q for q, (_, n) in expected[temperature].items() if real_t.get(q, (0, 0))[1] > 0]
+        unsupported_cells = sum(1 for q, (_, n) in real_t.items() if q in unsupported and n > 0)
+        if not questions:
+            report[str(temperature)] = {"cells": 0, "unsupported_cells": unsupported_cells}
+            continue
+        sim_acc = np.array([expected[temperature][q][0] / expected[temperature][q][1] for q in questions])
+        real_tp = np.array([real_t[q][0] for q in questions], dtype=float)
+        real_n = np.array([real_t[q][1] for q in questions], dtype=float)
+        low, high = confidence_intervals.wilson_interval(real_tp, real_n)
+        sim_weight = np.array([expected[temperature][q][1] for q in questions], dtype=float)
+        report[str(temperature)] = {
+            "cells": len(questions),
+            "real_accuracy": float(real_tp.sum() / real_n.sum()),
+            "simulated_accuracy": float((sim_acc * sim_weight).sum() / sim_weight.sum()),
+            "mean_abs_error": float(np.mean(np.abs(sim_acc - real_tp / real_n))),
+            "share_within_real_ci": float(np.mean((sim_acc >= low) & (sim_acc <= high))),
+            "unsupported_cells": unsupported_cells,
+        }
+    return report
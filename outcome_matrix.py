@@ -0,0 +1,249 @@
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks (Windows): the single-writer rule goes unchecked.
+    fcntl = None
+
+META_FILE = "meta.json"
+ATTEMPTED_FILE = "attempted.bin"
+CORRECT_FILE = "correct.bin"
+LOCK_FILE = "lock"
+
+# Popcount of every byte value; summing it over packed bytes counts set bits.
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class OutcomeMatrix:
+    """
+    Bit-packed per-item grading outcomes, stored memory-mapped on disk.
+
+    Two bitplanes of shape (temperature, question, image) record whether an
+    item was graded ("attempted") and whether the grade was correct. Images
+    are packed eight to a byte, so a (temperature, question) row is a bit
+    vector over the whole dataset and paired queries between two
+    temperatures are byte-wise AND/XOR plus a popcount.
+
+    Each item keeps its latest outcome: regrading the same (image, question,
+    temperature) overwrites its bits.
+
+    The matrix has a single writer: labels are assigned in memory and only
+    reach meta.json on flush or when the files grow, so two processes
+    recording into the same directory would hand out the same positions.
+    open() takes an exclusive lock on the directory for the life of the
+    process and fails if another process holds it. Positions recorded after
+    the last meta write (e.g. before a crash) are cleared on open, so they
+    are never credited to labels assigned later.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.image_ids: List[str] = []
+        self.questions: List[str] = []
+        self.temperatures: List[float] = []
+        self._image_pos: Dict[str, int] = {}
+        self._question_pos: Dict[str, int] = {}
+        self._temp_pos: Dict[float, int] = {}
+        self._capacity = (0, 0, 0)
+        self.attempted: np.ndarray = np.zeros((0, 0, 0), dtype=np.uint8)
+        self.correct: np.ndarray = np.zeros((0, 0, 0), dtype=np.uint8)
+        self._lock_file = None
+
+    @classmethod
+    def open(cls, path: str) -> "OutcomeMatrix":
+        """Opens the matrix stored in `path`, or an empty one if nothing is stored there yet."""
+        matrix = cls(path)
+        matrix._lock()
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            return matrix
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        matrix.image_ids = meta["image_ids"]
+        matrix.questions = meta["questions"]
+        matrix.temperatures = meta["temperatures"]
+        matrix._image_pos = {image_id: i for i, image_id in enumerate(matrix.image_ids)}
+        matrix._question_pos = {q: i for i, q in enumerate(matrix.questions)}
+        matrix._temp_pos = {t: i for i, t in enumerate(matrix.temperatures)}
+        matrix._capacity = tuple(meta["capacity"])
+        shape = matrix._shape(matrix._capacity)
+        matrix.attempted = np.memmap(os.path.join(path, ATTEMPTED_FILE), dtype=np.uint8, mode="r+", shape=shape)
+        matrix.correct = np.memmap(os.path.join(path, CORRECT_FILE), dtype=np.uint8, mode="r+", shape=shape)
+        matrix._clear_unlabelled()
+        return matrix
+
+    def _lock(self):
+        if fcntl is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        self._lock_file = open(os.path.join(self.path, LOCK_FILE), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(f"Outcome matrix {self.path} is open in another process; it supports a single writer.")
+
+    def _clear_unlabelled(self):
+        num_images = len(self.image_ids)
+        for plane in (self.attempted, self.correct):
+            plane[len(self.temperatures):] = 0
+            plane[:, len(self.questions):] = 0
+            byte, bit = divmod(num_images, 8)
+            if bit:
+                plane[:, :, byte] &= np.uint8((1 << bit) - 1)
+                byte += 1
+            plane[:, :, byte:] = 0
+
+    @staticmethod
+    def _shape(capacity: tuple) -> tuple:
+        num_temps, num_questions, num_images = capacity
+        return (num_temps, num_questions, (num_images + 7) // 8)
+
+    def _index(self, positions: dict, values: list, key) -> int:
+        if key not in positions:
+            positions[key] = len(values)
+            values.append(key)
+        return positions[key]
+
+    def _ensure_capacity(self):
+        needed = (len(self.temperatures), len(self.questions), len(self.image_ids))
+        if all(n <= c for n, c in zip(needed, self._capacity)):
+            return
+        # Grow geometrically so a sweep that keeps adding questions copies rarely.
+        capacity = tuple(max(c, n if n <= c else max(n, 2 * c, 8)) for n, c in zip(needed, self._capacity))
+        os.makedirs(self.path, exist_ok=True)
+        shape = self._shape(capacity)
+        old_shape = self.attempted.shape
+        planes = []
+        for name, old in ((ATTEMPTED_FILE, self.attempted), (CORRECT_FILE, self.correct)):
+            tmp_path = os.path.join(self.path, name + ".tmp")
+            plane = np.memmap(tmp_path, dtype=np.uint8, mode="w+", shape=shape)
+            plane[:old_shape[0], :old_shape[1], :old_shape[2]] = old
+            plane.flush()
+            del plane
+            os.replace(tmp_path, os.path.join(self.path, name))
+            planes.append(np.memmap(os.path.join(self.path, name), dtype=np.uint8, mode="r+", shape=shape))
+        self.attempted, self.correct = planes
+        self._capacity = capacity
+        # meta.json must describe the files' shape at all times, or a crash before the next flush leaves them unreadable.
+        self._write_meta()
+
+    def record(self, temperature: float, image_id: str, question: str, correct: bool):
+        t = self._index(self._temp_pos, self.temperatures, float(temperature))
+        q = self._index(self._question_pos, self.questions, question)
+        i = self._index(self._image_pos, self.image_ids, image_id)
+        self._ensure_capacity()
+        byte, bit = divmod(i, 8)
+        mask = np.uint8(1 << bit)
+        self.attempted[t, q, byte] |= mask
+        if correct:
+            self.correct[t, q, byte] |= mask
+        else:
+            self.correct[t, q, byte] &= ~mask
+
+    def clear_temperature(self, temperature: float):
+        """Forgets every outcome at `temperature`, e.g. before regrading it from scratch."""
+        t = self._temp_pos.get(float(temperature))
+        if t is not None:
+            self.attempted[t] = 0
+            self.correct[t] = 0
+
+    def flush(self):
+        if not self.questions:
+            return
+        self._ensure_capacity()
+        if isinstance(self.attempted, np.memmap):
+            self.attempted.flush()
+            self.correct.flush()
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {
+            "image_ids": self.image_ids,
+            "questions": self.questions,
+            "temperatures": self.temperatures,
+            "capacity": list(self._capacity),
+        }
+        meta_path = os.path.join(self.path, META_FILE)
+        tmp_path = meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def _planes(self, temperature: float):
+        t = self._temp_pos[float(temperature)]
+        num_questions = len(self.questions)
+        return self.attempted[t, :num_questions], self.correct[t, :num_questions]
+
+    def paired_counts(self, temp_a: float, temp_b: float) -> Dict[str, np.ndarray]:
+        """
+        Paired 2×2 tables for every question between two temperatures.
+
+        Only images graded at both temperatures count. "a_only" is correct at
+        temp_a and wrong at temp_b; "b_only" is the reverse.
+
+        Returns:
+            dict: name -> array aligned with self.questions.
+        """
+        att_a, cor_a = self._planes(temp_a)
+        att_b, cor_b = self._planes(temp_b)
+        both = att_a & att_b
+        tables = {
+            "pairs": both,
+            "both_correct": both & cor_a & cor_b,
+            "a_only": both & cor_a & ~cor_b,
+            "b_only": both & ~cor_a & cor_b,
+        }
+        counts = {name: _POPCOUNT[bits].sum(axis=1, dtype=np.int64) for name, bits in tables.items()}
+        counts["both_wrong"] = counts["pairs"] - counts["both_correct"] - counts["a_only"] - counts["b_only"]
+        return counts
+
+    def mcnemar(self, temp_a: float, temp_b: float) -> Dict[str, np.ndarray]:
+        """
+        Exact McNemar test for every question between two temperatures.
+
+        Returns:
+            dict with "a_only", "b_only" (the discordant flip counts) and the
+            two-sided "p_value", each aligned with self.questions.
+        """
+        counts = self.paired_counts(temp_a, temp_b)
+        b, c = counts["a_only"], counts["b_only"]
+        return {"a_only": b, "b_only": c, "p_value": exact_mcnemar_p_value(b, c)}
+
+    def flipped_images(self, question: str, temp_a: float, temp_b: float) -> Dict[str, List[str]]:
+        """Image ids whose grade for `question` changed between the two temperatures."""
+        q = self._question_pos[question]
+        att_a, cor_a = self._planes(temp_a)
+        att_b, cor_b = self._planes(temp_b)
+        both = att_a[q] & att_b[q]
+        num_images = len(self.image_ids)
+        a_only = np.unpackbits(both & cor_a[q] & ~cor_b[q], bitorder="little")[:num_images]
+        b_only = np.unpackbits(both & ~cor_a[q] & cor_b[q], bitorder="little")[:num_images]
+        return {
+            "a_only": [self.image_ids[i] for i in np.flatnonzero(a_only)],
+            "b_only": [self.image_ids[i] for i in np.flatnonzero(b_only)],
+        }
+
+
+def exact_mcnemar_p_value(b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Two-sided exact McNemar p-value, 2 * P(X <= min(b, c)) for X ~ Binomial(b + c, 0.5), vectorized."""
+    b = np.asarray(b, dtype=np.int64)
+    c = np.asarray(c, dtype=np.int64)
+    n = b + c
+    k = np.minimum(b, c)
+    if n.size == 0:
+        return np.zeros(0)
+    max_n = int(n.max())
+    log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, max_n + 1)))])
+    j = np.arange(int(k.max()) + 1)[None, :]
+    n_col = n[:, None]
+    with np.errstate(invalid="ignore"):
+        log_terms = log_fact[n_col] - log_fact[np.minimum(j, n_col)] - log_fact[np.maximum(n_col - j, 0)] - n_col * np.log(2.0)
+    terms = np.where(j <= k[:, None], np.exp(log_terms), 0.0)
+    return np.minimum(1.0, 2 * terms.sum(axis=1))
@@ -1,8 +1,14 @@
+import argparse
+import hashlib
 import json
+import os
 from typing import Dict, List, Tuple
 import numpy as np
 import matplotlib.pyplot as plt
 
+from results_db import default_results_path, read_temperature_results
+from incremental_analysis import AnalysisCache, question_hashes, source_fingerprint
+
 # -----------------------------
 # Bucketing Function
 # -----------------------------
@@ -32,8 +38,7 @@ def bucket_question(q: str) -> str:
 
 
 def build_clusters(path: str) -> Dict[str, List[str]]:
-    with open(path, "r") as f:
-        raw = json.load(f)
+    raw = read_temperature_results(path)
 
     # Collect all questions from one temperature key (questions repeat across temps)
     first_key = next(iter(raw))
@@ -58,8 +63,7 @@ def build_clusters(path: str) -> Dict[str, List[str]]:
 # -----------------------------
 def load_data(path: str) -> Tuple[np.ndarray, List[float], Dict[str, Dict[float, float]]]:
     """Load JSON data into a usable structure."""
-    with open(path, "r") as f:
-        raw = json.load(f)
+    raw = read_temperature_results(path)
 
     per_q: Dict[str, Dict[float, float]] = {}
     temps_set = set()
@@ -94,6 +98,22 @@ def make_cluster_matrix(
     return np.array(rows, dtype=float), present_qs
 
 
+def heatmap_path(cname: str) -> str:
+    return f"{cname.replace(' ', '_').lower()}_heatmap.png"
+
+
+def avg_line_path(cname: str) -> str:
+    return f"{cname.replace(' ', '_').lower()}_avg.png"
+
+
+def cluster_chart_hashes(clusters: Dict[str, List[str]], temps: List[float], q_hashes: Dict[str, str]) -> Dict[str, str]:
+    """Hash of everything a cluster's charts are drawn from: its questions, their results and the temperatures."""
+    return {
+        cname: hashlib.sha256(json.dumps([temps, [(q, q_hashes.get(q)) for q in qlist]]).encode("utf-8")).hexdigest()
+        for cname, qlist in clusters.items()
+    }
+
+
 def plot_cluster_heatmap(cname: str, matrix: np.ndarray, qlabels: List[str], temps: List[float]) -> None:
     """Save a heatmap for one cluster."""
     plt.figure(figsize=(10, 6))
@@ -106,7 +126,7 @@ def plot_cluster_heatmap(cname: str, matrix: np.ndarray, qlabels: List[str], tem
     cbar = plt.colorbar(im)
     cbar.set_label("Accuracy")
     plt.tight_layout()
-    out_path = f"{cname.replace(' ', '_').lower()}_heatmap.png"
+    out_path = heatmap_path(cname)
     plt.savefig(out_path, dpi=200)
     plt.close()
     print(f"Saved {out_path}")
@@ -125,7 +145,7 @@ def plot_cluster_avg_line(cname: str, matrix: np.ndarray, temps: List[float]) ->
     plt.ylabel("Average Accuracy")
     plt.title(f"Average Accuracy vs Temperature — {cname}")
     plt.grid(True, linestyle="--", alpha=0.6)
-    out_path = f"{cname.replace(' ', '_').lower()}_avg.png"
+    out_path = avg_line_path(cname)
     plt.savefig(out_path, dpi=200)
     plt.close()
     print(f"Saved {out_path}")
@@ -135,14 +155,31 @@ def plot_cluster_avg_line(cname: str, matrix: np.ndarray, temps: List[float]) ->
 # Main
 # -----------------------------
 def main():
-    JSON_PATH = "temperature_accuracy_data.json"
+    parser = argparse.ArgumentParser(description="Plot accuracy heatmaps and average curves per question cluster.")
+    parser.add_argument("--incremental", action="store_true", help="Only redraw charts of clusters whose questions or results changed.")
+    args = parser.parse_args()
+
+    DATA_PATH = default_results_path(".")
 
     # Auto-generate clusters
-    CLUSTERS = build_clusters(JSON_PATH)
+    CLUSTERS = build_clusters(DATA_PATH)
 
-    temps_arr, temps, per_q = load_data(JSON_PATH)
+    temps_arr, temps, per_q = load_data(DATA_PATH)
+
+    cache = None
+    if args.incremental:
+        cache = AnalysisCache("charts", source_fingerprint(__file__))
+        chart_hashes = cluster_chart_hashes(CLUSTERS, temps, question_hashes(read_temperature_results(DATA_PATH)))
+        changed, removed = cache.diff(chart_hashes)
+        cache.remove(removed)
 
     for cname, qlist in CLUSTERS.items():
+        if cache is not None:
+            if cname not in changed and os.path.exists(heatmap_path(cname)) and os.path.exists(avg_line_path(cname)):
+                print(f"Unchanged {cname}")
+                continue
+            cache.update(cname, chart_hashes[cname], True)
+
         matrix, qlabels = make_cluster_matrix(qlist, temps, per_q)
         if matrix.size == 0:
             print(f"Skipping {cname} (no data)")
@@ -154,6 +191,9 @@ def main():
         # Save average accuracy line plot
         plot_cluster_avg_line(cname, matrix, temps)
 
+    if cache is not None:
+        cache.save()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,56 @@
+import json
+import os
+from typing import IO, Iterator
+
+PREDICTIONS_FILE = "predictions.jsonl"
+
+
+class PredictionStore:
+    """
+    Append-only store of raw model predictions, one JSON line per (temperature, image).
+
+    Each record keeps the questions, golden answers and predicted answers in
+    the same order, so a stored run can be regraded without the dataset or
+    any vision calls. When an image is generated again at the same
+    temperature, the newer record wins on read.
+    """
+
+    def __init__(self, filename: str = PREDICTIONS_FILE):
+        self.filename = filename
+        self._file: IO[str] | None = None
+
+    def append(self, temperature: float, image_id: str, questions: list[str], golden_answers: list[str], predicted_answers: list[str]):
+        if self._file is None:
+            self._file = open(self.filename, "a", buffering=1)
+        record = {
+            "t": temperature,
+            "id": image_id,
+            "q": questions,
+            "g": golden_answers,
+            "p": [predicted_answers[i] if i < len(predicted_answers) else 'N/A' for i in range(len(questions))],
+        }
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def records(self, temperatures: list[float] | None = None) -> Iterator[dict]:
+        """Yields the latest stored record for every (temperature, image_id), optionally filtered by temperature."""
+        if self._file is not None:
+            self._file.flush()
+        if not os.path.exists(self.filename):
+            return
+        wanted = None if temperatures is None else {float(t) for t in temperatures}
+        latest: dict[tuple[float, str], dict] = {}
+        with open(self.filename, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be incomplete if a run was killed mid-write.
+                    continue
+                if wanted is None or float(record["t"]) in wanted:
+                    latest[(float(record["t"]), record["id"])] = record
+        yield from latest.values()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,169 @@
+import asyncio
+import contextlib
+import cProfile
+import os
+import pstats
+import time
+import tracemalloc
+from datetime import datetime
+
+PROFILE_DIR = "profiles"
+SUMMARY_FILE = "summary.txt"
+
+LAG_CHECK_INTERVAL = 0.05
+LAG_WARN_THRESHOLD = 0.1
+TOP_HOT_SPOTS = 15
+
+_REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def new_profile_dir(base: str = PROFILE_DIR) -> str:
+    """A fresh timestamped directory under `base` for one run's profile."""
+    return os.path.join(base, datetime.now().strftime("%Y%m%d-%H%M%S"))
+
+
+def _is_local(filename: str) -> bool:
+    path = os.path.abspath(filename)
+    return path.startswith(_REPO_ROOT) and "site-packages" not in path and path != os.path.abspath(__file__)
+
+
+class StageStats:
+    """Wall time and cProfile data accumulated over every entry into one stage."""
+    __slots__ = ("calls", "seconds", "profile")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.profile = cProfile.Profile()
+
+
+class RunProfiler:
+    """
+    Opt-in profiling for a run, written to one profile directory.
+
+    Disabled (directory=None), every hook is a no-op. Enabled, it collects:
+      - per-stage cProfile data and wall time for synchronous local work,
+        entered with `with profiler.stage(name):`. Stages must not await;
+        a stage entered while another is active is timed but not profiled;
+      - tracemalloc snapshots taken with snapshot(label), e.g. at
+        temperature boundaries, with the top allocation growth since the
+        previous snapshot;
+      - event-loop lag, measured as how late a periodic sleep wakes up.
+
+    write_summary() dumps a .prof file per stage and a summary.txt listing
+    the top hot spots in this repository's own code.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory
+        self.enabled = directory is not None
+        self.stages: dict[str, StageStats] = {}
+        self.snapshots: list[tuple[str, int, int, list[str]]] = []
+        self.lag_samples: list[float] = []
+        self._active_stage: str | None = None
+        self._last_snapshot: tracemalloc.Snapshot | None = None
+        self._lag_task: asyncio.Task | None = None
+        if self.enabled:
+            os.makedirs(directory, exist_ok=True)
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        stats = self.stages.setdefault(name, StageStats())
+        profile = stats.profile if self._active_stage is None else None
+        if profile is not None:
+            self._active_stage = name
+            profile.enable()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.seconds += time.perf_counter() - started
+            stats.calls += 1
+            if profile is not None:
+                profile.disable()
+                self._active_stage = None
+
+    def snapshot(self, label: str):
+        """Records current and peak traced memory and the top growth since the last snapshot."""
+        if not self.enabled:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        if self._last_snapshot is None:
+            top = [str(stat) for stat in snapshot.statistics("lineno")[:10]]
+        else:
+            top = [str(stat) for stat in snapshot.compare_to(self._last_snapshot, "lineno")[:10]]
+        snapshot.dump(os.path.join(self.directory, f"memory_{len(self.snapshots):03d}_{label}.snapshot"))
+        self._last_snapshot = snapshot
+        self.snapshots.append((label, current, peak, top))
+
+    def start_lag_monitor(self):
+        """Starts the event-loop lag monitor on the running loop; safe to call more than once."""
+        if not self.enabled or (self._lag_task is not None and not self._lag_task.done()):
+            return
+        self._lag_task = asyncio.get_running_loop().create_task(self._monitor_lag())
+
+    async def _monitor_lag(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_CHECK_INTERVAL)
+            self.lag_samples.append(max(0.0, time.perf_counter() - started - LAG_CHECK_INTERVAL))
+
+    def _lag_summary(self) -> list[str]:
+        if not self.lag_samples:
+            return ["  no samples"]
+        ordered = sorted(self.lag_samples)
+        p99 = ordered[min(int(0.99 * len(ordered)), len(ordered) - 1)]
+        stalls = sum(lag > LAG_WARN_THRESHOLD for lag in ordered)
+        return [
+            f"  samples: {len(ordered)} every {LAG_CHECK_INTERVAL * 1000:.0f} ms",
+            f"  mean: {sum(ordered) / len(ordered) * 1000:.1f} ms, p99: {p99 * 1000:.1f} ms, max: {ordered[-1] * 1000:.1f} ms",
+            f"  stalls over {LAG_WARN_THRESHOLD * 1000:.0f} ms: {stalls}",
+        ]
+
+    def _hot_spots(self) -> list[tuple[float, float, int, str, str]]:
+        spots = []
+        for name, stats in self.stages.items():
+            if not stats.calls:
+                continue
+            profile_stats = pstats.Stats(stats.profile)
+            for (filename, lineno, function), (_, num_calls, total_time, cumulative_time, _) in profile_stats.stats.items():
+                if _is_local(filename):
+                    location = f"{os.path.relpath(filename, _REPO_ROOT)}:{lineno}({function})"
+                    spots.append((total_time, cumulative_time, num_calls, name, location))
+        spots.sort(reverse=True)
+        return spots[:TOP_HOT_SPOTS]
+
+    def write_summary(self) -> str | None:
+        """Writes per-stage .prof files and summary.txt; returns the summary path."""
+        if not self.enabled:
+            return None
+        lines = ["Stages (wall time):"]
+        for name, stats in sorted(self.stages.items(), key=lambda item: -item[1].seconds):
+            lines.append(f"  {name}: {stats.seconds:.3f}s over {stats.calls} calls")
+            if stats.calls:
+                stats.profile.dump_stats(os.path.join(self.directory, f"stage_{name}.prof"))
+
+        lines.append("")
+        lines.append(f"Top {TOP_HOT_SPOTS} local hot spots (self time):")
+        for total_time, cumulative_time, num_calls, stage_name, location in self._hot_spots():
+            lines.append(f"  {total_time:.3f}s self, {cumulative_time:.3f}s cumulative, {num_calls} calls  [{stage_name}] {location}")
+
+        lines.append("")
+        lines.append("Memory snapshots:")
+        for label, current, peak, top in self.snapshots:
+            lines.append(f"  {label}: {current / 2**20:.1f} MiB current, {peak / 2**20:.1f} MiB peak")
+            lines.extend(f"    {entry}" for entry in top[:5])
+
+        lines.append("")
+        lines.append("Event-loop lag:")
+        lines.extend(self._lag_summary())
+
+        path = os.path.join(self.directory, SUMMARY_FILE)
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
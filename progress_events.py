@@ -0,0 +1,39 @@
+import json
+import time
+from typing import IO
+
+PROGRESS_EVENTS_FILE = "progress_events.jsonl"
+
+# Event names written by ExperimentRunner and read by count.py.
+TEMPERATURE_START = "temperature_start"
+IMAGE_DONE = "image_done"
+ANSWERS_DROPPED = "answers_dropped"
+ERROR = "error"
+TEMPERATURE_DONE = "temperature_done"
+# Written on every change of an adaptive concurrency limit, with the request kind and the reason.
+CONCURRENCY_LIMIT = "concurrency_limit"
+
+
+class ProgressEventLog:
+    """
+    Appends structured progress events to a JSON-lines file.
+
+    Every event is one line with an "event" name, a wall-clock "ts" and
+    event-specific fields. Lines are flushed as they are written so a reader
+    can follow the file while the run is still going.
+    """
+
+    def __init__(self, filename: str = PROGRESS_EVENTS_FILE):
+        self.filename = filename
+        self._file: IO[str] | None = None
+
+    def emit(self, event: str, **fields):
+        if self._file is None:
+            self._file = open(self.filename, "a", buffering=1)
+        record = {"event": event, "ts": time.time(), **fields}
+        self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,62 +1,151 @@
 import os
-from load_datasets import load_ok_vqa_dataset
+from load_datasets import load_ok_vqa_dataset, stratified_sampler
 from clients import openai_client, openai_autorater
-from dataclasses import dataclass, field
+from clients.singleflight import SingleFlight
+from clients.http_pool import HTTPPoolConfig, SharedHTTPPool
+from clients.cassette import CASSETTE_FILE, Cassette
+from clients.request_pipeline import ChatCompletionCaller
+from clients.hedging import HedgePolicy
+from clients.concurrency import ConcurrencyPolicy
+from clients.batching import BatchingPolicy, VisionBatcher
+from clients.grading_tiers import GradingRouter, GradingTierPolicy
+import creativity_clustering
+import confidence_intervals
+from outcome_matrix import OutcomeMatrix
+import progress_events
+from sweep import GridPoint, build_grid
+from prediction_store import PredictionStore
+from profiling import RunProfiler, new_profile_dir
+from results_db import RESULTS_DB_FILE, ResultsDB
+from budget_allocator import PRECISION_REPORT_FILE, BudgetAllocator, estimate_item_cost, precision_report
+from incremental_analysis import AnalysisCache, question_hashes, source_fingerprint
+import logprob_simulation
+from dataclasses import dataclass
 import asyncio
-from typing import MutableSequence
+import functools
+from typing import Awaitable, Callable, MutableSequence
 import json
 
 
-@dataclass(frozen=False)
-class QuestionAccuracy:
-    true_positives: int = 0
-    false_positives: int = 0
-    different_answers: list[tuple[str, str]] = field(default_factory=list)
 
-@dataclass(frozen=False)
+class QuestionIndex:
+    """
+    Interns question strings.
+
+    Every cell for a question, at every temperature, is keyed by the one
+    canonical string held here, so a sweep stores each distinct question once
+    no matter how many images or temperatures repeat it.
+    """
+
+    __slots__ = ("_questions",)
+
+    def __init__(self):
+        self._questions: dict[str, str] = {}
+
+    def canonical(self, question: str) -> str:
+        return self._questions.setdefault(question, question)
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+
+@dataclass(slots=True)
 class TemperatureAccuracy:
     total_runs: int = 0
     true_positives: int = 0
     false_positives: int = 0
-    accuracy: float = 0.0
 
-question_accuracies: dict[str, QuestionAccuracy] = {}
+    @property
+    def accuracy(self) -> float:
+        return self.true_positives / self.total_runs if self.total_runs > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "total_runs": self.total_runs,
+            "true_positives": self.true_positives,
+            "false_positives": self.false_positives,
+            "accuracy": self.accuracy,
+        }
+
+    @classmethod
+    def from_dict(cls, acc_dict: dict) -> "TemperatureAccuracy":
+        # "accuracy" is derived from the counters, so the stored copy is ignored.
+        return cls(acc_dict["total_runs"], acc_dict["true_positives"], acc_dict["false_positives"])
+
 temperature_results: dict[float, dict[str, TemperatureAccuracy]] = {}
 
 ACCURACY_DATA_FILE = "accuracy_data.json"
 TEMPERATURE_RESULTS_FILE = "temperature_accuracy_data.json"
 
 FINAL_RESULTS_FILE = "final_results.json"
+CLUSTER_CACHE_FILE = "creativity_cluster_cache.json"
+OUTCOME_MATRIX_DIR = "outcome_matrix"
+LOCAL_DATASET_STORE = "ocr_vqa_store"
+SWEEP_RESULTS_FILE = "sweep_results.json"
 
-def save_accuracy_data(data: dict[str, QuestionAccuracy], filename: str = ACCURACY_DATA_FILE):
-    with open(filename, 'w') as f:
-        serializable_data = {q: acc.__dict__ for q, acc in data.items()}
-        json.dump(serializable_data, f, indent=4)
-
-def load_accuracy_data(filename: str = ACCURACY_DATA_FILE) -> dict[str, QuestionAccuracy]:
+def load_accuracy_data(filename: str = ACCURACY_DATA_FILE) -> dict:
+    """Contents of an ACCURACY_DATA_FILE (question -> totals and wrong-answer samples), e.g. to seed the results database."""
     if not os.path.exists(filename):
         return {}
     with open(filename, 'r') as f:
-        data = json.load(f)
-        return {q: QuestionAccuracy(**acc_dict) for q, acc_dict in data.items()}
+        return json.load(f)
 
 def save_temperature_results(data: dict[float, dict[str, TemperatureAccuracy]], filename: str = TEMPERATURE_RESULTS_FILE):
     with open(filename, 'w') as f:
         serializable_data = {}
         for temp, q_data in data.items():
-            serializable_data[str(temp)] = {q: acc.__dict__ for q, acc in q_data.items()}
+            serializable_data[str(temp)] = {q: acc.to_dict() for q, acc in q_data.items()}
+        json.dump(serializable_data, f, indent=4)
+
+def load_temperature_results(filename: str = TEMPERATURE_RESULTS_FILE, question_index: QuestionIndex | None = None) -> dict[float, dict[str, TemperatureAccuracy]]:
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r') as f:
+        return parse_temperature_results(json.load(f), question_index)
+
+def parse_temperature_results(data: dict, question_index: QuestionIndex | None = None) -> dict[float, dict[str, TemperatureAccuracy]]:
+    """Builds temperature results from the TEMPERATURE_RESULTS_FILE JSON format."""
+    if question_index is None:
+        question_index = QuestionIndex()
+    loaded_data = {}
+    for temp_str, q_data_dict in data.items():
+        temp = float(temp_str)
+        loaded_data[temp] = {question_index.canonical(q): TemperatureAccuracy.from_dict(acc_dict) for q, acc_dict in q_data_dict.items()}
+    return loaded_data
+
+def save_sweep_results(data: dict[GridPoint, dict[str, TemperatureAccuracy]], filename: str = SWEEP_RESULTS_FILE):
+    with open(filename, 'w') as f:
+        serializable_data = {}
+        for point, q_data in data.items():
+            serializable_data[point.key()] = {q: acc.to_dict() for q, acc in q_data.items()}
         json.dump(serializable_data, f, indent=4)
 
-def load_temperature_results(filename: str = TEMPERATURE_RESULTS_FILE) -> dict[float, dict[str, TemperatureAccuracy]]:
+def load_sweep_results(filename: str = SWEEP_RESULTS_FILE, question_index: QuestionIndex | None = None) -> dict[GridPoint, dict[str, TemperatureAccuracy]]:
     if not os.path.exists(filename):
         return {}
+    if question_index is None:
+        question_index = QuestionIndex()
     with open(filename, 'r') as f:
         data = json.load(f)
-        loaded_data = {}
-        for temp_str, q_data_dict in data.items():
-            temp = float(temp_str)
-            loaded_data[temp] = {q: TemperatureAccuracy(**acc_dict) for q, acc_dict in q_data_dict.items()}
-        return loaded_data
+        return {
+            GridPoint.from_key(key): {question_index.canonical(q): TemperatureAccuracy.from_dict(acc_dict) for q, acc_dict in q_data_dict.items()}
+            for key, q_data_dict in data.items()
+        }
+
+def record_scores(cells: dict[str, TemperatureAccuracy], graded: list[tuple[str, bool]]):
+    for question, score in graded:
+        if question not in cells:
+            cells[question] = TemperatureAccuracy()
+        current_qa = cells[question]
+        current_qa.total_runs += 1
+        if score:
+            current_qa.true_positives += 1
+        else:
+            current_qa.false_positives += 1
+
+def generation_failed(predicted_answers: list[str]) -> bool:
+    """True when a vision query returned its error marker instead of answers."""
+    return bool(predicted_answers) and predicted_answers[0].startswith("An error occurred")
 
 def save_final_results_to_json(data: dict, filename: str = FINAL_RESULTS_FILE):
     with open(filename, 'w') as f:
@@ -68,64 +157,564 @@ def load_final_results_from_json(filename: str = FINAL_RESULTS_FILE) -> dict:
     with open(filename, 'r') as f:
         return json.load(f)
 
+def save_cluster_cache(cache: dict[str, str], filename: str = CLUSTER_CACHE_FILE):
+    with open(filename, 'w') as f:
+        json.dump(cache, f, indent=4, sort_keys=True)
+
+def load_cluster_cache(filename: str = CLUSTER_CACHE_FILE) -> dict[str, str]:
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r') as f:
+        return json.load(f)
+
 class ExperimentRunner:
-    def __init__(self, api_key: str):
-        self.vqa_model = openai_client.OpenAIVQAModel(api_key)
-        self.autorater = openai_autorater.OpenAIAIRater(api_key)
-        self.okvqa_dataset = load_ok_vqa_dataset.OKVQA(num_images=1000).get_dataset()
-        self.question_accuracies = load_accuracy_data()
-        self.temperature_results = load_temperature_results()
+    def __init__(self, api_key: str, http_pool_config: HTTPPoolConfig | None = None, generation_workers: int = 4, grading_workers: int = 4, stage_queue_size: int = 16, cassette_mode: str | None = None, simulate_latency: bool = False, hedge_policies: dict[str, HedgePolicy] | None = None, batching_policy: BatchingPolicy | None = None, profile: bool = False, results_db_path: str = RESULTS_DB_FILE, grading_tiers: GradingTierPolicy | None = None, runs_per_template: int | None = None, trim_questions: bool = False, concurrency_policies: dict[str, ConcurrencyPolicy] | None = None):
+        self.generation_workers = generation_workers
+        # profile=True writes per-stage cProfile data, memory snapshots and event-loop lag to a new directory under profiles/.
+        self.profiler = RunProfiler(new_profile_dir()) if profile else RunProfiler()
+        self.grading_workers = grading_workers
+        self.stage_queue_size = stage_queue_size
+        self.singleflight = SingleFlight()
+        self.http_pool = SharedHTTPPool(api_key, http_pool_config)
+        # "record" captures every API response to CASSETTE_FILE; "replay" serves them back with no network.
+        self.cassette = Cassette(cassette_mode, CASSETTE_FILE, simulate_latency) if cassette_mode else None
+        # Deadlines and hedging per request kind, e.g. {"vision": HedgePolicy(deadline=60, hedge=True)}.
+        # Adaptive in-flight limits per request kind, e.g. {"vision": ConcurrencyPolicy(), "grading": ConcurrencyPolicy(max_limit=128)}.
+        # Worker pools start at no less than the policy's initial_limit and grow while a run is going
+        # whenever the limit is raised above them (see _run_worker_pools); limit changes go to the progress events.
+        concurrency_policies = concurrency_policies or {}
+        if "vision" in concurrency_policies:
+            self.generation_workers = max(self.generation_workers, concurrency_policies["vision"].initial_limit)
+        if "grading" in concurrency_policies:
+            self.grading_workers = max(self.grading_workers, concurrency_policies["grading"].initial_limit)
+        self._grow_pools: Callable[[str, int], None] | None = None
+        self.caller = ChatCompletionCaller(
+            self.http_pool.client, self.singleflight, self.cassette, hedge_policies,
+            concurrency_policies, self._on_concurrency_decision,
+        )
+        self.vqa_model = openai_client.OpenAIVQAModel(api_key, caller=self.caller, profiler=self.profiler)
+        # grading_tiers routes simple grading items to a cheaper model; None grades everything with gpt-4o.
+        self.autorater = openai_autorater.OpenAIAIRater(api_key, caller=self.caller, router=GradingRouter(grading_tiers) if grading_tiers else None)
+        # Packing images needs generation_workers >= batching_policy.max_images_per_request.
+        self.batcher = VisionBatcher(self.vqa_model, batching_policy)
+        # runs_per_template draws a stratified sample giving every question template that many images,
+        # instead of the first 1000 images, where rare genre questions get only a few dozen runs.
+        # trim_questions then stops asking templates that already have that many runs. It is off by default,
+        # as in OKVQA: trimming changes how many and which questions share each prompt, and so the condition
+        # being measured, so trimmed and untrimmed runs are not directly comparable.
+        self.okvqa_dataset = load_ok_vqa_dataset.OKVQA(num_images=1000, local_store_path=LOCAL_DATASET_STORE, runs_per_template=runs_per_template, trim_questions=trim_questions).get_dataset()
+        self.question_index = QuestionIndex()
+        self.results_db_path = results_db_path
+        self.sweep_results = load_sweep_results(question_index=self.question_index)
+        self.events = progress_events.ProgressEventLog()
+        self.predictions = PredictionStore()
+
+    # The results database, the counts loaded from it and the outcome matrix are
+    # opened on first use, so read-only uses of the runner create none of them.
+
+    @functools.cached_property
+    def results_db(self) -> ResultsDB:
+        """
+        The results database, the store of record shared by every runner process; the JSON files are exports of it.
+
+        On first use it is seeded with the results and the analysis already in the JSON files.
+        """
+        results_db = ResultsDB(self.results_db_path)
+        if results_db.is_empty():
+            temperature_results = load_temperature_results(question_index=self.question_index)
+            accuracy_data = load_accuracy_data()
+            if temperature_results or accuracy_data:
+                results_db.import_json(
+                    {str(temp): {q: acc.to_dict() for q, acc in q_data.items()} for temp, q_data in temperature_results.items()},
+                    accuracy_data,
+                )
+            saved_analysis = load_final_results_from_json().get("analysis")
+            if saved_analysis:
+                results_db.save_analysis(saved_analysis)
+        return results_db
+
+    @functools.cached_property
+    def temperature_results(self) -> dict[float, dict[str, TemperatureAccuracy]]:
+        return parse_temperature_results(self.results_db.temperature_results_json(), self.question_index)
+
+    @functools.cached_property
+    def outcomes(self) -> OutcomeMatrix:
+        return OutcomeMatrix.open(OUTCOME_MATRIX_DIR)
 
     async def run_temperature_experiment(self, temperatures: list[float]):
+        self.profiler.start_lag_monitor()
         for temp in temperatures:
             if temp not in self.temperature_results:
                 self.temperature_results[temp] = {}
             print(f"\n--- Running evaluation for temperature: {temp} ---")
+            self.events.emit(progress_events.TEMPERATURE_START, temperature=temp, num_images=len(self.okvqa_dataset))
+            self.profiler.snapshot(f"temperature_{temp}_start")
+
+            # Generation and grading run as separate worker pools joined by a
+            # bounded queue: grading of one image overlaps generation of the
+            # next ones, and a full queue holds generation back when grading lags.
+            # Items are handed out until they run out, whatever number of generators the pool grows to.
+            items = iter([(entry_idx, temp) for entry_idx in range(0, len(self.okvqa_dataset))])
+
+            async def next_item():
+                return next(items, None)
+
+            await self._run_worker_pools(next_item)
+
+            self.outcomes.flush()
+            self.events.emit(progress_events.TEMPERATURE_DONE, temperature=temp)
+            self.profiler.snapshot(f"temperature_{temp}_done")
+
+        self._save_results()
+        self.print_run_summary()
+
+    def _save_results(self):
+        """Flushes buffered rows to the results database and rewrites the JSON exports from it."""
+        with self.profiler.stage("json_save"):
+            self.results_db.export_json(TEMPERATURE_RESULTS_FILE, ACCURACY_DATA_FILE)
 
-            for entry_idx in range(0, len(self.okvqa_dataset)):
+    async def _run_worker_pools(self, next_item: Callable[[], Awaitable[tuple[int, float] | None]], on_graded: Callable[[float, str, list[tuple[str, bool]]], None] | None = None):
+        """
+        Runs the generation and grading worker pools until next_item returns None for every generation worker.
+
+        Args:
+            next_item: Returns the next (entry index, temperature) to generate, or None to stop a worker.
+            on_graded: Called with (temperature, image_id, graded) after each image is graded,
+                or with no grades when generation failed and the image was not graded.
+        """
+        grading_queue: asyncio.Queue = asyncio.Queue(maxsize=self.stage_queue_size)
+        generators: list[asyncio.Task] = []
+        graders: list[asyncio.Task] = []
+        closing = False
+
+        async def close_grading():
+            nonlocal closing
+            # Generators added while waiting are waited for as well.
+            while not all(task.done() for task in generators):
+                await asyncio.gather(*generators)
+            closing = True
+            for _ in range(len(graders)):
+                await grading_queue.put(None)
+
+        # One task group for both pools: if any worker fails, the rest are
+        # cancelled, instead of generators blocking forever on a full queue
+        # that no grader drains.
+        try:
+            async with asyncio.TaskGroup() as group:
+                def grow(kind: str, size: int):
+                    # Pools follow a raised concurrency limit, so they never cap it, without
+                    # starting max_limit workers that would mostly wait for a slot.
+                    if closing:
+                        return
+                    if kind == "vision":
+                        while len(generators) < size:
+                            generators.append(group.create_task(self._generation_worker(next_item, grading_queue, on_graded)))
+                    elif kind == "grading":
+                        while len(graders) < size:
+                            graders.append(group.create_task(self._grading_worker(grading_queue, on_graded)))
+
+                grow("vision", self.generation_workers)
+                grow("grading", self.grading_workers)
+                group.create_task(close_grading())
+                self._grow_pools = grow
+        finally:
+            self._grow_pools = None
+
+    def _on_concurrency_decision(self, decision: dict):
+        self.events.emit(progress_events.CONCURRENCY_LIMIT, **decision)
+        if self._grow_pools is not None and decision["to"] > decision["from"]:
+            self._grow_pools(decision["kind"], decision["to"])
+
+    async def _generation_worker(self, next_item: Callable[[], Awaitable[tuple[int, float] | None]], grading_queue: asyncio.Queue, on_graded: Callable[[float, str, list[tuple[str, bool]]], None] | None = None):
+        while (item := await next_item()) is not None:
+            entry_idx, temp = item
+            with self.profiler.stage("dataset_indexing"):
                 entry = self.okvqa_dataset[entry_idx]
-                image = entry['image']
-                questions = entry['questions']
-                golden_answers = entry['answers']
+                questions = [self.question_index.canonical(q) for q in entry['questions']]
+
+            print(f"Processing image_id: {entry['image_id']} at temperature {temp}")
+
+            try:
+                with self.profiler.stage("jpeg_encoding"):
+                    base64_image = self.vqa_model.encode_image(entry['image'])
+            except Exception as e:
+                predicted_answers = [f"An error occurred: {e}"]
+            else:
+                predicted_answers = await self.batcher.query_encoded_image(base64_image, questions, temperature=temp)
+            if generation_failed(predicted_answers):
+                # A failed call has no answers to grade; grading the error text would count it as wrong.
+                self.events.emit(progress_events.ERROR, temperature=temp, image_id=entry['image_id'], stage="generation", message=predicted_answers[0])
+                self.events.emit(progress_events.IMAGE_DONE, temperature=temp, image_id=entry['image_id'], graded=0, correct=0)
+                if on_graded is not None:
+                    on_graded(temp, entry['image_id'], [])
+                continue
+            self.predictions.append(temp, entry['image_id'], questions, entry['answers'], predicted_answers)
+            await grading_queue.put((temp, entry['image_id'], questions, entry['answers'], predicted_answers))
+
+    async def _grading_worker(self, grading_queue: asyncio.Queue, on_graded: Callable[[float, str, list[tuple[str, bool]]], None] | None = None):
+        while (item := await grading_queue.get()) is not None:
+            temp, image_id, questions, golden_answers, predicted_answers = item
+            graded = await self.autorater.grade_answers(questions, golden_answers, predicted_answers)
+            if len(graded) < len(questions):
+                self.events.emit(progress_events.ANSWERS_DROPPED, temperature=temp, image_id=image_id, dropped=len(questions) - len(graded))
+
+            with self.profiler.stage("score_recording"):
+                answers = {question: (golden_answers[i], predicted_answers[i]) for i, question in enumerate(questions) if i < len(predicted_answers)}
+                record_scores(self.temperature_results[temp], graded)
+                self.results_db.record(temp, image_id, graded, answers)
+                for question, score in graded:
+                    self.outcomes.record(temp, image_id, question, score)
+            await self.results_db.flush_full_batch()
+
+            self.events.emit(progress_events.IMAGE_DONE, temperature=temp, image_id=image_id, graded=len(graded), correct=sum(score for _, score in graded))
+            if on_graded is not None:
+                on_graded(temp, image_id, graded)
+
+    async def run_budgeted_experiment(self, temperatures: list[float], max_calls: int | None = None, max_tokens: int | None = None):
+        """
+        Spends a fixed API budget on the (image, temperature) items that most reduce uncertainty.
+
+        Instead of walking the dataset in order at every temperature, the
+        BudgetAllocator keeps picking the item whose questions' cells gain
+        the most precision per unit of cost, starting from the counts already
+        in temperature_results. Each item runs at most once. Results are
+        saved in the usual files, and a precision report of the achieved
+        Wilson half-widths is written to PRECISION_REPORT_FILE.
+
+        Args:
+            temperatures (list[float]): Temperatures items may be drawn from.
+            max_calls (int | None): Budget in API calls (vision plus grading).
+            max_tokens (int | None): Budget in prompt plus completion tokens. Pass exactly one of the two.
+        """
+        if (max_calls is None) == (max_tokens is None):
+            raise ValueError("Pass exactly one of max_calls or max_tokens")
+        unit, budget = ("calls", max_calls) if max_calls is not None else ("tokens", max_tokens)
+        calls_before = self.singleflight.calls
+        tokens_before = self.caller.prompt_tokens + self.caller.completion_tokens
+
+        def spent() -> float:
+            if unit == "calls":
+                return self.singleflight.calls - calls_before
+            return self.caller.prompt_tokens + self.caller.completion_tokens - tokens_before
+
+        self.profiler.start_lag_monitor()
+        with self.profiler.stage("dataset_indexing"):
+            # Only the question and image id columns are read; no image is decoded.
+            entry_questions = [[self.question_index.canonical(q) for q in questions] for questions in stratified_sampler.question_lists(self.okvqa_dataset)]
+            entry_by_image_id = {image_id: entry_idx for entry_idx, image_id in enumerate(stratified_sampler.image_ids(self.okvqa_dataset))}
+        item_questions = {(entry_idx, temp): questions for temp in temperatures for entry_idx, questions in enumerate(entry_questions)}
+        costs = {item: estimate_item_cost(len(questions), unit) for item, questions in item_questions.items()}
+        counts = {
+            (question, temp): (acc_data.true_positives, acc_data.total_runs)
+            for temp in temperatures for question, acc_data in self.temperature_results.get(temp, {}).items()
+        }
+        allocator = BudgetAllocator(item_questions, counts, budget, costs)
+
+        print(f"\n--- Running budgeted evaluation: {budget} {unit} over {len(item_questions)} (image, temperature) items ---")
+        for temp in temperatures:
+            self.temperature_results.setdefault(temp, {})
+            self.events.emit(progress_events.TEMPERATURE_START, temperature=temp)
 
-                print(f"Processing image_id: {entry['image_id']} at temperature {temp}")
+        completed = asyncio.Event()
 
-                predicted_answers = await self.vqa_model.query_image(image, questions, temperature=temp)
+        async def next_item():
+            # Nothing fitting now is only final once nothing is in flight: completions
+            # release reservations, and their actual cost may leave room for more items.
+            while (item := allocator.next_item(spent())) is None and allocator.items_started > allocator.items_done:
+                completed.clear()
+                await completed.wait()
+            return item
 
-                autorater_tasks = []
-                questions_to_rate = []
-                for i, question in enumerate(questions):
-                    predicted_answer = predicted_answers[i] if i < len(predicted_answers) else 'N/A'
-                    if predicted_answer != 'N/A':
-                        autorater_tasks.append(self.autorater.rate_answer(question, golden_answers[i], predicted_answer))
-                        questions_to_rate.append(question)
+        def on_graded(temp: float, image_id: str, graded: list[tuple[str, bool]]):
+            allocator.complete((entry_by_image_id[image_id], temp), graded)
+            completed.set()
 
-                scores = await asyncio.gather(*autorater_tasks)
+        await self._run_worker_pools(next_item, on_graded)
 
-                for j, score in enumerate(scores):
-                    question = questions_to_rate[j]
-                    if question not in self.temperature_results[temp]:
-                        self.temperature_results[temp][question] = TemperatureAccuracy()
-                    
-                    current_qa = self.temperature_results[temp][question]
-                    current_qa.total_runs += 1
-                    if score is True:
-                        current_qa.true_positives += 1
-                    else:
-                        current_qa.false_positives += 1
-                
-            for question, acc_data in self.temperature_results[temp].items():
-                if acc_data.total_runs > 0:
-                    acc_data.accuracy = acc_data.true_positives / acc_data.total_runs
-        
-        save_accuracy_data(self.question_accuracies)
-        save_temperature_results(self.temperature_results)
+        self.outcomes.flush()
+        for temp in temperatures:
+            self.events.emit(progress_events.TEMPERATURE_DONE, temperature=temp)
+        self._save_results()
+
+        report = precision_report({
+            temp: {question: (acc_data.true_positives, acc_data.total_runs) for question, acc_data in self.temperature_results[temp].items()}
+            for temp in temperatures
+        })
+        report["budget"] = {"unit": unit, "limit": budget, "spent": spent(), "items_run": allocator.items_done, "items_available": len(item_questions)}
+        with open(PRECISION_REPORT_FILE, 'w') as f:
+            json.dump(report, f, indent=4)
+        self.print_precision_report(report)
+        self.print_run_summary()
+
+    def print_precision_report(self, report: dict):
+        budget = report["budget"]
+        print("\n--- Precision Report ---")
+        print(f"  Budget: {budget['spent']:.0f} of {budget['limit']} {budget['unit']} spent, {budget['items_run']} of {budget['items_available']} items run")
+        for label, summary in [("all", report["overall"])] + [(f"temp={temp}", summary) for temp, summary in report["by_temperature"].items()]:
+            if not summary.get("observed_cells"):
+                print(f"  {label}: no observed cells")
+                continue
+            within = ", ".join(f"<= {target}: {share:.1%}" for target, share in summary["share_within"].items())
+            print(f"  {label}: {summary['observed_cells']} cells, 95% half-width median {summary['median_half_width']:.3f}, "
+                  f"p90 {summary['p90_half_width']:.3f}, max {summary['max_half_width']:.3f} ({within})")
+
+    async def regrade(self, temperatures: list[float] | None = None):
+        """
+        Regrades stored predictions, without any vision calls.
+
+        Stored predictions are replayed through the grading worker pool, so
+        only the autorater is called. Use this after changing the grader
+        prompt or model. Per temperature, the new grades replace the graded
+        rows of the replayed images in one transaction, so a failure midway
+        leaves that temperature as it was; counts imported from the
+        pre-database JSON files are kept. The outcome matrix is cleared for
+        each regraded temperature first, so it holds only replayed images.
+
+        Args:
+            temperatures (list[float] | None): Temperatures to regrade; None regrades every stored temperature.
+        """
+        self.profiler.start_lag_monitor()
+        with self.profiler.stage("prediction_loading"):
+            records = list(self.predictions.records(temperatures))
+        regraded_temps = sorted({float(record["t"]) for record in records})
+
+        for temp in regraded_temps:
+            print(f"\n--- Regrading stored predictions for temperature: {temp} ---")
+            temp_records = [record for record in records if float(record["t"]) == temp]
+            self.events.emit(progress_events.TEMPERATURE_START, temperature=temp, num_images=len(temp_records))
+            self.profiler.snapshot(f"regrade_{temp}_start")
+            self.temperature_results.setdefault(temp, {})
+            self.outcomes.clear_temperature(temp)
+
+            grading_queue: asyncio.Queue = asyncio.Queue(maxsize=self.stage_queue_size)
+
+            async def feed(temp: float, temp_records: list[dict]):
+                for record in temp_records:
+                    questions = [self.question_index.canonical(q) for q in record["q"]]
+                    await grading_queue.put((temp, record["id"], questions, record["g"], record["p"]))
+                for _ in range(self.grading_workers):
+                    await grading_queue.put(None)
+
+            # As in _run_worker_pools, a failing grader cancels the feeder instead of leaving it blocked on put().
+            with self.results_db.replacing(temp, [record["id"] for record in temp_records]):
+                async with asyncio.TaskGroup() as group:
+                    for _ in range(self.grading_workers):
+                        group.create_task(self._grading_worker(grading_queue))
+                    group.create_task(feed(temp, temp_records))
+
+            self.outcomes.flush()
+            self.events.emit(progress_events.TEMPERATURE_DONE, temperature=temp)
+            self.profiler.snapshot(f"regrade_{temp}_done")
+
+        # The in-memory counts had the new grades added on top of the old ones; rebuild them from the database.
+        self.temperature_results = parse_temperature_results(self.results_db.temperature_results_json(), self.question_index)
+        self._save_results()
+        self.print_run_summary()
+
+    async def run_logprob_pass(self, temperatures: list[float], top_logprobs: int = logprob_simulation.TOP_LOGPROBS, max_concurrency: int = 8):
+        """
+        Asks every image's questions once at temperature 0 with token logprobs, for simulating a temperature sweep offline.
+
+        Every answer's candidates that reach MIN_CANDIDATE_PROB at any of
+        `temperatures` are graded once, so the pass costs one vision call per
+        image plus a few grading calls per question, whatever the number of
+        temperatures. Records are written to LOGPROB_PASS_FILE; run
+        simulate_temperature_sweep afterwards.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_entry(entry_idx: int) -> dict | None:
+            # The semaphore covers encoding and grading as well, bounding images in memory and calls in flight.
+            async with semaphore:
+                return await process_entry(entry_idx)
 
-    async def cluster_questions_by_creativity(self):
+        async def process_entry(entry_idx: int) -> dict | None:
+            with self.profiler.stage("dataset_indexing"):
+                entry = self.okvqa_dataset[entry_idx]
+                questions = [self.question_index.canonical(q) for q in entry['questions']]
+            with self.profiler.stage("jpeg_encoding"):
+                base64_image = self.vqa_model.encode_image(entry['image'])
+            tokens = await self.vqa_model.query_encoded_image_logprobs(base64_image, questions, top_logprobs)
+            if not tokens:
+                self.events.emit(progress_events.ERROR, temperature=0.0, image_id=entry['image_id'], stage="logprobs", message="no logprobs returned")
+                return None
+            with self.profiler.stage("answer_parsing"):
+                lattices, unsupported = logprob_simulation.answer_lattices(tokens, len(questions))
+
+            to_grade = [(i, candidate) for i, lattice in lattices.items() for candidate in lattice.candidates(temperatures) if candidate != "N/A"]
+            scores = await asyncio.gather(*(self.autorater.rate_answer(questions[i], entry['answers'][i], f"{i + 1}. {candidate}") for i, candidate in to_grade))
+            grades = {str(i): {} for i in lattices}
+            for (i, candidate), score in zip(to_grade, scores):
+                # Ungraded candidates are left out; the simulation renormalizes over the graded ones.
+                if score is not None:
+                    grades[str(i)][candidate] = score
+            print(f"Processed image_id: {entry['image_id']} ({sum(len(g) for g in grades.values())} candidate answers graded)")
+            return {
+                "id": entry['image_id'],
+                "q": questions,
+                "lattices": {str(i): lattice.to_dict() for i, lattice in lattices.items()},
+                "grades": grades,
+                "unsupported": unsupported,
+            }
+
+        print(f"\n--- Running logprob pass for {len(temperatures)} simulated temperatures ---")
+        self.profiler.start_lag_monitor()
+        records = await asyncio.gather(*(run_entry(entry_idx) for entry_idx in range(len(self.okvqa_dataset))))
+        records = [record for record in records if record is not None]
+        with self.profiler.stage("json_save"):
+            logprob_simulation.save_logprob_pass(records)
+        self.print_run_summary()
+
+    def simulate_temperature_sweep(self, temperatures: list[float], samples_per_answer: int = 1, seed: int = 0) -> dict[float, dict[str, TemperatureAccuracy]]:
+        """
+        Simulates a temperature sweep from LOGPROB_PASS_FILE, with no API calls.
+
+        Simulated results go to SIMULATED_RESULTS_FILE in the
+        TEMPERATURE_RESULTS_FILE format, never into the results database.
+        Temperatures that also have real runs are compared against them in
+        LOGPROB_VALIDATION_FILE.
         """
-        Clusters questions based on their creativity level using the OpenAI client.
+        records = logprob_simulation.load_logprob_pass()
+        if not records:
+            print(f"Error: no logprob pass found in {logprob_simulation.LOGPROB_PASS_FILE}; run run_logprob_pass first.")
+            return {}
+        sampled, expected = logprob_simulation.simulate(records, temperatures, samples_per_answer, seed)
+        simulated = {
+            temp: {
+                self.question_index.canonical(question): TemperatureAccuracy(total_runs, true_positives, total_runs - true_positives)
+                for question, (true_positives, total_runs) in q_counts.items()
+            }
+            for temp, q_counts in sampled.items()
+        }
+        save_temperature_results(simulated, logprob_simulation.SIMULATED_RESULTS_FILE)
+
+        self.results_db.flush()
+        real = {temp: self.results_db.temperature_slice(temp) for temp in self.results_db.temperatures()}
+        report = logprob_simulation.validation_report(expected, real, logprob_simulation.unsupported_questions(records))
+        with open(logprob_simulation.LOGPROB_VALIDATION_FILE, "w") as f:
+            json.dump(report, f, indent=4)
+        print("\n--- Logprob Simulation vs Real Runs ---")
+        for temp, summary in report.items():
+            unsupported = f", {summary['unsupported_cells']} cells with answers too long to simulate" if summary["unsupported_cells"] else ""
+            if not summary["cells"]:
+                print(f"  temp={temp}: no real runs to compare{unsupported}")
+                continue
+            print(f"  temp={temp}: {summary['cells']} cells, accuracy real {summary['real_accuracy']:.3f} vs simulated {summary['simulated_accuracy']:.3f}, "
+                  f"mean abs error {summary['mean_abs_error']:.3f}, {summary['share_within_real_ci']:.1%} within real 95% CI{unsupported}")
+        return simulated
+
+    async def run_parameter_sweep(self, grid: list[GridPoint], max_concurrency: int = 8):
+        """
+        Runs every image against every point of a parameter grid.
+
+        Each image is read and encoded once, then dispatched to all grid points
+        concurrently (at most max_concurrency generation calls at a time), so a
+        new grid dimension only adds API calls. Results are keyed by the full
+        GridPoint in self.sweep_results, the generalization of temperature_results.
         """
-        clusters = await self.vqa_model.cluster_questions_by_creativity(self.temperature_results)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        for point in grid:
+            self.sweep_results.setdefault(point, {})
+
+        async def run_point(point: GridPoint, base64_image: str, questions: list[str], golden_answers: list[str]):
+            async with semaphore:
+                predicted_answers = await self.batcher.query_encoded_image(base64_image, questions, **point.query_kwargs())
+            if generation_failed(predicted_answers):
+                return
+            graded = await self.autorater.grade_answers(questions, golden_answers, predicted_answers)
+            record_scores(self.sweep_results[point], graded)
+
+        print(f"\n--- Running parameter sweep over {len(grid)} grid points ---")
+        self.profiler.start_lag_monitor()
+        for entry_idx in range(0, len(self.okvqa_dataset)):
+            with self.profiler.stage("dataset_indexing"):
+                entry = self.okvqa_dataset[entry_idx]
+                questions = [self.question_index.canonical(q) for q in entry['questions']]
+            with self.profiler.stage("jpeg_encoding"):
+                base64_image = self.vqa_model.encode_image(entry['image'])
+            print(f"Processing image_id: {entry['image_id']} across {len(grid)} grid points")
+            await asyncio.gather(*(run_point(point, base64_image, questions, entry['answers']) for point in grid))
+
+        with self.profiler.stage("json_save"):
+            save_sweep_results(self.sweep_results)
+        self.print_run_summary()
+
+    def paired_temperature_tests(self, temp_a: float, temp_b: float) -> dict:
+        """
+        Exact McNemar tests per question between two temperatures, using the
+        per-image outcomes in the outcome matrix.
+        """
+        tests = self.outcomes.mcnemar(temp_a, temp_b)
+        return {
+            question: {
+                "correct_only_at_a": int(tests["a_only"][i]),
+                "correct_only_at_b": int(tests["b_only"][i]),
+                "p_value": float(tests["p_value"][i]),
+            }
+            for i, question in enumerate(self.outcomes.questions)
+        }
+
+    def print_run_summary(self):
+        flight_stats = self.singleflight.stats()
+        print("\n--- Run Summary ---")
+        print(f"  API calls issued: {flight_stats['calls']}")
+        print(f"  Coalesced duplicate calls: {flight_stats['coalesced']}")
+        pool_stats = self.http_pool.stats()
+        print(f"  HTTP requests: {pool_stats['requests']}")
+        print(f"  New connections: {pool_stats['new_connections']} (TLS handshakes: {pool_stats['tls_handshakes']})")
+        print(f"  Connection reuse rate: {pool_stats['reuse_rate']:.1%}")
+        batch_stats = self.batcher.stats()
+        print(f"  Vision requests: {batch_stats['requests']} for {batch_stats['images']} images ({batch_stats['requests_per_image']:.2f} per image), "
+              f"tokens: {batch_stats['prompt_tokens']} prompt / {batch_stats['completion_tokens']} completion")
+        print(f"  Truncated vision responses: {self.vqa_model.truncations} (retry calls for unanswered questions: {self.vqa_model.retries})")
+        if self.autorater.router is not None:
+            tier_stats = self.autorater.router.stats()
+            routed = tier_stats["routed"]
+            agreement = "-" if tier_stats["agreement_rate"] is None else f"{tier_stats['agreement_rate']:.1%}"
+            print(f"  Grading items: {routed['binary']} binary, {routed['short_span']} short span (cheap model), {routed['open_ended']} open ended (strong model)")
+            print(f"  Grading audit: {tier_stats['agreements']}/{tier_stats['audits']} cheap verdicts agreed with the strong model ({agreement})")
+        for kind, hedger in self.caller.hedgers.items():
+            hedge_stats = hedger.stats()
+            p99_before = "-" if hedge_stats["p99_without_hedging"] is None else f"{hedge_stats['p99_without_hedging']:.2f}s"
+            p99_after = "-" if hedge_stats["p99_effective"] is None else f"{hedge_stats['p99_effective']:.2f}s"
+            print(f"  {kind} calls: {hedge_stats['calls']}, hedged: {hedge_stats['hedges']} (won {hedge_stats['hedge_wins']}), "
+                  f"timed out: {hedge_stats['timeouts']}, p99 without hedging: {p99_before}, p99 effective: {p99_after}")
+        for kind, limiter in self.caller.limiters.items():
+            limit_stats = limiter.stats()
+            signals = limit_stats["signals"]
+            print(f"  {kind} concurrency limit: {limit_stats['limit']} (peak in flight {limit_stats['peak_in_flight']}, "
+                  f"{limit_stats['increases']} increases, {limit_stats['decreases']} decreases; "
+                  f"429s: {signals['throttled']}, timeouts: {signals['timeout']})")
+            for decision in list(limiter.decisions)[-3:]:
+                print(f"    t={decision['t']:.1f}s {decision['from']} -> {decision['to']} ({decision['reason']})")
+        if self.cassette is not None:
+            cassette_stats = self.cassette.stats()
+            print(f"  Cassette ({cassette_stats['mode']}): {cassette_stats['recorded']} recorded, {cassette_stats['hits']} replayed, {cassette_stats['misses']} missed, {cassette_stats['wraps']} wrapped around")
+        profile_path = self.profiler.write_summary()
+        if profile_path:
+            print(f"  Profile summary: {profile_path}")
+
+    async def cluster_questions_by_creativity(self, engine: str = "llm_chunked"):
+        """
+        Clusters questions based on their creativity level.
+
+        Args:
+            engine (str): "llm_chunked" (default) asks gpt-4o in concurrent batches and caches
+                assignments in CLUSTER_CACHE_FILE so only new questions are classified; "llm" sends
+                every question in a single request with no cache; "local" uses the vectorized
+                nearest-centroid engine in creativity_clustering, with no API call.
+        """
+        if engine == "local":
+            with self.profiler.stage("analysis"):
+                clusters = creativity_clustering.cluster_questions_by_creativity(self.temperature_results)
+        elif engine == "llm_chunked":
+            cache = load_cluster_cache()
+            clusters = await self.vqa_model.cluster_questions_by_creativity_chunked(self.temperature_results, cache)
+            save_cluster_cache(cache)
+        elif engine == "llm":
+            clusters = await self.vqa_model.cluster_questions_by_creativity(self.temperature_results)
+        else:
+            raise ValueError(f"Unknown clustering engine: {engine}")
         print("\n--- Question Clusters by Creativity ---")
         for cluster_name, questions in clusters.items():
             print(f"\nCluster: {cluster_name}")
@@ -134,8 +723,30 @@ class ExperimentRunner:
                 print(f"    - {question}")
         return clusters
 
-    def save_final_experiment_results(self, filename: str = FINAL_RESULTS_FILE):
+    def save_final_experiment_results(self, filename: str = FINAL_RESULTS_FILE, incremental: bool = False):
+        """
+        Writes cell counts, confidence intervals and the per-question analysis to `filename`.
+
+        With incremental=True, intervals and analysis are only recomputed for
+        questions whose results changed since the last incremental save; the
+        rest come from the analysis cache.
+        """
+        # Analyse every process's results, not only the ones this runner recorded.
+        self.results_db.flush()
+        self.temperature_results = parse_temperature_results(self.results_db.temperature_results_json(), self.question_index)
+        with self.profiler.stage("analysis"):
+            self._save_final_experiment_results(filename, incremental)
+        path = self.profiler.write_summary()
+        if path:
+            print(f"Profile summary written to {path}")
+
+    def _save_final_experiment_results(self, filename: str, incremental: bool = False):
         final_results = {"temperature_results": {}}
+        if incremental:
+            ci_analysis, analysis_results = self._incremental_analysis()
+        else:
+            ci_analysis = self._confidence_intervals()
+            analysis_results = self._analyze_temperature_accuracy_changes(ci_analysis)
         for temp, q_data in self.temperature_results.items():
             final_results["temperature_results"][str(temp)] = {}
             for question, acc_data in q_data.items():
@@ -145,21 +756,78 @@ class ExperimentRunner:
                     "false_positives": acc_data.false_positives,
                     "accuracy": acc_data.accuracy
                 }
-        
-        analysis_results = self._analyze_temperature_accuracy_changes()
+                cell_ci = ci_analysis.get(question, {}).get("cells", {}).get(float(temp))
+                if cell_ci:
+                    final_results["temperature_results"][str(temp)][question].update(cell_ci)
+
         if analysis_results:
             final_results["analysis"] = analysis_results
+        self.results_db.save_analysis(analysis_results)
  
         save_final_results_to_json(final_results, filename)
 
-    def _analyze_temperature_accuracy_changes(self) -> dict:
+    def _confidence_intervals(self, questions: set[str] | None = None) -> dict:
+        """Wilson and bootstrap intervals for every cell and consecutive-temperature delta, optionally of some questions only."""
+        counts = {
+            temp: {
+                question: (acc_data.true_positives, acc_data.total_runs)
+                for question, acc_data in q_data.items()
+                if questions is None or question in questions
+            }
+            for temp, q_data in self.temperature_results.items()
+        }
+        return confidence_intervals.analyze_counts(counts)
+
+    def _incremental_analysis(self) -> tuple[dict, dict]:
+        """
+        Confidence intervals and per-question analysis, recomputed only for questions whose results changed.
+
+        Both depend on nothing but the question's own cells, so they are
+        cached per question keyed on its content hash. The cache is dropped
+        whenever this module or confidence_intervals changes.
+        """
+        raw_results = {
+            str(temp): {question: acc_data.to_dict() for question, acc_data in q_data.items()}
+            for temp, q_data in self.temperature_results.items()
+        }
+        hashes = question_hashes(raw_results)
+        cache = AnalysisCache("final_results", source_fingerprint(confidence_intervals.__file__, __file__))
+        changed, removed = cache.diff(hashes)
+        cache.remove(removed)
+        if changed:
+            changed_questions = set(changed)
+            ci_changed = self._confidence_intervals(changed_questions)
+            analysis_changed = self._analyze_temperature_accuracy_changes(ci_changed, changed_questions)
+            for question in changed:
+                cache.update(question, hashes[question], {"ci": ci_changed.get(question), "analysis": analysis_changed.get(question)})
+        if changed or removed:
+            cache.save()
+        print(f"Incremental analysis: recomputed {len(changed)} of {len(hashes)} questions")
+
+        ci_analysis, analysis_results = {}, {}
+        for question in hashes:
+            cached = cache.value(question)
+            if cached["ci"] is not None:
+                # JSON turned the temperature keys into strings.
+                ci_analysis[question] = {
+                    "cells": {float(temp): cell for temp, cell in cached["ci"]["cells"].items()},
+                    "deltas": cached["ci"]["deltas"],
+                }
+            if cached["analysis"] is not None:
+                analysis_results[question] = cached["analysis"]
+        return ci_analysis, analysis_results
+
+    def _analyze_temperature_accuracy_changes(self, ci_analysis: dict | None = None, questions: set[str] | None = None) -> dict:
         analysis_output = {}
         if not self.temperature_results:
             return analysis_output
+        if ci_analysis is None:
+            ci_analysis = self._confidence_intervals(questions)
         
-        questions = set()
-        for temp_data in self.temperature_results.values():
-            questions.update(temp_data.keys())
+        if questions is None:
+            questions = set()
+            for temp_data in self.temperature_results.values():
+                questions.update(temp_data.keys())
         
         for question in questions:
             accuracies_by_temp = {}
@@ -181,12 +849,19 @@ class ExperimentRunner:
                     change = current_accuracy - accuracies_by_temp[sorted_temps[i-1]]
                     change_type = "increased" if change > 0 else "decreased" if change < 0 else "stayed the same"
                     if change_type != "stayed the same":
-                        question_analysis["changes"].append({
+                        change_entry = {
                             "temperature": current_temp,
                             "accuracy": current_accuracy,
                             "change_type": change_type,
                             "from_previous_temp": sorted_temps[i-1]
-                        })
+                        }
+                        # Flag deltas whose confidence interval still covers zero.
+                        for delta in ci_analysis.get(question, {}).get("deltas", []):
+                            if delta["temperature"] == current_temp and delta["from_previous_temp"] == sorted_temps[i-1]:
+                                change_entry["delta_wilson_ci"] = delta["delta_wilson_ci"]
+                                change_entry["delta_bootstrap_ci"] = delta["delta_bootstrap_ci"]
+                                change_entry["significant"] = delta["significant"]
+                        question_analysis["changes"].append(change_entry)
                 if question_analysis["initial_accuracy"] or question_analysis["changes"]:
                     analysis_output[question] = question_analysis
             elif len(accuracies_by_temp) == 1:
@@ -194,8 +869,27 @@ class ExperimentRunner:
                 analysis_output[question] = {"single_result": {"temperature": temp, "accuracy": accuracies_by_temp[temp]}}
         return analysis_output
 
+    def _final_results_from_db(self) -> dict:
+        """Cell counts and the saved analysis from the results database, in the FINAL_RESULTS_FILE layout."""
+        temperature_results = {}
+        for temp in self.results_db.temperatures():
+            temperature_results[str(temp)] = {
+                question: TemperatureAccuracy(total_runs, true_positives, total_runs - true_positives).to_dict()
+                for question, (true_positives, total_runs) in self.results_db.temperature_slice(temp).items()
+            }
+        final_results = {"temperature_results": temperature_results}
+        analysis = self.results_db.analysis()
+        if analysis:
+            final_results["analysis"] = analysis
+        return final_results
+
     def load_and_print_final_results(self, filename: str = FINAL_RESULTS_FILE):
-        loaded_results = load_final_results_from_json(filename)
+        # Without a database yet, read the JSON files instead of creating and seeding one just to print it.
+        if "results_db" not in vars(self) and not os.path.exists(self.results_db_path):
+            loaded_results = load_final_results_from_json(filename)
+        else:
+            self.results_db.flush()
+            loaded_results = load_final_results_from_json(filename) if self.results_db.is_empty() else self._final_results_from_db()
         print("\n--- Final Experiment Results ---")
 
         if "temperature_results" in loaded_results:
@@ -218,7 +912,8 @@ class ExperimentRunner:
                     print(f"  Initial Accuracy (temp={initial['temperature']}): {initial['accuracy']:.2f}")
                 if "changes" in analysis_data and analysis_data["changes"]:
                     for change in analysis_data["changes"]:
-                        print(f"  Accuracy at temp={change['temperature']}: {change['accuracy']:.2f} ({change['change_type']} from previous temp={change['from_previous_temp']})")
+                        significance = "" if change.get("significant", True) else ", not significant"
+                        print(f"  Accuracy at temp={change['temperature']}: {change['accuracy']:.2f} ({change['change_type']} from previous temp={change['from_previous_temp']}{significance})")
                 if "single_result" in analysis_data and analysis_data["single_result"]:
                     single = analysis_data["single_result"]
                     print(f"  Only one temperature result available (temp={single['temperature']}): {single['accuracy']:.2f}")
@@ -233,15 +928,23 @@ async def main():
         return
 
     runner = ExperimentRunner(api_key)
+    # runner = ExperimentRunner(api_key, runs_per_template=100)  # Stratified sample: >= 100 runs per question template
+    # runner = ExperimentRunner(api_key, runs_per_template=100, trim_questions=True)  # ...asking only templates still short of 100 runs
 
     temperatures = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
 
     # await runner.run_temperature_experiment(temperatures)
+    # await runner.run_budgeted_experiment(temperatures, max_calls=20000)  # Spend a fixed budget on the noisiest cells
+    # await runner.run_parameter_sweep(build_grid(temperatures=temperatures, top_ps=[None, 0.9], details=["low", "high"]))
+    # await runner.regrade()  # Re-score stored predictions after changing the grader
+    # await runner.run_logprob_pass(temperatures)  # One T=0 pass with logprobs, then:
+    # runner.simulate_temperature_sweep(temperatures)  # simulate the sweep offline and validate it
     # runner.save_final_experiment_results()
+    # runner.save_final_experiment_results(incremental=True)  # Only recompute the analysis of questions whose results changed
     runner.load_and_print_final_results()
     
     # Cluster questions by creativity level
-    await runner.cluster_questions_by_creativity()
+    await runner.cluster_questions_by_creativity(engine="llm_chunked")
 
 if __name__ == "__main__":
     asyncio.run(main())
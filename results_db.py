@@ -0,0 +1,373 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+RESULTS_DB_FILE = "results.db"
+# How long a writer waits for another process's write lock before failing.
+BUSY_TIMEOUT_MS = 30000
+WRITE_BATCH_SIZE = 500
+DIFFERENT_ANSWERS_SAMPLE_SIZE = 20
+# Stored predicted and golden answers are cut to this many characters.
+MAX_ANSWER_CHARS = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS graded_answers (
+    id INTEGER PRIMARY KEY,
+    temperature REAL NOT NULL,
+    image_id TEXT NOT NULL,
+    question TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    predicted_answer TEXT,
+    golden_answer TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_graded_answers_temperature_question ON graded_answers (temperature, question);
+CREATE INDEX IF NOT EXISTS idx_graded_answers_question ON graded_answers (question);
+CREATE INDEX IF NOT EXISTS idx_graded_answers_image_id ON graded_answers (image_id);
+
+-- Aggregated counts carried over from the JSON files written before the database existed.
+CREATE TABLE IF NOT EXISTS imported_cells (
+    temperature REAL NOT NULL,
+    question TEXT NOT NULL,
+    total_runs INTEGER NOT NULL,
+    true_positives INTEGER NOT NULL,
+    PRIMARY KEY (temperature, question)
+);
+CREATE TABLE IF NOT EXISTS imported_questions (
+    question TEXT PRIMARY KEY,
+    true_positives INTEGER NOT NULL,
+    false_positives INTEGER NOT NULL,
+    different_answers TEXT NOT NULL,
+    different_answers_seen INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS question_analysis (
+    question TEXT PRIMARY KEY,
+    analysis TEXT NOT NULL
+);
+"""
+
+_CELLS_QUERY = """
+SELECT temperature, question, SUM(total_runs), SUM(true_positives) FROM (
+    SELECT temperature, question, COUNT(*) AS total_runs, SUM(correct) AS true_positives
+    FROM graded_answers {where} GROUP BY temperature, question
+    UNION ALL
+    SELECT temperature, question, total_runs, true_positives FROM imported_cells {where}
+) GROUP BY temperature, question
+"""
+
+def _clip(answer: str | None) -> str | None:
+    return answer if answer is None or len(answer) <= MAX_ANSWER_CHARS else answer[:MAX_ANSWER_CHARS]
+
+
+_INSERT_GRADED = "INSERT INTO graded_answers (temperature, image_id, question, correct, predicted_answer, golden_answer) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+class ResultsDB:
+    """
+    SQLite store of graded answers, safe to share between runner processes.
+
+    Every graded answer is one appended row, so concurrent writers never
+    read-modify-write the same record: cell counts are aggregated at query
+    time through the (temperature, question) index. The database runs in
+    WAL mode, so readers never block writers, and a writer waits up to
+    BUSY_TIMEOUT_MS for another process's write lock. Rows are buffered and
+    written in batches of WRITE_BATCH_SIZE, one transaction per batch.
+
+    Writes go through their own connection, so flush_full_batch can run them
+    on a worker thread: waiting for another process's lock then stalls that
+    thread instead of the event loop. Reads use the main connection, which
+    WAL never blocks.
+
+    Counts from the JSON files written before the database existed can be
+    imported once with import_json; queries add them to the graded rows.
+    """
+
+    def __init__(self, filename: str = RESULTS_DB_FILE):
+        self.filename = filename
+        self._conn = sqlite3.connect(filename, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._write_conn = sqlite3.connect(filename, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False)
+        self._write_conn.execute("PRAGMA synchronous=NORMAL")
+        self._write_lock = threading.Lock()
+        self._pending: List[tuple] = []
+        # Rows recorded inside a replacing() block, committed together when it exits.
+        self._staged: List[tuple] | None = None
+
+    def _write(self, statements: Iterable[Tuple[str, Iterable[tuple] | tuple]]):
+        # BEGIN IMMEDIATE takes the write lock up front, so a busy database is
+        # waited on here instead of failing halfway through the transaction.
+        with self._write_lock:
+            self._write_conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, params in statements:
+                    if isinstance(params, tuple):
+                        self._write_conn.execute(sql, params)
+                    else:
+                        self._write_conn.executemany(sql, params)
+                self._write_conn.execute("COMMIT")
+            except BaseException:
+                self._write_conn.execute("ROLLBACK")
+                raise
+
+    def record(self, temperature: float, image_id: str, graded: List[Tuple[str, bool]], answers: Dict[str, Tuple[str, str]]):
+        """
+        Buffers one image's graded answers; flush_full_batch or flush writes them.
+
+        Args:
+            temperature: Temperature the answers were generated at.
+            image_id: Image the questions were asked about.
+            graded: (question, correct) pairs.
+            answers: question -> (golden_answer, predicted_answer).
+        """
+        rows = self._pending if self._staged is None else self._staged
+        for question, score in graded:
+            golden_answer, predicted_answer = answers.get(question, (None, None))
+            rows.append((float(temperature), image_id, question, int(bool(score)), _clip(predicted_answer), _clip(golden_answer)))
+
+    async def flush_full_batch(self):
+        """Writes the buffered rows on a worker thread once WRITE_BATCH_SIZE of them are pending."""
+        if len(self._pending) < WRITE_BATCH_SIZE:
+            return
+        rows, self._pending = self._pending, []
+        await asyncio.to_thread(self._write, [(_INSERT_GRADED, rows)])
+
+    def flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        self._write([(_INSERT_GRADED, rows)])
+
+    def is_empty(self) -> bool:
+        for table in ("graded_answers", "imported_cells", "imported_questions"):
+            if self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                return False
+        return True
+
+    def import_json(self, temperature_results: dict, accuracy_data: dict):
+        """
+        Stores counts from the pre-database JSON files as a baseline.
+
+        Args:
+            temperature_results: Contents of a TEMPERATURE_RESULTS_FILE (temperature -> question -> counts).
+            accuracy_data: Contents of an ACCURACY_DATA_FILE (question -> totals and wrong-answer samples).
+        """
+        cells = [
+            (float(temp), question, int(acc["total_runs"]), int(acc["true_positives"]))
+            for temp, q_data in temperature_results.items() for question, acc in q_data.items()
+        ]
+        questions = [
+            (
+                question,
+                int(acc.get("true_positives", 0)),
+                int(acc.get("false_positives", 0)),
+                json.dumps(acc.get("different_answers", [])[:DIFFERENT_ANSWERS_SAMPLE_SIZE]),
+                int(acc.get("different_answers_seen", len(acc.get("different_answers", [])))),
+            )
+            for question, acc in accuracy_data.items()
+        ]
+        self._write([
+            ("INSERT OR REPLACE INTO imported_cells VALUES (?, ?, ?, ?)", cells),
+            ("INSERT OR REPLACE INTO imported_questions VALUES (?, ?, ?, ?, ?)", questions),
+        ])
+
+    @contextlib.contextmanager
+    def replacing(self, temperature: float, image_ids: Iterable[str]):
+        """
+        Stages the rows recorded inside the block as replacements for the given images' rows at `temperature`, e.g. for a regrade.
+
+        On a clean exit the old rows are deleted and the staged ones inserted
+        in one transaction; if the block raises, the database is left
+        untouched. Imported baseline counts are never affected.
+        """
+        self.flush()
+        self._staged = []
+        try:
+            yield
+            rows, self._staged = self._staged, None
+            self._write([
+                ("DELETE FROM graded_answers WHERE temperature = ? AND image_id = ?", [(float(temperature), image_id) for image_id in set(image_ids)]),
+                (_INSERT_GRADED, rows),
+            ])
+        finally:
+            self._staged = None
+
+    def cell_counts(self, temperature: float | None = None, question: str | None = None) -> Dict[float, Dict[str, Tuple[int, int]]]:
+        """
+        (true_positives, total_runs) per cell, optionally sliced to one temperature and/or question.
+
+        Returns:
+            temperature -> question -> (true_positives, total_runs).
+        """
+        conditions, params = [], []
+        if temperature is not None:
+            conditions.append("temperature = ?")
+            params.append(float(temperature))
+        if question is not None:
+            conditions.append("question = ?")
+            params.append(question)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        counts: Dict[float, Dict[str, Tuple[int, int]]] = {}
+        for temp, q, total_runs, true_positives in self._conn.execute(_CELLS_QUERY.format(where=where), params * 2):
+            counts.setdefault(temp, {})[q] = (int(true_positives), int(total_runs))
+        return counts
+
+    def temperature_slice(self, temperature: float) -> Dict[str, Tuple[int, int]]:
+        """question -> (true_positives, total_runs) at one temperature."""
+        return self.cell_counts(temperature=temperature).get(float(temperature), {})
+
+    def question_slice(self, question: str) -> Dict[float, Tuple[int, int]]:
+        """temperature -> (true_positives, total_runs) for one question."""
+        return {temp: q_counts[question] for temp, q_counts in self.cell_counts(question=question).items()}
+
+    def temperatures(self) -> List[float]:
+        rows = self._conn.execute("SELECT DISTINCT temperature FROM graded_answers UNION SELECT DISTINCT temperature FROM imported_cells ORDER BY 1")
+        return [row[0] for row in rows]
+
+    def image_answers(self, image_id: str) -> List[dict]:
+        """Every graded answer recorded for one image, across temperatures."""
+        rows = self._conn.execute(
+            "SELECT temperature, question, correct, predicted_answer, golden_answer FROM graded_answers WHERE image_id = ? ORDER BY id",
+            (image_id,),
+        )
+        return [
+            {"temperature": temp, "question": question, "correct": bool(correct), "predicted_answer": predicted, "golden_answer": golden}
+            for temp, question, correct, predicted, golden in rows
+        ]
+
+    def temperature_results_json(self) -> dict:
+        """Cell counts in the TEMPERATURE_RESULTS_FILE JSON format."""
+        return {
+            str(temp): {
+                question: {
+                    "total_runs": total_runs,
+                    "true_positives": true_positives,
+                    "false_positives": total_runs - true_positives,
+                    "accuracy": true_positives / total_runs if total_runs > 0 else 0.0,
+                }
+                for question, (true_positives, total_runs) in q_counts.items()
+            }
+            for temp, q_counts in sorted(self.cell_counts().items())
+        }
+
+    def accuracy_data_json(self) -> dict:
+        """
+        Per-question totals and wrong-answer samples in the ACCURACY_DATA_FILE JSON format.
+
+        Samples are picked by a multiplicative hash of the row id, which
+        spreads them over the run but gives the same export for the same data.
+        """
+        data: Dict[str, dict] = {}
+        for question, true_positives, false_positives, different_answers, seen in self._conn.execute("SELECT * FROM imported_questions"):
+            data[question] = {
+                "true_positives": true_positives,
+                "false_positives": false_positives,
+                "different_answers": json.loads(different_answers),
+                "different_answers_seen": seen,
+            }
+        for question, true_positives, false_positives in self._conn.execute(
+            "SELECT question, SUM(correct), SUM(1 - correct) FROM graded_answers GROUP BY question"
+        ):
+            entry = data.setdefault(question, {"true_positives": 0, "false_positives": 0, "different_answers": [], "different_answers_seen": 0})
+            entry["true_positives"] += int(true_positives)
+            entry["false_positives"] += int(false_positives)
+            entry["different_answers_seen"] += int(false_positives)
+        sampled = self._conn.execute(
+            """
+            SELECT question, predicted_answer, golden_answer FROM (
+                SELECT question, predicted_answer, golden_answer,
+                       ROW_NUMBER() OVER (PARTITION BY question ORDER BY (id * 2654435761) % 4294967296, id) AS n
+                FROM graded_answers WHERE correct = 0
+            ) WHERE n <= ?
+            """,
+            (DIFFERENT_ANSWERS_SAMPLE_SIZE,),
+        )
+        for question, predicted_answer, golden_answer in sampled:
+            samples = data[question]["different_answers"]
+            if len(samples) < DIFFERENT_ANSWERS_SAMPLE_SIZE:
+                samples.append([predicted_answer, golden_answer])
+        return data
+
+    def save_analysis(self, analysis: Dict[str, dict]):
+        """Replaces the stored per-question temperature analysis (the "analysis" part of final results)."""
+        self._write([
+            ("DELETE FROM question_analysis", ()),
+            ("INSERT INTO question_analysis VALUES (?, ?)", [(question, json.dumps(data)) for question, data in analysis.items()]),
+        ])
+
+    def analysis(self, question: str | None = None) -> Dict[str, dict]:
+        if question is None:
+            rows = self._conn.execute("SELECT question, analysis FROM question_analysis")
+        else:
+            rows = self._conn.execute("SELECT question, analysis FROM question_analysis WHERE question = ?", (question,))
+        return {q: json.loads(data) for q, data in rows}
+
+    def export_json(self, temperature_results_file: str, accuracy_data_file: str):
+        """Writes the TEMPERATURE_RESULTS_FILE and ACCURACY_DATA_FILE JSON exports."""
+        self.flush()
+        with open(temperature_results_file, 'w') as f:
+            json.dump(self.temperature_results_json(), f, indent=4)
+        with open(accuracy_data_file, 'w') as f:
+            json.dump(self.accuracy_data_json(), f, indent=4)
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+        self._write_conn.close()
+
+
+def read_temperature_results(path: str) -> dict:
+    """
+    Loads results in the TEMPERATURE_RESULTS_FILE JSON format from either that
+    JSON file or a results database, so analysis scripts can read both.
+    """
+    if path.endswith(".db"):
+        db = ResultsDB(path)
+        try:
+            return db.temperature_results_json()
+        finally:
+            db.close()
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def default_results_path(base_dir: str, json_name: str = "temperature_accuracy_data.json") -> str:
+    """The results database in base_dir when it exists, otherwise the JSON export."""
+    db_path = os.path.join(base_dir, RESULTS_DB_FILE)
+    return db_path if os.path.exists(db_path) else os.path.join(base_dir, json_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import results JSON into the results database, or export it back.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("--db", default=RESULTS_DB_FILE)
+    parser.add_argument("--temperature-results", default="temperature_accuracy_data.json")
+    parser.add_argument("--accuracy-data", default="accuracy_data.json")
+    args = parser.parse_args()
+
+    db = ResultsDB(args.db)
+    if args.command == "import":
+        if not db.is_empty():
+            print(f"{args.db} already has results; not importing.")
+        else:
+            temperature_results = read_temperature_results(args.temperature_results) if os.path.exists(args.temperature_results) else {}
+            accuracy_data = {}
+            if os.path.exists(args.accuracy_data):
+                with open(args.accuracy_data, "r") as f:
+                    accuracy_data = json.load(f)
+            db.import_json(temperature_results, accuracy_data)
+            print(f"Imported {args.temperature_results} and {args.accuracy_data} into {args.db}")
+    else:
+        db.export_json(args.temperature_results, args.accuracy_data)
+        print(f"Exported {args.db} to {args.temperature_results} and {args.accuracy_data}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import itertools
+from dataclasses import asdict, dataclass
+from typing import Iterable, List
+
+
+@dataclass(frozen=True)
+class GridPoint:
+    """One combination of generation settings in a parameter sweep.
+
+    None for top_p or detail leaves the API default in place.
+    """
+    temperature: float = 0.0
+    top_p: float | None = None
+    model: str = "gpt-4o"
+    detail: str | None = None
+
+    def query_kwargs(self) -> dict:
+        return asdict(self)
+
+    def key(self) -> str:
+        """Stable string form of the full parameter tuple, used as the JSON key."""
+        return "|".join(f"{name}={value}" for name, value in asdict(self).items())
+
+    @classmethod
+    def from_key(cls, key: str) -> "GridPoint":
+        values = dict(part.split("=", 1) for part in key.split("|"))
+        return cls(
+            temperature=float(values["temperature"]),
+            top_p=None if values["top_p"] == "None" else float(values["top_p"]),
+            model=values["model"],
+            detail=None if values["detail"] == "None" else values["detail"],
+        )
+
+
+def build_grid(
+    temperatures: Iterable[float] = (0.0,),
+    top_ps: Iterable[float | None] = (None,),
+    models: Iterable[str] = ("gpt-4o",),
+    details: Iterable[str | None] = (None,),
+) -> List[GridPoint]:
+    """Cartesian product of the given settings, one GridPoint per combination."""
+    return [
+        GridPoint(temperature=t, top_p=p, model=m, detail=d)
+        for t, p, m, d in itertools.product(temperatures, top_ps, models, details)
+    ]